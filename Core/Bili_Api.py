@@ -0,0 +1,43 @@
+from bilibili_api import video, comment
+from .Video_Info_Cache import get_video_info_cache
+
+
+ORDER_TYPES = {
+    'time': comment.OrderType.TIME,
+    'like': comment.OrderType.LIKE,
+    }
+
+
+class BiliCommentApi:
+    """
+    评论相关接口的异步封装，爬取引擎只通过这里访问B站
+
+    各方法的 credential 参数用于使用凭证池时覆盖默认凭证。
+    视频信息经过 info_cache（默认为进程内共用的缓存），同一 BV 号短时间内只请求一次。
+    """
+
+    def __init__(self, credential=None, info_cache=None):
+        self.credential = credential
+        self.info_cache = info_cache or get_video_info_cache()
+
+    async def get_video_info(self, bv_id, credential=None):
+        """获取视频信息"""
+        async def fetch(bvid):
+            v = video.Video(bvid=bvid, credential=credential or self.credential)
+            return await v.get_info()
+
+        return await self.info_cache.get(bv_id, fetch)
+
+    async def get_comments(self, aid, page, order='time', credential=None):
+        """获取一页主评论，order 为 'time'（按时间倒序）或 'like'"""
+        return await comment.get_comments(aid, comment.CommentResourceType.VIDEO,
+                                          page, order=ORDER_TYPES[order], credential=credential or self.credential)
+
+    async def get_sub_comments(self, aid, rpid, page, page_size=20, credential=None):
+        """获取某条主评论下的一页子评论"""
+        sub_cmt = comment.Comment(
+            oid=aid, rpid=rpid,
+            type_=comment.CommentResourceType.VIDEO,
+            credential=credential or self.credential
+            )
+        return await sub_cmt.get_sub_comments(page, page_size)
@@ -0,0 +1,220 @@
+import json
+import os
+import struct
+from array import array
+import numpy as np
+from .Comment_Dataset import build_metadata, process_comments, build_data_structure, local_datetimes, \
+    video_info_from_metadata
+from .Comment_Record import CommentRecord, as_record
+from .Compression import split_compression
+
+MAGIC = b'ECHOCOL1'
+# 各列在文件中的起始位置按此对齐，保证可以直接映射为对应类型的数组
+ALIGN = 64
+
+# 列名 -> (类型, CommentRecord 属性)
+INT_COLUMNS = {
+    'rpid': ('<i8', 'rpid'),
+    'parent': ('<i8', 'parent'),
+    'user_id': ('<i8', 'mid'),
+    'ctime': ('<i8', 'ctime'),
+    'like': ('<i8', 'like'),
+    'rcount': ('<i4', 'rcount'),
+    }
+
+
+def _pad(f):
+    f.write(b'\0' * (-f.tell() % ALIGN))
+
+
+def columnar_filename(filename):
+    """与数据集文件同名的 .cols 路径（去掉 .gz / .zst 与格式扩展名）"""
+    return os.path.splitext(split_compression(filename)[0])[0] + '.cols'
+
+
+def save_columnar(records, filename, video_info, failed_rpids=None):
+    """
+    保存为列式数据集（.cols）
+
+    整数列以定长数组保存，性别与 IP 属地保存为编码，评论内容与用户名拼接为 UTF-8 字节块并用偏移数组索引。
+    评论内容边读边写，内存中只有定长列。records 可以是任意可迭代对象（如落盘缓冲）。
+    文件结构：MAGIC | 各列数据 | 头部 JSON | 头部长度(8 字节) | MAGIC
+    读取时需要内存映射，因此不支持压缩。
+    """
+    if split_compression(filename)[1]:
+        raise ValueError("列式数据集需要内存映射读取，不能压缩保存")
+    ints = {name: array('q') for name in INT_COLUMNS}
+    sex_codes, location_codes = array('B'), array('H')
+    sexes, locations = {}, {}
+    message_offsets, uname_offsets = array('q', [0]), array('q', [0])
+    unames = bytearray()
+    columns = {}
+    with open(filename, 'wb') as f:
+        f.write(MAGIC)
+        _pad(f)
+        message_start = f.tell()
+        roots = 0
+        for cmt in records:
+            cmt = as_record(cmt)
+            for name, (_, attr) in INT_COLUMNS.items():
+                ints[name].append(getattr(cmt, attr))
+            sex_codes.append(sexes.setdefault(cmt.sex, len(sexes)))
+            location_codes.append(locations.setdefault(cmt.location, len(locations)))
+            message = cmt.message.encode('utf-8')
+            f.write(message)
+            message_offsets.append(message_offsets[-1] + len(message))
+            unames += cmt.uname.encode('utf-8')
+            uname_offsets.append(len(unames))
+            roots += not cmt.is_sub_reply
+        columns['message'] = {'dtype': '|u1', 'offset': message_start, 'length': message_offsets[-1]}
+
+        arrays = {name: np.asarray(values).astype(INT_COLUMNS[name][0]) for name, values in ints.items()}
+        arrays['sex'] = np.asarray(sex_codes).astype('|u1')
+        arrays['location'] = np.asarray(location_codes).astype('<u2')
+        arrays['message_offsets'] = np.asarray(message_offsets).astype('<i8')
+        arrays['uname_offsets'] = np.asarray(uname_offsets).astype('<i8')
+        arrays['uname'] = np.frombuffer(bytes(unames), dtype='|u1')
+        for name, values in arrays.items():
+            _pad(f)
+            columns[name] = {'dtype': values.dtype.str, 'offset': f.tell(), 'length': len(values)}
+            f.write(values.tobytes())
+
+        header = json.dumps({
+            'count': len(arrays['rpid']),
+            'metadata': build_metadata(video_info, roots, failed_rpids),
+            'columns': columns,
+            'sexes': list(sexes),
+            'locations': list(locations),
+            }, ensure_ascii=False).encode('utf-8')
+        f.write(header)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(MAGIC)
+    return filename
+
+
+class ColumnarDataset:
+    """
+    内存映射读取列式数据集
+
+    打开时只读取头部，各列按需映射为 NumPy 数组，不会把整个文件读入内存；
+    评论内容按下标解码，to_frame 生成与 load_comment_frame 相同列的 DataFrame。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"不是列式数据集: {path}")
+            f.seek(size - len(MAGIC) - 8)
+            header_length = struct.unpack('<Q', f.read(8))[0]
+            f.seek(size - len(MAGIC) - 8 - header_length)
+            header = json.loads(f.read(header_length).decode('utf-8'))
+        self.count = header['count']
+        self.metadata = header['metadata']
+        self.sexes = header['sexes']
+        self.locations = header['locations']
+        self._columns = header['columns']
+        self._map = np.memmap(path, dtype=np.uint8, mode='r')
+
+    def __len__(self):
+        return self.count
+
+    def column(self, name):
+        """只读的列数组（内存映射）"""
+        info = self._columns[name]
+        dtype = np.dtype(info['dtype'])
+        end = info['offset'] + info['length'] * dtype.itemsize
+        return self._map[info['offset']:end].view(dtype)
+
+    def _text(self, name, i):
+        offsets = self.column(f'{name}_offsets')
+        return self.column(name)[offsets[i]:offsets[i + 1]].tobytes().decode('utf-8')
+
+    def message(self, i):
+        return self._text('message', i)
+
+    def uname(self, i):
+        return self._text('uname', i)
+
+    def raw_texts(self, name, indices=None):
+        """
+        文本列（'message' 或 'uname'）未解码的 UTF-8 字节
+
+        取全部时整块读出再切分；只取部分下标时逐条从内存映射中切出，不把整个字节块读入内存。
+        """
+        offsets = np.asarray(self.column(f'{name}_offsets'))
+        starts, ends = offsets[:-1], offsets[1:]
+        if indices is None:
+            blob = self.column(name).tobytes()
+            return [blob[start:end] for start, end in zip(starts.tolist(), ends.tolist())]
+        column = self.column(name)
+        return [column[start:end].tobytes() for start, end in zip(starts[indices].tolist(), ends[indices].tolist())]
+
+    def _texts(self, name, indices=None):
+        return [text.decode('utf-8') for text in self.raw_texts(name, indices)]
+
+    def messages(self, indices=None):
+        """解码评论内容，indices 为 None 时解码全部"""
+        return self._texts('message', indices)
+
+    def unames(self, indices=None):
+        return self._texts('uname', indices)
+
+    def record(self, i):
+        return CommentRecord(
+            int(self.column('rpid')[i]), int(self.column('parent')[i]), int(self.column('user_id')[i]),
+            self.uname(i), self.sexes[self.column('sex')[i]], self.message(i), int(self.column('ctime')[i]),
+            int(self.column('like')[i]), int(self.column('rcount')[i]), self.locations[self.column('location')[i]]
+            )
+
+    def records(self, indices):
+        """按下标批量取评论记录"""
+        indices = np.asarray(indices, dtype=np.int64)
+        rpid, parent, user_id, ctime, like, rcount = (np.asarray(self.column(name))[indices].tolist()
+                                                      for name in INT_COLUMNS)
+        sex = np.asarray(self.column('sex'))[indices].tolist()
+        location = np.asarray(self.column('location'))[indices].tolist()
+        unames, messages = self._texts('uname', indices), self._texts('message', indices)
+        return [CommentRecord(rpid[i], parent[i], user_id[i], unames[i], self.sexes[sex[i]], messages[i], ctime[i],
+                              like[i], rcount[i], self.locations[location[i]]) for i in range(len(indices))]
+
+    def __iter__(self):
+        rpid, parent, user_id, ctime, like, rcount = (self.column(name).tolist() for name in INT_COLUMNS)
+        sex, location = self.column('sex').tolist(), self.column('location').tolist()
+        for i, (uname, message) in enumerate(zip(self._texts('uname'), self._texts('message'))):
+            yield CommentRecord(rpid[i], parent[i], user_id[i], uname, self.sexes[sex[i]], message, ctime[i], like[i],
+                                rcount[i], self.locations[location[i]])
+
+    def to_dataset(self):
+        """整理为与保存的 JSON 相同的数据集结构"""
+        return build_data_structure(process_comments(list(self)), video_info_from_metadata(self.metadata),
+                                    self.metadata.get('failed_rpids'))
+
+    def to_frame(self, include_replied_roots=False):
+        """
+        生成每条评论一行的 DataFrame，列与 load_comment_frame 相同
+
+        与 load_comment_frame 一致，默认不含有回复的主评论（只保留它们的回复），也不含找不到主评论的回复。
+        """
+        import pandas as pd
+        rpid = np.asarray(self.column('rpid'))
+        parent = np.asarray(self.column('parent'))
+        keep = slice(None)
+        if not include_replied_roots:
+            is_sub = parent != 0
+            keep = np.flatnonzero(np.where(is_sub, np.isin(parent, rpid), ~np.isin(rpid, parent)))
+        # 与保存的 JSON 一致，使用本地时间
+        ctime = np.asarray(self.column('ctime'))[keep]
+        return pd.DataFrame({
+            'rpid': rpid[keep],
+            'user_id': np.asarray(self.column('user_id'))[keep],
+            'uname': self._texts('uname', keep),
+            'message': self._texts('message', keep),
+            'time': local_datetimes(ctime).astype('datetime64[ns]'),
+            'ctime': ctime,
+            'sex': np.array(self.sexes, dtype=object)[np.asarray(self.column('sex'))[keep]],
+            'Ip': np.array(self.locations, dtype=object)[np.asarray(self.column('location'))[keep]],
+            'like': np.asarray(self.column('like'))[keep],
+            'is_sub_reply': parent[keep] != 0,
+            })
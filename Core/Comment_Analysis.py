@@ -0,0 +1,158 @@
+import os
+from collections import Counter
+import pandas as pd
+from wordcloud import WordCloud, STOPWORDS
+from .Columnar_Dataset import ColumnarDataset
+from .Comment_Dataset import load_dataset, local_datetimes
+from .Comment_Store import CommentStore
+from .Segmentation import segment_messages
+from .Sentiment import sentiment_scores, sentiment_labels
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+default_stopwords_file = os.path.join(script_dir, '../resource/stopwords.txt')
+
+
+def local_times(ctime):
+    """整数时间戳列转换为本地时间（不带时区），与保存的 time 字段一致"""
+    return pd.Series(local_datetimes(ctime), index=getattr(ctime, 'index', None)).astype('datetime64[ns]')
+
+
+def _set_time_column(df):
+    # 新数据集带有整数 ctime，直接换算；旧文件只有 time 字符串
+    if 'ctime' in df and df['ctime'].notna().all():
+        df['time'] = local_times(df['ctime'].astype('int64'))
+    else:
+        df['time'] = pd.to_datetime(df['time'])
+
+
+def load_comment_frame(json_file):
+    """读取保存的评论文件，展开为每条评论一行的 DataFrame；列式数据集直接由内存映射的列构建"""
+    if json_file.endswith('.cols'):
+        return ColumnarDataset(json_file).to_frame()
+    temp_data = load_dataset(json_file).get('comments', {})
+    new_data_dict = {}
+    for key, value in temp_data.items():
+        if len(value['replies']) == 0:
+            new_data_dict[key] = value
+            del new_data_dict[key]['replies']
+        else:
+            for sub_cmt in value['replies']:
+                temp_key = sub_cmt['rpid']
+                new_data_dict[temp_key] = sub_cmt
+    df = pd.DataFrame(list(new_data_dict.values()))
+    _set_time_column(df)
+    return df
+
+
+def load_store_frame(db_path, bvid=None, start=None, end=None, user_id=None, top=None):
+    """
+    从评论库查询一部分评论，列与 load_comment_frame 相同
+
+    Args:
+        bvid: 只查某个视频
+        start, end: 日期范围（datetime，含 start 不含 end）
+        user_id: 只查某个用户
+        top: 只取点赞数最高的前 top 条
+    """
+    with CommentStore(db_path) as store:
+        aid = None
+        if bvid:
+            aid = store.find_aid(bvid)
+            if aid is None:
+                raise ValueError(f"评论库中没有视频 {bvid}")
+        records = store.query(aid,
+                              start=int(start.timestamp()) if start else None,
+                              end=int(end.timestamp()) if end else None,
+                              user_id=user_id,
+                              order='like' if top else 'ctime',
+                              limit=top)
+    if not records:
+        raise ValueError("没有符合条件的评论")
+    ctime = pd.Series([cmt.ctime for cmt in records], dtype='int64')
+    return pd.DataFrame({
+        'rpid': [cmt.rpid for cmt in records],
+        'user_id': [cmt.mid for cmt in records],
+        'uname': [cmt.uname for cmt in records],
+        'message': [cmt.message for cmt in records],
+        'time': local_times(ctime),
+        'ctime': ctime,
+        'sex': [cmt.sex for cmt in records],
+        'Ip': [cmt.location for cmt in records],
+        'like': [cmt.like for cmt in records],
+        'is_sub_reply': [cmt.is_sub_reply for cmt in records],
+        })
+
+
+def load_stopwords(stopwords_file=default_stopwords_file):
+    with open(stopwords_file, "r", encoding="utf-8") as f:
+        return set([line.strip() for line in f if line.strip()])
+
+
+def generate_wordcloud(text, path):
+    WordCloud(font_path='msyh.ttc', width=400, height=300,
+              max_words=15, background_color='white',
+              stopwords=set(STOPWORDS),
+              random_state=42).generate(text).to_file(path)
+    return path
+
+
+def analyze_dataset(json_file, stopwords_file=default_stopwords_file, output_prefix='', progress_callback=None,
+                    workers=None):
+    """
+    对保存的评论文件做分词、情感分析、每日热度统计并生成词云
+
+    Args:
+        json_file: 保存的评论文件
+        stopwords_file: 停用词表
+        output_prefix: 词云图片文件名前缀，默认输出到当前目录
+        progress_callback: 进度回调 (current, total, message)
+        workers: 分词与情感分析使用的进程数，None 或 0 为全部 CPU 核心
+    """
+    return analyze_frame(load_comment_frame(json_file), stopwords_file, output_prefix, progress_callback, workers)
+
+
+def analyze_frame(df, stopwords_file=default_stopwords_file, output_prefix='', progress_callback=None, workers=None):
+    """对每条评论一行的 DataFrame 做分析，参数与返回值同 analyze_dataset"""
+    stopwords = load_stopwords(stopwords_file)
+    total = len(df)
+
+    df['clean_message'] = segment_messages(df['message'].tolist(), stopwords, progress_callback, workers)
+    df['sentiment'] = sentiment_scores(df['message'].tolist(), progress_callback, workers)
+    df['sentiment_label'] = sentiment_labels(df['sentiment'])
+
+    df['date'] = df['time'].dt.date
+    daily_counts = df.groupby('date').size().to_dict()
+
+    all_words = " ".join(df['clean_message'].tolist()).split()
+    word_counts = dict(Counter(all_words).most_common(15))
+
+    all_text = " ".join(df['clean_message'].tolist())
+    high_text = " ".join(df[df['like'] > 0]['clean_message'].tolist())
+
+    wordcloud_all = generate_wordcloud(all_text, f"{output_prefix}wordcloud_all.png")
+    if progress_callback:
+        progress_callback(total, total, "生成全部词云完成")
+    wordcloud_high = generate_wordcloud(high_text, f"{output_prefix}wordcloud_high.png")
+    if progress_callback:
+        progress_callback(total, total, "生成高赞词云完成")
+
+    return {
+        "df": df,
+        "daily_counts": daily_counts,
+        "word_counts": word_counts,
+        "sentiment": df['sentiment_label'].value_counts().to_dict(),
+        "wordcloud_all": wordcloud_all,
+        "wordcloud_high": wordcloud_high
+        }
+
+
+def summarize_result(result):
+    """去掉 DataFrame，转换为可以写入 JSON 的摘要"""
+    return {
+        "comment_count": len(result['df']),
+        "daily_counts": {str(day): int(count) for day, count in result['daily_counts'].items()},
+        "word_counts": result['word_counts'],
+        "sentiment": {label: int(count) for label, count in result['sentiment'].items()},
+        "wordcloud_all": result['wordcloud_all'],
+        "wordcloud_high": result['wordcloud_high']
+        }
@@ -0,0 +1,325 @@
+import gc
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from operator import attrgetter
+from typing import Dict
+from .Comment_Record import CommentRecord, as_record
+from .Compression import split_compression, open_output, open_input
+
+# 流式写入时攒够这么多字节才写一次文件
+FLUSH_BYTES = 1 << 20
+# 进度回调的最短间隔（秒）
+PROGRESS_INTERVAL = 0.2
+
+FIELDS = ('rpid', 'parent', 'mid', 'uname', 'sex', 'message', 'ctime', 'like', 'rcount', 'location')
+_get_fields = attrgetter(*FIELDS)
+# 时区偏移与夏令时切换都在整刻钟上，同一刻钟内的时间戳偏移相同
+_OFFSET_STEP = 900
+
+
+def throttled(progress_callback, interval=PROGRESS_INTERVAL):
+    """包装进度回调，两次调用间隔不足 interval 秒时跳过；传入 None 时返回 None"""
+    if progress_callback is None:
+        return None
+    last = [0.0]
+
+    def report(*args):
+        now = time.monotonic()
+        if now - last[0] >= interval:
+            last[0] = now
+            progress_callback(*args)
+    return report
+
+
+def extract_fields(comments, progress_callback=None):
+    """一次遍历取出 FIELDS 中的各字段，返回元组列表，ctime 保持为整数时间戳"""
+    report = throttled(progress_callback)
+    total = len(comments) if hasattr(comments, '__len__') else 0
+    rows = []
+    for i, cmt in enumerate(comments, 1):
+        rows.append(_get_fields(as_record(cmt)))
+        if report and i % 1000 == 0:
+            report(1, 3, f"已读取 {i}/{total} 条评论")
+    return rows
+
+
+def local_datetimes(ctimes):
+    """
+    批量把秒级时间戳换算为本地时间，返回 datetime64[s] 数组，与 datetime.fromtimestamp(t) 一致
+
+    每一刻钟只查询一次本地时区偏移，其余由 NumPy 按数组计算。
+    """
+    import numpy as np
+    ctimes = np.asarray(ctimes, dtype=np.int64)
+    if not len(ctimes):
+        return ctimes.astype('datetime64[s]')
+    steps, index = np.unique(ctimes // _OFFSET_STEP, return_inverse=True)
+    epoch = datetime(1970, 1, 1)
+    offsets = np.array([(datetime.fromtimestamp(t) - epoch) // timedelta(seconds=1) - t
+                        for t in (steps * _OFFSET_STEP).tolist()], dtype=np.int64)
+    return (ctimes + offsets[index]).astype('datetime64[s]')
+
+
+def format_local_times(ctimes):
+    """批量格式化为本地时间字符串，结果与 datetime.fromtimestamp(t).isoformat() 相同"""
+    import numpy as np
+    return np.datetime_as_string(local_datetimes(ctimes), unit='s').tolist()
+
+
+def process_comments(comments, base_comments=None, progress_callback=None, failed_rpids=None):
+    """
+    把原始评论整理为以主评论 rpid 为键、子评论挂在 replies 下的结构
+
+    先一次取出全部字段并批量格式化时间，再组装每条评论；进度回调按时间节流。
+    增量爬取时重新获取过回复的已知主评论也在 comments 中，它的回复整体替换为新获取的回复（可以为空），
+    回复获取失败（在 failed_rpids 中）的保留基准数据中的回复。
+
+    Args:
+        comments: 评论记录列表（CommentRecord，也接受原始评论）或落盘缓冲
+        base_comments: 增量爬取的基准数据，新数据合并到它上面
+        progress_callback: 进度回调 (current_step, total_steps, message)
+        failed_rpids: 回复获取失败的主评论
+    """
+    processed_comments = {}
+    if base_comments:
+        for value in base_comments.values():
+            processed_comments[value['rpid']] = value
+    failed = set(failed_rpids or ())
+    rows = extract_fields(comments, progress_callback)
+    times = format_local_times([row[6] for row in rows])
+    report = throttled(progress_callback)
+    total_comments = len(rows)
+    children_map = {}
+    for i, ((rpid, parent, mid, uname, sex, message, ctime, like, rcount, location), time_text) in enumerate(
+            zip(rows, times), 1):
+        # 与 CommentRecord.to_info 相同的格式
+        info = {"rpid": rpid, "user_id": mid, "uname": uname, "message": message, "time": time_text,
+                "ctime": ctime, "sex": sex, "Ip": location, "like": like, "rcount": rcount,
+                "is_sub_reply": parent != 0}
+        if parent == 0:
+            base = processed_comments.get(rpid) if rpid in failed else None
+            info['replies'] = base.get('replies', []) if base else []
+            processed_comments[rpid] = info
+        else:
+            children_map.setdefault(parent, []).append(info)
+        if report and i % 1000 == 0:
+            report(1, 3, f"已分流{i}/{total_comments} 条评论")
+    for parent_id, replies in children_map.items():
+        if parent_id in processed_comments and parent_id not in failed:
+            # 重新获取的楼层是完整的，直接替换基准数据中的旧回复
+            processed_comments[parent_id]['replies'] = replies
+
+    return processed_comments
+
+
+def build_metadata(video_info, main_comment_count, failed_rpids=None):
+    """数据集的 metadata，failed_rpids 为回复未能获取完整的主评论，增量爬取时会重新获取"""
+    return {
+        "video_info": {
+            "aid": video_info.get('aid'),
+            "bvid": video_info.get('bvid'),
+            "title": video_info.get('title'),
+            "author": video_info.get('owner', {}).get('name'),
+            "crawl_time": datetime.now().isoformat()
+            },
+        "main_comment_count": main_comment_count,
+        "total_comments": video_info.get('stat', {}).get('reply', 0),
+        "failed_rpids": sorted(failed_rpids or []),
+        "save_time": datetime.now().isoformat()
+        }
+
+
+def video_info_from_metadata(metadata):
+    """由数据集的 metadata 还原 build_metadata 所需的视频信息"""
+    info = metadata.get('video_info', {})
+    return {'aid': info.get('aid'), 'bvid': info.get('bvid'), 'title': info.get('title'),
+            'owner': {'name': info.get('author')}, 'stat': {'reply': metadata.get('total_comments', 0)}}
+
+
+def build_data_structure(processed_comments, video_info, failed_rpids=None):
+    """构建完整的数据结构"""
+    return {
+        "metadata": build_metadata(video_info, len(processed_comments), failed_rpids),
+        "comments": processed_comments
+        }
+
+
+class _ChunkedWriter:
+    """攒够 flush_bytes 字节再写入，记录已写入的字节数"""
+
+    def __init__(self, f, flush_bytes=FLUSH_BYTES):
+        self.f = f
+        self.flush_bytes = flush_bytes
+        self.written = 0
+        self._chunks = []
+        self._pending = 0
+
+    def write(self, text):
+        self._chunks.append(text)
+        self._pending += len(text)
+        if self._pending >= self.flush_bytes:
+            self.flush()
+            return True
+        return False
+
+    def flush(self):
+        data = "".join(self._chunks).encode('utf-8')
+        self.f.write(data)
+        self.written += len(data)
+        self._chunks = []
+        self._pending = 0
+
+
+def _report_written(progress_callback, done, total, writer):
+    if progress_callback:
+        progress_callback(done, total, f"已写入 {done}/{total} 条，{writer.written / 1048576:.1f} MB")
+
+
+def save_dataset(data, filename, progress_callback=None, flush_bytes=FLUSH_BYTES):
+    """
+    流式保存数据集：逐条序列化主评论（连同其回复），每条主评论占一行，攒够 flush_bytes 字节写一次
+
+    文件名以 .gz / .zst 结尾时边写边压缩，压缩在后台线程进行。
+
+    Args:
+        data: build_data_structure 的结果
+        filename: 保存路径
+        progress_callback: 进度回调 (已写入主评论数, 主评论总数, message)，每次写入文件时调用
+    """
+    comments = data['comments']
+    total = len(comments)
+    with open_output(filename) as f:
+        writer = _ChunkedWriter(f, flush_bytes)
+        writer.write('{"metadata": ' + json.dumps(data['metadata'], ensure_ascii=False) + ',\n"comments": {')
+        for i, (key, value) in enumerate(comments.items(), 1):
+            # 与 json.dump 一致，键统一写成字符串
+            line = ('\n' if i == 1 else ',\n') + json.dumps(str(key)) + ': ' + json.dumps(value, ensure_ascii=False)
+            if writer.write(line):
+                _report_written(progress_callback, i, total, writer)
+        writer.write('\n}}\n')
+        writer.flush()
+    _report_written(progress_callback, total, total, writer)
+
+
+def iter_dataset_records(processed_comments):
+    """把整理后的数据集展开为评论记录，主评论之后紧跟它的回复"""
+    for value in processed_comments.values():
+        yield CommentRecord.from_info(value)
+        for reply in value.get('replies', []):
+            yield CommentRecord.from_info(reply, value['rpid'])
+
+
+def save_records(records, filename, video_info, failed_rpids=None, total=None, progress_callback=None,
+                 flush_bytes=FLUSH_BYTES):
+    """
+    以 NDJSON 流式保存：每行一条评论记录，最后一行为 {"metadata": ...}
+
+    records 可以是任意可迭代对象（如落盘缓冲），内存占用与评论数无关。文件名以 .gz / .zst 结尾时压缩保存。
+    """
+    if total is None and hasattr(records, '__len__'):
+        total = len(records)
+    roots = 0
+    done = 0
+    with open_output(filename) as f:
+        writer = _ChunkedWriter(f, flush_bytes)
+        for cmt in records:
+            cmt = as_record(cmt)
+            roots += not cmt.is_sub_reply
+            done += 1
+            if writer.write(json.dumps(cmt.to_dict(), ensure_ascii=False) + "\n"):
+                _report_written(progress_callback, done, total or done, writer)
+        writer.write(json.dumps({"metadata": build_metadata(video_info, roots, failed_rpids)},
+                                ensure_ascii=False) + "\n")
+        writer.flush()
+    _report_written(progress_callback, done, total or done, writer)
+
+
+def dataset_format(filename):
+    """按扩展名判断数据集格式：'json'、'jsonl' 或 'cols'，忽略 .gz / .zst 压缩扩展名"""
+    name = split_compression(filename)[0]
+    if name.endswith('.jsonl'):
+        return 'jsonl'
+    if name.endswith('.cols'):
+        return 'cols'
+    return 'json'
+
+
+def load_dataset(filename):
+    """
+    读取保存的数据集，返回 {"metadata": ..., "comments": ...}；NDJSON 与列式数据集会整理为相同的结构
+
+    .gz / .zst 压缩的文件边读边解压。
+    """
+    file_format = dataset_format(filename)
+    if file_format == 'cols':
+        from .Columnar_Dataset import ColumnarDataset
+        return ColumnarDataset(filename).to_dataset()
+    if file_format == 'json':
+        with open_input(filename, 'r') as f:
+            return json.load(f)
+    metadata, records = read_records(filename)
+    return {"metadata": metadata, "comments": process_comments(records)}
+
+
+def read_records(filename):
+    """
+    读取任意格式的数据集文件，返回 (metadata, 评论记录列表)，不整理为嵌套结构
+
+    读取期间暂停垃圾回收：一次生成上百万个对象时，分代回收会反复遍历已经生成的对象。
+    """
+    paused = gc.isenabled()
+    gc.disable()
+    try:
+        return _read_records(filename)
+    finally:
+        if paused:
+            gc.enable()
+
+
+def _read_records(filename):
+    file_format = dataset_format(filename)
+    if file_format == 'cols':
+        from .Columnar_Dataset import ColumnarDataset
+        dataset = ColumnarDataset(filename)
+        return dataset.metadata, list(dataset)
+    if file_format == 'json':
+        with open_input(filename, 'r') as f:
+            data = json.load(f)
+        return data.get('metadata', {}), list(iter_dataset_records(data.get('comments', {})))
+    metadata = {}
+    records = []
+    with open_input(filename, 'r') as f:
+        for line in f:
+            item = json.loads(line)
+            if 'metadata' in item:
+                metadata = item['metadata']
+            else:
+                records.append(CommentRecord.from_dict(item))
+    return metadata, records
+
+
+def dataset_filename(save_dir, video_info, extension='.json'):
+    """按 {标题}_{时间戳} 生成保存路径，去掉文件名中的非法字符"""
+    title = re.sub(r'[\\/:*?"<>|\r\n]+', '_', video_info.get('title') or video_info.get('bvid') or 'unknown')
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(save_dir, f"{title}_{timestamp}{extension}")
+
+
+def extract_comment_info(comment_data: Dict, is_sub_reply) -> Dict:
+    """
+
+    从原始评论数据中提取所需信息
+
+    Args:
+        comment_data: 原始评论数据
+        is_sub_reply: 是否为子评论
+
+    Returns:
+        提取后的评论信息
+    """
+    info = CommentRecord.from_raw(comment_data).to_info()
+    info['is_sub_reply'] = is_sub_reply
+    return info
@@ -0,0 +1,108 @@
+from datetime import datetime
+
+
+class CommentRecord:
+    """
+    精简的评论记录
+
+    每页评论到达时就从接口返回的原始 JSON 中取出需要的字段，丢弃头像挂件、回复预览等数据。
+    爬取引擎、结果页、保存与分析之间都传递这种记录；keep_raw=True 时额外保留原始数据。
+    """
+
+    __slots__ = ('rpid', 'parent', 'mid', 'uname', 'sex', 'message', 'ctime', 'like', 'rcount', 'location',
+                 'raw')
+
+    def __init__(self, rpid, parent=0, mid=0, uname='未知用户', sex='', message='', ctime=0, like=0, rcount=0,
+                 location='', raw=None):
+        self.rpid = rpid
+        self.parent = parent
+        self.mid = mid
+        self.uname = uname
+        self.sex = sex
+        self.message = message
+        self.ctime = ctime
+        self.like = like
+        self.rcount = rcount
+        self.location = location
+        self.raw = raw
+
+    @classmethod
+    def from_raw(cls, data, keep_raw=False):
+        """从接口返回的一条评论构建记录"""
+        member = data.get('member') or {}
+        return cls(
+            data.get('rpid', 0),
+            data.get('parent', 0),
+            member.get('mid', 0),
+            member.get('uname', '未知用户'),
+            member.get('sex', ''),
+            (data.get('content') or {}).get('message', ''),
+            data.get('ctime', 0),
+            data.get('like', 0),
+            data.get('rcount', 0),
+            (data.get('reply_control') or {}).get('location', ''),
+            data if keep_raw else None
+            )
+
+    @classmethod
+    def from_dict(cls, data):
+        """读取 to_dict 的结果；旧版断点日志中的原始评论也能读取"""
+        if 'member' in data or 'content' in data:
+            return cls.from_raw(data)
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+    @classmethod
+    def from_info(cls, info, parent=0):
+        """
+        读取 to_info 的结果（已保存的数据集），parent 为所属主评论的 rpid
+
+        旧文件没有 ctime 时由 time 换算，没有 rcount 时取已保存的回复数。
+        """
+        return cls(
+            info['rpid'], parent,
+            info.get('user_id', 0),
+            info.get('uname', '未知用户'),
+            info.get('sex', ''),
+            info.get('message', ''),
+            info['ctime'] if 'ctime' in info else
+            int(datetime.fromisoformat(info['time']).timestamp()) if info.get('time') else 0,
+            info.get('like', 0),
+            info['rcount'] if 'rcount' in info else len(info.get('replies', [])),
+            info.get('Ip', '')
+            )
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        if data['raw'] is None:
+            del data['raw']
+        return data
+
+    @property
+    def is_sub_reply(self):
+        return self.parent != 0
+
+    def to_info(self):
+        """保存数据集时每条评论的格式"""
+        return {
+            "rpid": self.rpid,
+            "user_id": self.mid,
+            "uname": self.uname,
+            "message": self.message,
+            "time": datetime.fromtimestamp(self.ctime).isoformat(),
+            "ctime": self.ctime,
+            "sex": self.sex,
+            "Ip": self.location,
+            "like": self.like,
+            "rcount": self.rcount,
+            "is_sub_reply": self.is_sub_reply
+            }
+
+    def __repr__(self):
+        return f"CommentRecord(rpid={self.rpid}, parent={self.parent}, uname={self.uname!r})"
+
+
+def as_record(comment):
+    """统一转换为 CommentRecord，接受记录本身、to_dict 的结果或原始评论"""
+    if isinstance(comment, CommentRecord):
+        return comment
+    return CommentRecord.from_dict(comment)
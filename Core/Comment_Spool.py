@@ -0,0 +1,129 @@
+import json
+import logging
+import os
+import shutil
+from array import array
+from .Comment_Dataset import build_metadata
+from .Compression import split_compression, copy_to_output, open_input, open_output
+from .Comment_Record import CommentRecord
+
+logger = logging.getLogger(__name__)
+
+
+class CommentSpool:
+    """
+    评论落盘缓冲（批量消费者）
+
+    每批评论到达时立即以 JSON Lines 追加到分段文件，内存中只保留最先到达的 memory_limit 条供结果页预览，
+    视频再大内存占用也不会增长。保存时从分段文件读取评论；保存为 .jsonl 时只需在末尾写入 metadata 后改名。
+    程序异常退出时已到达的评论仍在分段文件中。
+    写入时按所属主评论记录每条回复在分段文件中的字节偏移，replies_of 只读取这些行。
+    """
+
+    SUFFIX = '.jsonl.part'
+
+    def __init__(self, path, memory_limit=20000):
+        self.path = path
+        self.memory_limit = max(0, int(memory_limit))
+        self.preview = []
+        self.count = 0
+        self.roots = 0
+        self.finalized = False
+        # 主评论 rpid -> 回复所在行的偏移；压缩保存后仍从未压缩的分段文件读取
+        self._reply_offsets = {}
+        self._index_path = path
+        self._size = 0
+        self._file = open(path, 'wb')
+
+    @classmethod
+    def for_video(cls, spool_dir, aid, **kwargs):
+        """同一视频只保留最近一次爬取的分段文件"""
+        os.makedirs(spool_dir, exist_ok=True)
+        return cls(os.path.join(spool_dir, f"{aid}{cls.SUFFIX}"), **kwargs)
+
+    def __call__(self, batch):
+        lines = [(json.dumps(cmt.to_dict(), ensure_ascii=False) + "\n").encode('utf-8') for cmt in batch]
+        offset = self._size
+        for cmt, line in zip(batch, lines):
+            if cmt.is_sub_reply:
+                offsets = self._reply_offsets.get(cmt.parent)
+                if offsets is None:
+                    offsets = self._reply_offsets[cmt.parent] = array('q')
+                offsets.append(offset)
+            offset += len(line)
+        self._file.write(b"".join(lines))
+        self._file.flush()
+        self._size = offset
+        self.count += len(batch)
+        self.roots += sum(1 for cmt in batch if not cmt.is_sub_reply)
+        room = self.memory_limit - len(self.preview)
+        if room > 0:
+            self.preview.extend(batch[:room])
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def complete(self):
+        """全部评论都在内存中"""
+        return len(self.preview) == self.count
+
+    def __iter__(self):
+        if self.complete:
+            yield from self.preview
+            return
+        with open_input(self.path, 'r') as f:
+            for line in f:
+                # 保存后的文件末尾是 metadata
+                if not line.startswith('{"metadata"'):
+                    yield CommentRecord.from_dict(json.loads(line))
+
+    def replies_of(self, rpid):
+        """按偏移索引读取一条主评论的回复，不扫描整个文件"""
+        offsets = self._reply_offsets.get(rpid)
+        if not offsets:
+            return []
+        replies = []
+        with open(self._index_path, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                replies.append(CommentRecord.from_dict(json.loads(f.readline())))
+        return replies
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def finalize(self, filename, video_info, failed_rpids=None):
+        """
+        保存为 NDJSON 数据集（与 save_records 的格式相同）
+
+        第一次保存只追加一行 metadata 再改名，之后改从新位置读取；再次保存时复制文件。
+        目标为 .gz / .zst 时改为压缩复制，分段文件保留到 discard 时删除，供 replies_of 按偏移读取。
+        """
+        self.close()
+        if self.finalized:
+            if split_compression(filename)[1] == split_compression(self.path)[1]:
+                shutil.copyfile(self.path, filename)
+            else:
+                with open_input(self.path) as src, open_output(filename) as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+            return filename
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"metadata": build_metadata(video_info, self.roots, failed_rpids)},
+                               ensure_ascii=False) + "\n")
+        if split_compression(filename)[1]:
+            copy_to_output(self.path, filename)
+        else:
+            shutil.move(self.path, filename)
+            self._index_path = filename
+        self.path = filename
+        self.finalized = True
+        return filename
+
+    def discard(self):
+        """丢弃未保存的分段文件（压缩保存后留下的分段文件也一并删除）"""
+        self.close()
+        if self._index_path != self.path or not self.finalized:
+            if os.path.exists(self._index_path):
+                os.remove(self._index_path)
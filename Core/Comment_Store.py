@@ -0,0 +1,200 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from .Comment_Dataset import process_comments, build_data_structure
+from .Comment_Record import CommentRecord, as_record
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    aid INTEGER PRIMARY KEY,
+    bvid TEXT,
+    title TEXT,
+    author TEXT,
+    reply_count INTEGER,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS comments (
+    rpid INTEGER PRIMARY KEY,
+    aid INTEGER NOT NULL,
+    parent INTEGER NOT NULL DEFAULT 0,
+    user_id INTEGER,
+    uname TEXT,
+    sex TEXT,
+    message TEXT,
+    ctime INTEGER,
+    like_count INTEGER,
+    rcount INTEGER,
+    location TEXT,
+    run_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_comments_parent ON comments (aid, parent);
+CREATE INDEX IF NOT EXISTS idx_comments_ctime ON comments (aid, ctime);
+CREATE INDEX IF NOT EXISTS idx_comments_like ON comments (aid, like_count);
+CREATE INDEX IF NOT EXISTS idx_comments_user ON comments (user_id);
+CREATE TABLE IF NOT EXISTS crawl_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    aid INTEGER NOT NULL,
+    mode TEXT,
+    started_at REAL,
+    finished_at REAL,
+    fetched INTEGER DEFAULT 0,
+    failed_rpids TEXT
+);
+"""
+
+COLUMNS = ('rpid', 'parent', 'user_id', 'uname', 'sex', 'message', 'ctime', 'like_count', 'rcount', 'location')
+
+UPSERT = f"""
+INSERT INTO comments (aid, run_id, {', '.join(COLUMNS)}) VALUES ({', '.join('?' * (len(COLUMNS) + 2))})
+ON CONFLICT(rpid) DO UPDATE SET
+    uname = excluded.uname, message = excluded.message, like_count = excluded.like_count,
+    rcount = excluded.rcount, location = excluded.location, run_id = excluded.run_id
+"""
+
+
+class CommentStore:
+    """
+    SQLite 评论库
+
+    videos / comments / crawl_runs 三张表，comments 以 rpid 为主键，并按 parent、ctime、like、user_id 建索引。
+    使用 WAL 模式，写入按 batch_size 条一个事务批量 upsert：重复爬取或增量爬取时直接在原有数据上合并。
+    连接只能在创建它的线程中使用，每个线程各自打开。
+    """
+
+    def __init__(self, path, batch_size=1000):
+        self.path = path
+        self.batch_size = max(1, int(batch_size))
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ---------- 写入 ----------
+
+    def upsert_video(self, video_info):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO videos (aid, bvid, title, author, reply_count, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(aid) DO UPDATE SET bvid = excluded.bvid, title = excluded.title, "
+                "author = excluded.author, reply_count = excluded.reply_count, updated_at = excluded.updated_at",
+                (video_info['aid'], video_info.get('bvid'), video_info.get('title'),
+                 video_info.get('owner', {}).get('name'), video_info.get('stat', {}).get('reply', 0), time.time())
+                )
+
+    def begin_run(self, aid, mode='full'):
+        """记录一次爬取，返回 run_id"""
+        with self.conn:
+            cursor = self.conn.execute("INSERT INTO crawl_runs (aid, mode, started_at) VALUES (?, ?, ?)",
+                                       (aid, mode, time.time()))
+        return cursor.lastrowid
+
+    def finish_run(self, run_id, fetched, failed_rpids=()):
+        with self.conn:
+            self.conn.execute("UPDATE crawl_runs SET finished_at = ?, fetched = ?, failed_rpids = ? WHERE id = ?",
+                              (time.time(), fetched, json.dumps(sorted(failed_rpids)), run_id))
+
+    def upsert_comments(self, aid, comments, run_id=None):
+        """批量写入评论记录（也接受原始评论），返回写入条数"""
+        count = 0
+        batch = []
+        for cmt in comments:
+            cmt = as_record(cmt)
+            batch.append((aid, run_id, cmt.rpid, cmt.parent, cmt.mid, cmt.uname, cmt.sex, cmt.message, cmt.ctime,
+                          cmt.like, cmt.rcount, cmt.location))
+            if len(batch) >= self.batch_size:
+                count += self._write(batch)
+                batch = []
+        if batch:
+            count += self._write(batch)
+        return count
+
+    def _write(self, batch):
+        with self.conn:
+            self.conn.executemany(UPSERT, batch)
+        return len(batch)
+
+    def sink(self, aid, run_id=None):
+        """CommentBatcher 的消费者：每批评论写入一个事务"""
+        return lambda batch: self.upsert_comments(aid, batch, run_id)
+
+    # ---------- 查询 ----------
+
+    def videos(self):
+        cursor = self.conn.execute(
+            "SELECT v.aid, v.bvid, v.title, v.author, v.reply_count, COUNT(c.rpid) FROM videos v "
+            "LEFT JOIN comments c ON c.aid = v.aid GROUP BY v.aid ORDER BY v.updated_at DESC"
+            )
+        keys = ('aid', 'bvid', 'title', 'author', 'reply_count', 'stored')
+        return [dict(zip(keys, row)) for row in cursor]
+
+    def find_aid(self, bvid):
+        row = self.conn.execute("SELECT aid FROM videos WHERE bvid = ?", (bvid,)).fetchone()
+        return row[0] if row else None
+
+    def last_failed_rpids(self, aid):
+        """最近一次完成的爬取中回复获取失败的楼层"""
+        row = self.conn.execute(
+            "SELECT failed_rpids FROM crawl_runs WHERE aid = ? AND finished_at IS NOT NULL ORDER BY id DESC LIMIT 1",
+            (aid,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else []
+
+    def query(self, aid=None, start=None, end=None, user_id=None, parent=None, order='ctime', limit=None):
+        """
+        按条件查询评论记录
+
+        Args:
+            aid: 视频 aid，None 表示全部视频
+            start, end: ctime 范围（秒级时间戳，含 start 不含 end）
+            user_id: 只查某个用户
+            parent: 0 为只查主评论，其他值为某条主评论的回复
+            order: 'ctime' 按时间升序，'like' 按点赞数降序
+            limit: 最多返回条数
+        """
+        conditions = []
+        params = []
+        for column, op, value in (('aid', '=', aid), ('ctime', '>=', start), ('ctime', '<', end),
+                                  ('user_id', '=', user_id), ('parent', '=', parent)):
+            if value is not None:
+                conditions.append(f"{column} {op} ?")
+                params.append(value)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM comments"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY like_count DESC" if order == 'like' else " ORDER BY ctime"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [CommentRecord(*row) for row in self.conn.execute(sql, params)]
+
+    def top_liked(self, aid=None, n=10):
+        return self.query(aid, order='like', limit=n)
+
+    def count(self, aid=None):
+        if aid is None:
+            return self.conn.execute("SELECT COUNT(*) FROM comments").fetchone()[0]
+        return self.conn.execute("SELECT COUNT(*) FROM comments WHERE aid = ?", (aid,)).fetchone()[0]
+
+    def to_dataset(self, aid):
+        """整理为与保存的 JSON 相同的数据集结构，可作为增量爬取的基准"""
+        row = self.conn.execute("SELECT bvid, title, author, reply_count FROM videos WHERE aid = ?",
+                                (aid,)).fetchone()
+        bvid, title, author, reply_count = row or (None, None, None, 0)
+        video_info = {'aid': aid, 'bvid': bvid, 'title': title, 'owner': {'name': author},
+                      'stat': {'reply': reply_count}}
+        return build_data_structure(process_comments(self.query(aid)), video_info, self.last_failed_rpids(aid))
@@ -0,0 +1,70 @@
+import time
+
+
+class CommentBatcher:
+    """
+    评论批量分发器
+
+    爬到的评论先攒成批次，达到 batch_size 条或距上次分发超过 interval 秒时，
+    依次交给所有消费者。消费者是接收一个列表参数的可调用对象。
+    """
+
+    def __init__(self, batch_size=200, interval=1.0):
+        self.batch_size = max(1, int(batch_size))
+        self.interval = interval
+        self.consumers = []
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def add_consumer(self, consumer):
+        self.consumers.append(consumer)
+        return consumer
+
+    def push(self, comments):
+        self._pending.extend(comments)
+        if len(self._pending) >= self.batch_size or self.is_due():
+            self.flush()
+
+    def is_due(self):
+        return time.monotonic() - self._last_flush >= self.interval
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        for consumer in self.consumers:
+            consumer(batch)
+
+    def close(self):
+        self.flush()
+        for consumer in self.consumers:
+            if hasattr(consumer, 'close'):
+                consumer.close()
+
+
+class CrawlStats:
+    """实时统计消费者：累计主评论/子评论数量与接收速度"""
+
+    def __init__(self):
+        self.roots = 0
+        self.subs = 0
+        self.started = time.monotonic()
+
+    def __call__(self, batch):
+        for cmt in batch:
+            if cmt.parent == 0:
+                self.roots += 1
+            else:
+                self.subs += 1
+
+    @property
+    def total(self):
+        return self.roots + self.subs
+
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.total / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        return f"已接收 {self.total} 条评论(主评论 {self.roots}，子评论 {self.subs})，{self.rate():.1f} 条/秒"
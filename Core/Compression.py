@@ -0,0 +1,133 @@
+import gzip
+import io
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 压缩格式按文件名最后的扩展名判断，如 a.json.gz、a.jsonl.zst
+EXTENSIONS = {'.gz': 'gzip', '.zst': 'zstd'}
+# 后台写入队列中最多积压的块数，写入快于压缩时保存线程在此等待，内存占用有上限
+QUEUE_BLOCKS = 4
+
+
+def split_compression(filename):
+    """返回 (去掉压缩扩展名的文件名, 压缩格式)，未压缩时格式为 None"""
+    for extension, codec in EXTENSIONS.items():
+        if filename.endswith(extension):
+            return filename[:-len(extension)], codec
+    return filename, None
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("读写 .zst 文件需要安装 zstandard（pip install zstandard）") from None
+    return zstandard
+
+
+def _open_compressed(raw, codec, level=None):
+    """在已打开的二进制文件上套一层压缩"""
+    if codec == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6 if level is None else level)
+    zstandard = _zstandard()
+    return zstandard.ZstdCompressor(level=3 if level is None else level).stream_writer(raw)
+
+
+class BackgroundWriter:
+    """
+    在后台线程中压缩并写入文件
+
+    write 只把数据块放入有界队列，压缩与写盘在后台线程完成，保存线程可以继续序列化下一批数据。
+    后台出错后丢弃剩余数据，在下一次 write 或 close 时抛出。
+    """
+
+    def __init__(self, filename, codec, level=None, max_blocks=QUEUE_BLOCKS):
+        self.filename = filename
+        self._raw = open(filename, 'wb')
+        try:
+            self._stream = _open_compressed(self._raw, codec, level)
+        except Exception:
+            self._raw.close()
+            raise
+        self._queue = queue.Queue(max_blocks)
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='compress-writer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            data = self._queue.get()
+            if data is None:
+                break
+            if self._error is None:
+                try:
+                    self._stream.write(data)
+                except Exception as e:
+                    logger.error(f"写入 {self.filename} 失败: {e}")
+                    self._error = e
+        try:
+            self._stream.close()
+        except Exception as e:
+            self._error = self._error or e
+        finally:
+            self._raw.close()
+
+    def write(self, data):
+        if self._error is not None:
+            raise self._error
+        if data:
+            self._queue.put(bytes(data))
+        return len(data)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_output(filename, level=None):
+    """按扩展名打开二进制输出：.gz / .zst 在后台线程压缩，其他直接写文件"""
+    codec = split_compression(filename)[1]
+    if codec is None:
+        return open(filename, 'wb')
+    return BackgroundWriter(filename, codec, level)
+
+
+def open_input(filename, mode='rb'):
+    """按扩展名打开输入并边读边解压，mode 为 'r' 时返回 UTF-8 文本流"""
+    codec = split_compression(filename)[1]
+    if codec is None:
+        return open(filename, mode, encoding='utf-8') if mode == 'r' else open(filename, 'rb')
+    if codec == 'gzip':
+        stream = gzip.open(filename, 'rb')
+    else:
+        raw = open(filename, 'rb')
+        stream = _zstandard().ZstdDecompressor().stream_reader(raw, closefd=True)
+    if mode == 'r':
+        return io.TextIOWrapper(io.BufferedReader(stream), encoding='utf-8')
+    return stream
+
+
+def copy_to_output(source, filename, chunk_size=1 << 20):
+    """把未压缩的文件按目标扩展名（压缩）复制过去"""
+    with open(source, 'rb') as src, open_output(filename) as dst:
+        while True:
+            chunk = src.read(chunk_size)
+            if not chunk:
+                break
+            dst.write(chunk)
+    return filename
@@ -0,0 +1,312 @@
+import asyncio
+import logging
+import math
+from .Comment_Record import CommentRecord
+from .Credential_Pool import is_expired_error
+from .Rate_Limiter import get_shared_limiter, is_throttle_error, is_transient_error, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlEngine:
+    """
+    异步评论爬取引擎
+
+    所有主评论分页与子评论请求运行在同一个事件循环上，
+    通过信号量限制同时在途的请求数，通过限速器控制请求速率。
+    传入 gate 时改用外部的请求名额池（多任务调度时共享）。
+    传入 pool 时每个请求从凭证池挑选账号，并使用该账号自己的限速器。
+    传入 cache 时先查响应缓存，命中的请求不经过限速器也不访问网络。
+    每页评论到达时即转换为 CommentRecord，keep_raw=True 时记录中保留原始数据。
+    传入 batcher 时，评论一到达就按批次分发；keep_comments=False 时引擎自身不保留评论。
+    临时故障按指数退避重试；单个子评论楼层失败不影响其他楼层，失败的 rpid 在最后再重试一轮，
+    仍失败的记录在 failed_rpids 中。
+    按时间排序翻页时新评论会把已爬的评论挤到后一页，评论按 rpid 去重，同一楼层的回复只获取一次。
+    """
+
+    SUB_PAGE_SIZE = 20
+    MAX_THROTTLE_RETRIES = 5
+    MAX_RETRIES = 3
+    RETRY_BASE_DELAY = 0.5
+    RETRY_MAX_DELAY = 30.0
+    SUB_RETRY_ROUNDS = 1
+
+    def __init__(self, api, video_info, concurrency=8, limiter=None, gate=None, pool=None, cache=None,
+                 journal=None, seed=None, recheck_replies=False, batcher=None, keep_comments=True,
+                 keep_raw=False, progress_callback=None):
+        self.api = api
+        self.video_info = video_info
+        self.aid = video_info['aid']
+        self.total_comments = video_info.get('stat', {}).get('reply', 0)
+        self.concurrency = max(1, int(concurrency))
+        self.limiter = limiter or get_shared_limiter()
+        self.gate = gate
+        self.pool = pool
+        self.cache = cache
+        self.journal = journal
+        self.seed = seed
+        self.recheck_replies = recheck_replies
+        self.batcher = batcher
+        self.keep_comments = keep_comments
+        self.keep_raw = keep_raw
+        self.progress_callback = progress_callback
+        self.comments = []
+        self.count = 0
+        self.failed_rpids = {}
+        self._seen_rpids = set()
+        self._queued_subs = set()
+        self._semaphore = None
+        self._tasks = []
+        self._sub_tasks = []
+
+    async def run(self):
+        """执行爬取，返回获取到的评论记录（增量模式下只含新增与回复有变化的部分）"""
+        if self.seed is not None and self.seed.aid not in (None, self.aid):
+            raise ValueError("增量基准数据与当前视频不匹配")
+        self._semaphore = self.gate or asyncio.Semaphore(self.concurrency)
+        self._tasks = []
+        self._sub_tasks = []
+        self._report(f"开始爬取视频: {self.video_info['title']}")
+        ticker = asyncio.ensure_future(self._flush_periodically()) if self.batcher else None
+        try:
+            if self.journal:
+                self._resume(self.journal.load(self.total_comments))
+                self.journal.start(self.total_comments)
+            if self.seed is not None:
+                await self._crawl_new_root_pages()
+            else:
+                await self._crawl_root_pages()
+            # 子评论任务在翻页过程中陆续创建，主评论翻完后再统一等待
+            await asyncio.gather(*self._sub_tasks)
+            await self._retry_failed_subs()
+        except BaseException:
+            tasks = self._tasks + self._sub_tasks
+            for task in tasks:
+                task.cancel()
+            # 等待任务真正结束，避免事件循环关闭时任务仍处于挂起状态
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            if ticker:
+                ticker.cancel()
+                await asyncio.gather(ticker, return_exceptions=True)
+                self.batcher.close()
+        return self.comments
+
+    def _ingest(self, replies):
+        """把接口返回的原始评论转换为记录并接收，返回其中之前没有收到过的记录"""
+        seen = self._seen_rpids
+        return self._collect([CommentRecord.from_raw(cmt, self.keep_raw)
+                              for cmt in replies if cmt['rpid'] not in seen])
+
+    def _collect(self, comments):
+        """接收一批评论记录：按 rpid 去重后计数、保留并交给分发器，返回实际接收的记录"""
+        seen = self._seen_rpids
+        fresh = []
+        for cmt in comments:
+            if cmt.rpid not in seen:
+                seen.add(cmt.rpid)
+                fresh.append(cmt)
+        self.count += len(fresh)
+        if self.keep_comments:
+            self.comments.extend(fresh)
+        if self.batcher and fresh:
+            self.batcher.push(fresh)
+        return fresh
+
+    async def _flush_periodically(self):
+        """评论到达较慢时，按时间间隔把未满的批次发出去"""
+        while True:
+            await asyncio.sleep(self.batcher.interval)
+            if self.batcher.is_due():
+                self.batcher.flush()
+
+    def _resume(self, state):
+        """
+        从断点日志恢复已获取的评论与子评论楼层，未完成的子评论楼层重新排队
+
+        中断期间新增或删除的评论会让评论在页之间移动，页号不可靠：主评论页仍全部重新请求，
+        按日志中记录的 rpid 去重，已完成的楼层不再获取。过时的日志在读取时已经丢弃，这里只会收到较新的进度。
+        """
+        if not state:
+            return
+        self._collect(state.comments)
+        self._queued_subs.update(state.done_subs)
+        for rpid in state.pending_subs:
+            self._queue_sub_thread(rpid)
+        self._report(f"从断点恢复: 已获取 {len(self._seen_rpids)} 条评论、{len(state.done_subs)} 个子评论楼层")
+
+    async def _crawl_root_pages(self):
+        first = await self._fetch_root_page(1)
+        if first is None:
+            return
+
+        page_info = first.get('page') or {}
+        size = page_info.get('size') or len(first.get('replies') or []) or 20
+        last_page = max(1, math.ceil(page_info.get('count', 0) / size))
+
+        # 已知总页数时并发请求剩余页
+        self._tasks = [asyncio.ensure_future(self._fetch_root_page(p)) for p in range(2, last_page + 1)]
+        await asyncio.gather(*self._tasks)
+
+        # 爬取期间可能有新评论，继续顺序翻页直到空页
+        page = last_page + 1
+        while await self._fetch_root_page(page) is not None:
+            page += 1
+
+    async def _crawl_new_root_pages(self):
+        """增量模式：按时间倒序翻页，翻到已知评论所在页后停止"""
+        new_count = 0
+        page = 1
+        # 上次失败的楼层可能在很靠后的页，不等翻到就直接重新获取；
+        # 主评论本身也一并交出，保存时据此整体替换它的回复
+        self._collect([record for record in map(self.seed.root_record, self.seed.failed_rpids) if record])
+        for rpid in self.seed.failed_rpids:
+            self._queue_sub_thread(rpid)
+        while True:
+            c = await self._request(self.api.get_comments, self.aid, page, 'time')
+            replies = c.get('replies') or []
+            if not replies:
+                break
+
+            reached_known = False
+            new_replies = []
+            refreshed = []
+            for cmt in replies:
+                if self.seed.is_known(cmt['rpid']):
+                    reached_known = True
+                    # 已知主评论只在回复数变化时重新获取整个楼层，主评论本身（新的 rcount、点赞数）也一并交出
+                    if self.seed.replies_changed(cmt):
+                        refreshed.append(cmt)
+                        self._queue_sub_thread(cmt['rpid'])
+                    continue
+                new_replies.append(cmt)
+                if cmt.get("rcount", 0) > 0:
+                    self._queue_sub_thread(cmt['rpid'])
+            new_count += len(self._ingest(new_replies))
+            self._ingest(refreshed)
+
+            self._report(f"增量爬取: 新增 {new_count} 条主评论，待更新 {len(self._sub_tasks)} 个楼层")
+            if reached_known and not self.recheck_replies:
+                break
+            page += 1
+
+    async def _fetch_root_page(self, page):
+        """请求一页主评论，空页返回 None"""
+        c = await self._request(self.api.get_comments, self.aid, page, 'time')
+
+        replies = c.get('replies') or []
+        if not replies:
+            return None
+
+        records = self._ingest(replies)
+        sub_tasks = [cmt['rpid'] for cmt in replies
+                     if cmt.get("rcount", 0) > 0 and self._queue_sub_thread(cmt['rpid'])]
+        if self.journal:
+            self.journal.record_page(page, c.get('page'), records, sub_tasks)
+
+        self._report(f"已爬取 {self.count}/{self.total_comments} 条评论(主评论)")
+        return c
+
+    async def _retry_failed_subs(self):
+        """所有楼层结束后，再重试一遍失败的楼层"""
+        for _ in range(self.SUB_RETRY_ROUNDS):
+            if not self.failed_rpids:
+                return
+            rpids = list(self.failed_rpids)
+            self.failed_rpids.clear()
+            self._report(f"重新获取 {len(rpids)} 个失败的楼层")
+            self._sub_tasks = []
+            for rpid in rpids:
+                self._queue_sub_thread(rpid, retry=True)
+            await asyncio.gather(*self._sub_tasks)
+        if self.failed_rpids:
+            logger.warning(f"{len(self.failed_rpids)} 个楼层的回复最终获取失败: {list(self.failed_rpids)}")
+
+    def _queue_sub_thread(self, rpid, retry=False):
+        """创建获取楼层回复的任务，已经获取过的楼层除非是重试否则跳过，返回是否创建"""
+        if rpid in self._queued_subs and not retry:
+            return False
+        self._queued_subs.add(rpid)
+        self._sub_tasks.append(asyncio.ensure_future(self._crawl_sub_thread(rpid)))
+        return True
+
+    async def _crawl_sub_thread(self, rpid):
+        all_subs = []
+        sub_index = 1
+        try:
+            while True:
+                sub_c = await self._request(self.api.get_sub_comments, self.aid, rpid, sub_index, self.SUB_PAGE_SIZE)
+                sub_replies = sub_c.get('replies') or []
+                if not sub_replies:
+                    break
+                all_subs.extend(sub_replies)
+                sub_index += 1
+        except Exception as e:
+            # 只丢弃这一个楼层已获取的部分，重试时整层重新获取
+            self.failed_rpids[rpid] = str(e)
+            self._report(f"楼层 {rpid} 的回复获取失败: {e}")
+            return
+
+        records = self._ingest(all_subs)
+        if self.journal:
+            self.journal.record_sub(rpid, records)
+
+        self._report(f"已爬取 {self.count} 条评论(含子评论)")
+
+    async def _request(self, func, *args):
+        """在并发与速率限制下发出一次请求，被限流时降速重试，凭证失效时换凭证重试"""
+        key = (func.__name__, *args)
+        if self.cache:
+            cached = await self.cache.get_async(key)
+            if cached is not None:
+                return cached
+
+        throttled = 0
+        failures = 0
+        while True:
+            delay = 0.0
+            async with self._semaphore:
+                entry = await self.pool.acquire() if self.pool else None
+                limiter = entry.limiter if entry else self.limiter
+                await limiter.acquire()
+                try:
+                    if entry:
+                        result = await func(*args, credential=entry.credential)
+                    else:
+                        result = await func(*args)
+                except Exception as e:
+                    if entry and is_expired_error(e):
+                        self.pool.mark_expired(entry)
+                        self._report(f"凭证 {entry.name} 已失效，改用其他凭证")
+                        continue
+                    if is_throttle_error(e):
+                        if throttled >= self.MAX_THROTTLE_RETRIES:
+                            raise
+                        throttled += 1
+                        if entry:
+                            self.pool.mark_throttled(entry)
+                        else:
+                            limiter.on_throttle()
+                        self._report(f"触发限流，已自动降低请求速率({throttled}/{self.MAX_THROTTLE_RETRIES})")
+                        continue
+                    if not is_transient_error(e) or failures >= self.MAX_RETRIES:
+                        raise
+                    failures += 1
+                    delay = backoff_delay(failures, self.RETRY_BASE_DELAY, self.RETRY_MAX_DELAY)
+                    self._report(f"请求出错({e})，{delay:.1f} 秒后重试({failures}/{self.MAX_RETRIES})")
+            if delay:
+                # 等待期间不占用并发名额
+                await asyncio.sleep(delay)
+                continue
+            if entry:
+                self.pool.mark_success(entry)
+            else:
+                limiter.on_success()
+            if self.cache:
+                await self.cache.put_async(key, result)
+            return result
+
+    def _report(self, message):
+        if self.progress_callback:
+            self.progress_callback(self.count, self.total_comments, message)
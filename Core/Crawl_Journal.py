@@ -0,0 +1,118 @@
+import json
+import logging
+import os
+import time
+from .Comment_Record import CommentRecord
+
+logger = logging.getLogger(__name__)
+
+
+class JournalState:
+    """从断点日志恢复出的爬取进度"""
+
+    def __init__(self):
+        self.pages = {}
+        self.comments = []
+        self.pending_subs = set()
+        self.done_subs = set()
+
+    def __bool__(self):
+        return bool(self.pages)
+
+
+class CrawlJournal:
+    """
+    爬取断点日志
+
+    以 JSON Lines 追加写入已完成的主评论页（含待爬子评论的 rpid）
+    和已完成的子评论楼层，爬取中断后按其中的 rpid 去重、跳过已完成的楼层。评论以精简记录的形式保存。
+    日志开头记录开始时间与当时视频的评论数；超过 MAX_AGE 秒，或评论数变化超过 MAX_REPLY_DRIFT 的比例时，
+    日志中的点赞数、回复已经过时，读取时整个丢弃、重新爬取。
+    """
+
+    MAX_AGE = 24 * 3600
+    MAX_REPLY_DRIFT = 0.05
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    @classmethod
+    def for_video(cls, journal_dir, aid):
+        os.makedirs(journal_dir, exist_ok=True)
+        return cls(os.path.join(journal_dir, f"{aid}.jsonl"))
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self, reply_count=None) -> JournalState:
+        """读取已有日志，末尾写了一半的行会被忽略；日志过时（见类说明）时删除并返回空的进度"""
+        state = JournalState()
+        if not self.exists():
+            return state
+        # 没有开始记录的旧日志按文件修改时间计算
+        started = os.path.getmtime(self.path)
+        start_replies = None
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"断点日志存在不完整记录，已忽略: {self.path}")
+                    continue
+                kind = record.get('type')
+                if kind == 'start':
+                    started = record['time']
+                    start_replies = record.get('reply')
+                elif kind == 'page':
+                    state.pages[record['page']] = record.get('page_info') or {}
+                    state.comments.extend(CommentRecord.from_dict(cmt) for cmt in record['replies'])
+                    state.pending_subs.update(record.get('sub_tasks', []))
+                elif kind == 'sub':
+                    state.done_subs.add(record['rpid'])
+                    state.comments.extend(CommentRecord.from_dict(cmt) for cmt in record['replies'])
+        state.pending_subs -= state.done_subs
+        if self._is_stale(started, start_replies, reply_count):
+            self.discard()
+            return JournalState()
+        return state
+
+    def _is_stale(self, started, start_replies, reply_count):
+        age = time.time() - started
+        if age > self.MAX_AGE:
+            logger.info(f"断点日志已超过 {self.MAX_AGE / 3600:g} 小时，重新爬取: {self.path}")
+            return True
+        if reply_count is not None and start_replies is not None and \
+                abs(reply_count - start_replies) > self.MAX_REPLY_DRIFT * max(start_replies, 1):
+            logger.info(f"视频评论数已从 {start_replies} 变为 {reply_count}，断点日志作废: {self.path}")
+            return True
+        return False
+
+    def start(self, reply_count):
+        """开始新的爬取时写入开始记录，已有日志时保留原来的开始记录"""
+        if not self.exists():
+            self._write({"type": "start", "time": time.time(), "reply": reply_count})
+
+    def record_page(self, page, page_info, replies, sub_tasks):
+        self._write({"type": "page", "page": page, "page_info": page_info,
+                     "replies": [cmt.to_dict() for cmt in replies], "sub_tasks": sub_tasks})
+
+    def record_sub(self, rpid, replies):
+        self._write({"type": "sub", "rpid": rpid, "replies": [cmt.to_dict() for cmt in replies]})
+
+    def _write(self, record):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """爬取成功后删除日志"""
+        self.close()
+        if self.exists():
+            os.remove(self.path)
@@ -0,0 +1,306 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from .Crawl_Engine import CrawlEngine
+from .Crawl_Journal import CrawlJournal
+from .Rate_Limiter import get_shared_limiter
+
+logger = logging.getLogger(__name__)
+
+
+class PriorityGate:
+    """按优先级放行的异步信号量，数值越小越优先，同优先级先到先得"""
+
+    def __init__(self, limit):
+        self.limit = max(1, int(limit))
+        self._active = 0
+        self._waiters = []
+        self._counter = itertools.count()
+
+    async def acquire(self, priority=0):
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # 已经拿到名额但在恢复前被取消，需要把名额交还
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # 名额直接转交给下一个等待者
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    def slot(self, priority=0):
+        return _GateSlot(self, priority)
+
+
+class _JobHold:
+    """
+    一个任务占用的视频名额
+
+    暂停期间交还名额，让队列中的其他视频先爬，恢复后重新排队获取；
+    任务的多个并发请求共用一个 _JobHold，名额只占一份。
+    """
+
+    def __init__(self, gate, priority, resumed):
+        self.gate = gate
+        self.priority = priority
+        self.resumed = resumed
+        self.held = False
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """等待任务未暂停且持有名额"""
+        if self.held and self.resumed.is_set():
+            return
+        async with self._lock:
+            while True:
+                if not self.resumed.is_set():
+                    self.release()
+                    await self.resumed.wait()
+                    continue
+                if not self.held:
+                    await self.gate.acquire(self.priority)
+                    self.held = True
+                # 排队期间可能又被暂停
+                if self.resumed.is_set():
+                    return
+
+    def release(self):
+        if self.held:
+            self.held = False
+            self.gate.release()
+
+
+class _GateSlot:
+    def __init__(self, gate, priority, hold=None):
+        self.gate = gate
+        self.priority = priority
+        self.hold = hold
+
+    async def __aenter__(self):
+        if self.hold is not None:
+            await self.hold.acquire()
+        await self.gate.acquire(self.priority)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.gate.release()
+
+
+class CrawlJob:
+    """队列中的一个视频爬取任务"""
+
+    PENDING = '等待中'
+    RUNNING = '爬取中'
+    PAUSED = '已暂停'
+    FINISHED = '已完成'
+    FAILED = '失败'
+    CANCELLED = '已取消'
+
+    def __init__(self, bv_id, priority=0, seed=None):
+        self.bv_id = bv_id
+        self.priority = priority
+        self.seed = seed
+        self.state = self.PENDING
+        self.video_info = None
+        self.count = 0
+        self.message = ''
+        self.result_path = None
+        self.failed_rpids = {}
+        self._task = None
+        self._resumed = None
+
+    @property
+    def is_done(self):
+        return self.state in (self.FINISHED, self.FAILED, self.CANCELLED)
+
+
+class CrawlScheduler:
+    """
+    多视频爬取调度器
+
+    所有任务运行在同一个事件循环上，共用一个按优先级放行的请求名额池和同一个限速器；
+    同时处于爬取阶段的视频数由 max_active_jobs 限制，以控制内存占用。
+    add_job / pause / resume / cancel 可以从其他线程调用。
+    """
+
+    def __init__(self, api, concurrency=8, max_active_jobs=2, limiter=None, pool=None, cache=None,
+                 journal_dir=None, on_update=None, on_finished=None):
+        self.api = api
+        self.concurrency = concurrency
+        self.max_active_jobs = max_active_jobs
+        self.limiter = limiter or get_shared_limiter()
+        self.pool = pool
+        self.cache = cache
+        self.journal_dir = journal_dir
+        self.on_update = on_update
+        self.on_finished = on_finished
+        self.jobs = {}
+        self._loop = None
+        self._request_gate = None
+        self._job_gate = None
+
+    def add_job(self, bv_id, priority=0, seed=None):
+        """加入任务，已在队列中且未结束的同一视频会被忽略；传入 seed 时进行增量爬取"""
+        job = self.jobs.get(bv_id)
+        if job is not None and not job.is_done:
+            return job
+        job = CrawlJob(bv_id, priority, seed)
+        self.jobs[bv_id] = job
+        self._notify(job)
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._start, job)
+            except RuntimeError:
+                # 事件循环刚好关闭，任务留在队列中，下次 run 时开始
+                pass
+        return job
+
+    def pause(self, bv_id):
+        self._call_in_loop(self._set_paused, bv_id, True)
+
+    def resume(self, bv_id):
+        self._call_in_loop(self._set_paused, bv_id, False)
+
+    def cancel(self, bv_id):
+        self._call_in_loop(self._cancel, bv_id)
+
+    async def run(self):
+        """运行直到队列中所有任务结束"""
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        self._request_gate = PriorityGate(self.concurrency)
+        self._job_gate = PriorityGate(self.max_active_jobs)
+        try:
+            while True:
+                for job in list(self.jobs.values()):
+                    self._start(job)
+                pending = [job._task for job in self.jobs.values() if job._task and not job._task.done()]
+                if pending:
+                    await asyncio.wait(pending)
+                    continue
+                # 先停止接收跨线程投递，再确认没有刚加入的任务
+                self._loop = None
+                if not self.has_pending():
+                    break
+                self._loop = loop
+        finally:
+            self._loop = None
+
+    def has_pending(self):
+        """是否有尚未开始运行的任务"""
+        return any(job._task is None and not job.is_done for job in self.jobs.values())
+
+    def _start(self, job):
+        if job._task is not None or job.is_done:
+            return
+        job._resumed = asyncio.Event()
+        if job.state != CrawlJob.PAUSED:
+            job._resumed.set()
+        job._task = asyncio.ensure_future(self._run_job(job))
+
+    async def _run_job(self, job):
+        hold = _JobHold(self._job_gate, job.priority, job._resumed)
+        try:
+            await hold.acquire()
+        except asyncio.CancelledError:
+            hold.release()
+            self._update(job, CrawlJob.CANCELLED, '已取消')
+            return
+
+        journal = None
+        try:
+            self._update(job, CrawlJob.RUNNING, '获取视频信息')
+            slot = _GateSlot(self._request_gate, job.priority, hold)
+            async with slot:
+                await self.limiter.acquire()
+                job.video_info = await self.api.get_video_info(job.bv_id)
+
+            # 增量爬取请求很少，不需要断点日志
+            if self.journal_dir and job.seed is None:
+                journal = CrawlJournal.for_video(self.journal_dir, job.video_info['aid'])
+            engine = CrawlEngine(self.api, job.video_info, limiter=self.limiter, gate=slot, pool=self.pool,
+                                 cache=None if job.seed else self.cache, journal=journal, seed=job.seed,
+                                 progress_callback=lambda current, total, message: self._progress(job, current, message))
+            comments = await engine.run()
+            job.count = len(comments)
+            job.failed_rpids = engine.failed_rpids
+
+            if self.on_finished:
+                # 保存文件较慢，放到线程池里执行，避免阻塞其他任务的请求
+                job.result_path = await self._loop.run_in_executor(None, self.on_finished, job, comments)
+            if journal:
+                journal.discard()
+            message = f'共 {job.count} 条评论'
+            if job.failed_rpids:
+                message += f'，{len(job.failed_rpids)} 个楼层的回复获取失败'
+            self._update(job, CrawlJob.FINISHED, message)
+        except asyncio.CancelledError:
+            self._update(job, CrawlJob.CANCELLED, '已取消')
+        except Exception as e:
+            logger.error(f"{job.bv_id} 爬取失败: {e}")
+            self._update(job, CrawlJob.FAILED, str(e))
+        finally:
+            if journal:
+                journal.close()
+            hold.release()
+
+    def _progress(self, job, count, message):
+        job.count = count
+        job.message = message
+        self._notify(job)
+
+    def _update(self, job, state, message):
+        job.state = state
+        job.message = message
+        self._notify(job)
+
+    def _notify(self, job):
+        if self.on_update:
+            self.on_update(job)
+
+    def _call_in_loop(self, func, *args):
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(func, *args)
+                return
+            except RuntimeError:
+                # 事件循环刚好关闭，此时已没有运行中的任务，直接执行
+                pass
+        func(*args)
+
+    def _set_paused(self, bv_id, paused):
+        job = self.jobs.get(bv_id)
+        if job is None or job.is_done:
+            return
+        if job._resumed is not None:
+            if paused:
+                job._resumed.clear()
+            else:
+                job._resumed.set()
+        if paused:
+            self._update(job, CrawlJob.PAUSED, '已暂停')
+        else:
+            self._update(job, CrawlJob.RUNNING if job.video_info else CrawlJob.PENDING, '')
+
+    def _cancel(self, bv_id):
+        job = self.jobs.get(bv_id)
+        if job is None or job.is_done:
+            return
+        if job._task is not None:
+            job._task.cancel()
+        else:
+            self._update(job, CrawlJob.CANCELLED, '已取消')
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from bilibili_api import Credential
+from .Rate_Limiter import AdaptiveRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# -101: 账号未登录  -111: csrf 校验失败，两者都说明凭证已不可用
+EXPIRED_CODES = (-101, -111)
+
+
+def is_expired_error(error) -> bool:
+    """判断异常是否表示登录凭证已失效"""
+    return getattr(error, 'code', None) in EXPIRED_CODES
+
+
+def credential_to_dict(credential):
+    """与 config/credential.env 相同的字段格式"""
+    return {
+        'sessdata': credential.sessdata,
+        'bili_jct': credential.bili_jct,
+        'buvid3': getattr(credential, 'buvid3', ''),
+        'buvid4': getattr(credential, 'buvid4', ''),
+        'DedeUserid': getattr(credential, 'dedeuserid', ''),
+        'ac_time_value': getattr(credential, 'ac_time_value', ''),
+        }
+
+
+def credential_from_dict(data):
+    return Credential(
+        sessdata=data.get('sessdata'),
+        bili_jct=data.get('bili_jct'),
+        buvid3=data.get('buvid3', ''),
+        dedeuserid=data.get('DedeUserid', ''),
+        ac_time_value=data.get('ac_time_value', ''),
+        buvid4=data.get('buvid4', '')
+        )
+
+
+class NoCredentialError(Exception):
+    """凭证池中所有凭证都已失效"""
+
+
+class PooledCredential:
+    """凭证池中的一个账号，带独立的请求速率和健康状态"""
+
+    ACTIVE = '可用'
+    THROTTLED = '限流降速'
+    COOLING = '冷却中'
+    EXPIRED = '已失效'
+
+    def __init__(self, credential, name, limiter):
+        self.credential = credential
+        self.name = name
+        self.limiter = limiter
+        self.state = self.ACTIVE
+        self.cooldown_until = 0.0
+        self.requests = 0
+
+    @property
+    def uid(self):
+        return str(getattr(self.credential, 'dedeuserid', '') or self.name)
+
+
+class CredentialPool:
+    """
+    多账号凭证池
+
+    每个请求从池中挑选当前等待时间最短的可用凭证。被限流的凭证先冷却 cooldown 秒，
+    之后以降低后的速率继续使用，速率恢复过半后回到可用状态；失效的凭证不再使用。
+    """
+
+    def __init__(self, max_rate=4.0, min_rate=0.2, cooldown=60.0):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.cooldown = cooldown
+        self.entries = []
+        self._lock = threading.Lock()
+
+    def add(self, credential, name=None):
+        """加入凭证，同一账号只保留一份"""
+        entry = PooledCredential(credential, name or getattr(credential, 'dedeuserid', '') or f'账号{len(self.entries) + 1}',
+                                 AdaptiveRateLimiter(max_rate=self.max_rate, min_rate=self.min_rate))
+        with self._lock:
+            for existing in self.entries:
+                if existing.uid == entry.uid:
+                    existing.credential = credential
+                    existing.state = PooledCredential.ACTIVE
+                    return existing
+            self.entries.append(entry)
+        return entry
+
+    def __len__(self):
+        return len(self.entries)
+
+    async def acquire(self) -> PooledCredential:
+        """挑选一个凭证；全部在冷却时等待最早结束冷却的那个"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                usable = [e for e in self.entries if e.state != PooledCredential.EXPIRED]
+                if not usable:
+                    raise NoCredentialError("凭证池中没有可用的凭证")
+                for entry in usable:
+                    if entry.state == PooledCredential.COOLING and now >= entry.cooldown_until:
+                        entry.state = PooledCredential.THROTTLED
+                ready = [e for e in usable if e.state != PooledCredential.COOLING]
+                if ready:
+                    entry = min(ready, key=lambda e: e.limiter.estimate())
+                    entry.requests += 1
+                    return entry
+                wait = min(e.cooldown_until for e in usable) - now
+            await asyncio.sleep(max(wait, 0.1))
+
+    def mark_success(self, entry):
+        entry.limiter.on_success()
+        with self._lock:
+            if entry.state == PooledCredential.THROTTLED and entry.limiter.rate >= entry.limiter.max_rate / 2:
+                entry.state = PooledCredential.ACTIVE
+
+    def mark_throttled(self, entry):
+        entry.limiter.on_throttle()
+        with self._lock:
+            if entry.state != PooledCredential.EXPIRED:
+                entry.state = PooledCredential.COOLING
+                entry.cooldown_until = time.monotonic() + self.cooldown
+        logger.warning(f"凭证 {entry.name} 被限流，冷却 {self.cooldown:.0f} 秒")
+
+    def mark_expired(self, entry):
+        with self._lock:
+            entry.state = PooledCredential.EXPIRED
+        logger.warning(f"凭证 {entry.name} 已失效")
+
+    def status(self):
+        """[(名称, 状态, 当前速率, 已发请求数)]"""
+        with self._lock:
+            return [(e.name, e.state, e.limiter.rate, e.requests) for e in self.entries]
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """从凭证池文件加载，文件不存在时返回空池"""
+        pool = cls(**kwargs)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for item in json.load(f):
+                    pool.add(credential_from_dict(item), item.get('name'))
+        return pool
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        data = []
+        for entry in self.entries:
+            item = credential_to_dict(entry.credential)
+            item['name'] = entry.name
+            data.append(item)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_pool(path, **kwargs) -> CredentialPool:
+    """进程内共用的凭证池，首次调用时从文件加载，之后各次爬取共享健康状态"""
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = CredentialPool.load(path, **kwargs)
+        return _shared_pool
@@ -0,0 +1,174 @@
+import logging
+import os
+from datetime import datetime
+from .Comment_Dataset import process_comments, build_data_structure, save_dataset, save_records, read_records, \
+    dataset_format, video_info_from_metadata
+
+logger = logging.getLogger(__name__)
+
+
+def dataset_time(metadata, path=None):
+    """数据集的保存时间（时间戳），metadata 中没有时取文件修改时间"""
+    for value in (metadata.get('save_time'), metadata.get('video_info', {}).get('crawl_time')):
+        if value:
+            try:
+                return datetime.fromisoformat(value).timestamp()
+            except ValueError:
+                pass
+    return os.path.getmtime(path) if path else 0.0
+
+
+class DatasetMerger:
+    """
+    合并同一视频的多个数据集，按 rpid 去重
+
+    第一遍逐个读入文件，只建立以 rpid 为键的哈希索引，记下每条评论胜出的版本在哪个文件中：
+    (保存时间, 文件路径) 较大的文件胜出，点赞数等取最新的文件，保存时间相同时按路径决定，与参数顺序无关。
+    每条主评论的回复取最新一次获取到的回复集合（只记 rpid），最新一次获取失败时合并所有文件中的回复。
+    保存时再逐个读一遍文件，只写出胜出的版本，顺序为文件内的顺序。
+    两遍都只在内存中保留索引和当前文件；保存为 JSON 时需要在内存中组装整个数据集。
+    """
+
+    def __init__(self):
+        self.sources = []
+        # rpid -> 胜出版本所在的文件（sources 的下标）
+        self.comments = {}
+        # 主评论 rpid -> (文件下标, 回复是否获取失败, 回复 rpid)
+        self.reply_sets = {}
+        self.metadata = {}
+        self._metadata_source = None
+        self.aid = None
+        self.input_count = 0
+
+    @property
+    def files(self):
+        return len(self.sources)
+
+    def add_file(self, path):
+        metadata, records = read_records(path)
+        self.add(records, metadata, dataset_time(metadata, path), path)
+        return len(records)
+
+    def add(self, records, metadata, saved_at, source):
+        """合并一个数据集的评论记录，saved_at 为其保存时间，source 为文件路径（保存时从中重新读取评论）"""
+        aid = metadata.get('video_info', {}).get('aid')
+        if aid is not None:
+            if self.aid is not None and aid != self.aid:
+                raise ValueError(f"{source} 属于另一个视频（aid {aid}，应为 {self.aid}）")
+            self.aid = aid
+        index = len(self.sources)
+        key = (saved_at, source)
+        self.sources.append(key)
+        keys = self.sources
+        if self._metadata_source is None or key > keys[self._metadata_source]:
+            self.metadata, self._metadata_source = metadata, index
+        failed = set(metadata.get('failed_rpids') or ())
+        roots = []
+        replies = {}
+        for cmt in records:
+            self.input_count += 1
+            current = self.comments.get(cmt.rpid)
+            if current is None or key > keys[current]:
+                self.comments[cmt.rpid] = index
+            if cmt.is_sub_reply:
+                replies.setdefault(cmt.parent, []).append(cmt.rpid)
+            else:
+                roots.append(cmt.rpid)
+        for rpid in roots:
+            current = self.reply_sets.get(rpid)
+            if current is None or key > keys[current[0]]:
+                self.reply_sets[rpid] = (index, rpid in failed, tuple(replies.get(rpid, ())))
+
+    def __iter__(self):
+        """合并后的评论记录：逐个重新读取文件，取出其中胜出的版本"""
+        failed_roots = set(self.failed_rpids)
+        wanted_replies = set()
+        for _, failed, reply_ids in self.reply_sets.values():
+            if not failed:
+                wanted_replies.update(reply_ids)
+        emitted = set()
+        for index, (_, path) in enumerate(self.sources):
+            _, records = read_records(path)
+            for cmt in records:
+                rpid = cmt.rpid
+                if self.comments.get(rpid) != index or rpid in emitted:
+                    continue
+                if cmt.is_sub_reply:
+                    if rpid not in wanted_replies and cmt.parent not in failed_roots:
+                        continue
+                    # 主评论不在任何文件中的回复不保存
+                    if cmt.parent not in self.reply_sets:
+                        continue
+                elif rpid not in self.reply_sets:
+                    continue
+                emitted.add(rpid)
+                yield cmt
+
+    @property
+    def failed_rpids(self):
+        return sorted(rpid for rpid, (_, failed, _) in self.reply_sets.items() if failed)
+
+    @property
+    def video_info(self):
+        return video_info_from_metadata(self.metadata)
+
+    def save(self, filename, progress_callback=None):
+        """按扩展名保存合并结果（与 SaveCommentThread 相同的格式），返回保存的评论数"""
+        if any(os.path.abspath(path) == os.path.abspath(filename) for _, path in self.sources):
+            raise ValueError(f"合并结果不能覆盖输入文件 {filename}")
+        file_format = dataset_format(filename)
+        counted = _Counter(self)
+        if file_format == 'json':
+            save_dataset(build_data_structure(process_comments(counted), self.video_info, self.failed_rpids),
+                         filename, progress_callback)
+        elif file_format == 'jsonl':
+            save_records(counted, filename, self.video_info, self.failed_rpids, progress_callback=progress_callback)
+        else:
+            from .Columnar_Dataset import save_columnar
+            save_columnar(counted, filename, self.video_info, self.failed_rpids)
+        return counted.count
+
+
+class _Counter:
+    """边迭代边计数"""
+
+    def __init__(self, iterable):
+        self.iterable = iterable
+        self.count = 0
+
+    def __iter__(self):
+        for item in self.iterable:
+            self.count += 1
+            yield item
+
+
+def merge_datasets(paths, output, progress_callback=None):
+    """
+    合并多个数据集文件并保存到 output
+
+    Args:
+        paths: 同一视频的数据集文件，格式可以混合（.json / .jsonl / .cols 及其压缩文件）
+        output: 保存路径，格式由扩展名决定
+        progress_callback: 进度回调 (current_step, total_steps, message)
+    Returns:
+        {"files", "input", "duplicates", "comments", "failed_rpids", "output"}，
+        comments 为保存的评论数，不含最新一次完整获取时已不存在的回复
+    """
+    merger = DatasetMerger()
+    total_steps = len(paths) + 1
+    for i, path in enumerate(paths, 1):
+        if progress_callback:
+            progress_callback(i, total_steps, f"正在读取 {os.path.basename(path)}")
+        merger.add_file(path)
+    if progress_callback:
+        progress_callback(total_steps, total_steps, "正在保存合并结果")
+    count = merger.save(output)
+    logger.info(f"合并 {merger.files} 个文件，{merger.input_count} 条评论去重后 {count} 条")
+    return {
+        "files": merger.files,
+        "input": merger.input_count,
+        "duplicates": merger.input_count - len(merger.comments),
+        "comments": count,
+        "failed_rpids": merger.failed_rpids,
+        "output": output,
+        }
@@ -0,0 +1,53 @@
+from .Comment_Dataset import load_dataset
+from .Comment_Record import CommentRecord
+
+
+class IncrementalSeed:
+    """
+    增量爬取的基准数据
+
+    来自之前保存的数据集中的 comments，记录已知的 rpid 和各主评论上次爬取时接口给出的回复数 rcount
+    （旧数据集没有 rcount 时取已保存的回复数；回复被删除或折叠时两者不同）；
+    failed_rpids 为上次回复获取失败的楼层，增量爬取时总会重新获取。
+    """
+
+    def __init__(self, comments, aid=None, failed_rpids=()):
+        self.comments = comments
+        self.aid = aid
+        self.failed_rpids = set(failed_rpids)
+        self.known_rpids = set()
+        self.reply_counts = {}
+        self._roots = {}
+        for value in comments.values():
+            rpid = value['rpid']
+            replies = value.get('replies', [])
+            self.known_rpids.add(rpid)
+            self.known_rpids.update(reply['rpid'] for reply in replies)
+            self.reply_counts[rpid] = value.get('rcount', len(replies))
+            self._roots[rpid] = value
+
+    @classmethod
+    def from_file(cls, path):
+        return cls.from_dataset(load_dataset(path))
+
+    @classmethod
+    def from_dataset(cls, data):
+        """从数据集结构构建，如 CommentStore.to_dataset 的结果"""
+        metadata = data.get('metadata', {})
+        aid = metadata.get('video_info', {}).get('aid')
+        return cls(data.get('comments', {}), aid, metadata.get('failed_rpids', []))
+
+    def is_known(self, rpid):
+        return rpid in self.known_rpids
+
+    def replies_changed(self, cmt):
+        """已知主评论的回复数是否与基准不同"""
+        return cmt.get('rcount', 0) != self.reply_counts.get(cmt['rpid'], 0)
+
+    def root_record(self, rpid):
+        """基准数据中的主评论记录，不在基准数据中时返回 None"""
+        value = self._roots.get(rpid)
+        return CommentRecord.from_info(value) if value is not None else None
+
+    def __len__(self):
+        return len(self.comments)
@@ -0,0 +1,140 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.schedulers.background import BackgroundScheduler
+from .Comment_Dataset import process_comments, build_data_structure, save_dataset
+from .Crawl_Engine import CrawlEngine
+from .Incremental import IncrementalSeed
+from .Rate_Limiter import get_shared_limiter
+
+logger = logging.getLogger(__name__)
+
+
+class VideoMonitor:
+    """
+    定时监控视频评论
+
+    每个视频每隔 interval 分钟增量爬取一次，合并后的完整数据作为快照保存到 snapshot_dir/<BV号>/，
+    同时在该目录的 trend.jsonl 追加一行统计。开始时各视频的首次运行在一个周期内均匀错开，
+    每次触发再随机推迟 jitter 秒以内，避免多个视频同时发出请求。
+    """
+
+    def __init__(self, api, snapshot_dir, interval=30, jitter=120, max_workers=2, concurrency=8, limiter=None,
+                 keep=None, on_snapshot=None, on_error=None):
+        self.api = api
+        self.snapshot_dir = snapshot_dir
+        self.interval = interval
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self.limiter = limiter or get_shared_limiter()
+        self.keep = keep
+        self.on_snapshot = on_snapshot
+        self.on_error = on_error
+        self.videos = []
+        self.scheduler = BackgroundScheduler(
+            executors={'default': ThreadPoolExecutor(max_workers)},
+            job_defaults={'max_instances': 1, 'coalesce': True, 'misfire_grace_time': interval * 30}
+            )
+
+    def add(self, bv_id, offset=None):
+        """加入监控；已开始运行时首次爬取在一个周期内随机错开"""
+        if bv_id in self.videos:
+            return
+        self.videos.append(bv_id)
+        if self.scheduler.running:
+            self._schedule(bv_id, random.uniform(0, self.interval * 60) if offset is None else offset)
+
+    def remove(self, bv_id):
+        if bv_id in self.videos:
+            self.videos.remove(bv_id)
+            if self.scheduler.get_job(bv_id):
+                self.scheduler.remove_job(bv_id)
+
+    def start(self):
+        step = self.interval * 60 / max(1, len(self.videos))
+        for i, bv_id in enumerate(self.videos):
+            self._schedule(bv_id, i * step)
+        self.scheduler.start()
+
+    def run_forever(self):
+        """启动并阻塞当前线程，Ctrl+C 后等待进行中的快照完成再退出"""
+        self.start()
+        try:
+            while True:
+                time.sleep(1)
+        except (KeyboardInterrupt, SystemExit):
+            pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self, wait=True):
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=wait)
+
+    def _schedule(self, bv_id, offset):
+        self.scheduler.add_job(
+            self._run_snapshot, 'interval', args=[bv_id], id=bv_id, replace_existing=True,
+            minutes=self.interval, jitter=self.jitter,
+            next_run_time=datetime.now() + timedelta(seconds=offset)
+            )
+
+    def _run_snapshot(self, bv_id):
+        try:
+            self.snapshot(bv_id)
+        except Exception as e:
+            logger.error(f"{bv_id} 快照失败: {e}")
+            if self.on_error:
+                self.on_error(bv_id, e)
+
+    def video_dir(self, bv_id):
+        return os.path.join(self.snapshot_dir, bv_id)
+
+    def snapshots(self, bv_id):
+        """按时间排序的快照文件"""
+        return sorted(glob.glob(os.path.join(self.video_dir(bv_id), '*_*.json')))
+
+    def snapshot(self, bv_id):
+        """立即爬取一次：有上次快照时增量爬取，返回 (快照路径, 统计行)"""
+        previous = self.snapshots(bv_id)
+        seed = IncrementalSeed.from_file(previous[-1]) if previous else None
+
+        # 在执行器线程中运行，每次快照使用自己的事件循环
+        loop = asyncio.new_event_loop()
+        try:
+            video_info = loop.run_until_complete(self.api.get_video_info(bv_id))
+            engine = CrawlEngine(self.api, video_info, concurrency=self.concurrency, limiter=self.limiter, seed=seed)
+            comments = loop.run_until_complete(engine.run())
+        finally:
+            loop.close()
+
+        processed = process_comments(comments, seed.comments if seed else None, failed_rpids=engine.failed_rpids)
+        os.makedirs(self.video_dir(bv_id), exist_ok=True)
+        now = datetime.now()
+        path = os.path.join(self.video_dir(bv_id), f"{now.strftime('%Y%m%d_%H%M%S')}.json")
+        save_dataset(build_data_structure(processed, video_info, engine.failed_rpids), path)
+
+        row = {
+            "time": now.isoformat(),
+            "bvid": bv_id,
+            "reply": video_info.get('stat', {}).get('reply', 0),
+            "main_comments": len(processed),
+            "total_comments": len(processed) + sum(len(value.get('replies', [])) for value in processed.values()),
+            "fetched": len(comments),
+            "failed_rpids": len(engine.failed_rpids),
+            "snapshot": os.path.basename(path),
+            }
+        with open(os.path.join(self.video_dir(bv_id), 'trend.jsonl'), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+        if self.keep:
+            for old in self.snapshots(bv_id)[:-self.keep]:
+                os.remove(old)
+        if self.on_snapshot:
+            self.on_snapshot(bv_id, path, row)
+        return path, row
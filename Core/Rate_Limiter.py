@@ -0,0 +1,154 @@
+import asyncio
+import importlib
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# -412: 请求被拦截  -352: 风控校验失败
+THROTTLE_CODES = (-412, -352)
+
+
+def is_throttle_error(error) -> bool:
+    """判断异常是否为B站的限流/风控响应"""
+    if getattr(error, 'code', None) in THROTTLE_CODES:
+        return True
+    return getattr(error, 'status', None) == 412
+
+
+# 服务端临时故障，稍后重试通常能成功
+TRANSIENT_CODES = (-500, -502, -503, -504)
+# 可以重试的 HTTP 状态码（另外还有所有 5xx）
+TRANSIENT_STATUSES = (412, 429)
+# bilibili_api 可能使用的请求库的网络异常基类，未安装的跳过
+NETWORK_ERRORS = (('aiohttp', 'ClientError'), ('httpx', 'TransportError'), ('curl_cffi', 'CurlError'))
+
+_network_errors = None
+
+
+def network_error_types():
+    """连接、超时等网络异常类型"""
+    global _network_errors
+    if _network_errors is None:
+        types = [ConnectionError, asyncio.TimeoutError]
+        for module, name in NETWORK_ERRORS:
+            try:
+                types.append(getattr(importlib.import_module(module), name))
+            except (ImportError, AttributeError):
+                continue
+        _network_errors = tuple(types)
+    return _network_errors
+
+
+def is_transient_error(error) -> bool:
+    """
+    判断异常是否为可以重试的临时故障：网络错误、超时、HTTP 412 / 429 / 5xx 与接口返回的服务端故障码
+
+    其余异常（参数错误、响应解析失败、接口返回的其他错误码等）重试也不会成功，直接抛出。
+    """
+    status = getattr(error, 'status', None)
+    if isinstance(status, int):
+        return status in TRANSIENT_STATUSES or status >= 500
+    # 先于错误码判断：curl_cffi 的异常也有 code 属性，是 curl 自身的错误码
+    if isinstance(error, network_error_types()):
+        return True
+    return getattr(error, 'code', None) in TRANSIENT_CODES
+
+
+def backoff_delay(attempt, base=0.5, max_delay=30.0) -> float:
+    """第 attempt 次重试前的等待秒数：指数增长并随机抖动，避免大量请求同时重试"""
+    return min(max_delay, base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+
+
+class AdaptiveRateLimiter:
+    """
+    令牌桶限速器，速率按 AIMD 调整
+
+    每次请求成功，速率每秒约增加 increase；
+    遇到限流，速率乘以 decrease 并暂停 cooldown 秒。
+    线程安全，可被多个事件循环共用。
+    """
+
+    def __init__(self, max_rate=4.0, min_rate=0.2, initial_rate=None, burst=2,
+                 increase=0.2, decrease=0.5, cooldown=5.0):
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.rate = initial_rate if initial_rate is not None else max(self.min_rate, max_rate / 2)
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """预占一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(delay, self._blocked_until - now)
+
+    def estimate(self) -> float:
+        """不占用令牌，估计现在请求需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            delay = (1 - tokens) / self.rate if tokens < 1 else 0.0
+            return max(delay, self._blocked_until - now)
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def wait(self):
+        """同步版本的 acquire，供非异步代码使用"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttle(self):
+        with self._lock:
+            now = time.monotonic()
+            # 同一轮并发请求可能一起被拒，冷却期内只降速一次
+            if now < self._blocked_until:
+                return
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = min(self._tokens, 0.0)
+            self._blocked_until = now + self.cooldown
+        logger.warning(f"触发限流，请求速率降至 {self.rate:.2f}/s")
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_limiter() -> AdaptiveRateLimiter:
+    """进程内所有爬取共用的限速器"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = AdaptiveRateLimiter()
+        return _shared_limiter
+
+
+def configure_shared_limiter(**kwargs) -> AdaptiveRateLimiter:
+    """按配置调整共享限速器，保留已收敛的当前速率"""
+    limiter = get_shared_limiter()
+    with limiter._lock:
+        for key, value in kwargs.items():
+            setattr(limiter, key, value)
+        limiter.min_rate = min(limiter.min_rate, limiter.max_rate)
+        limiter.rate = min(max(limiter.rate, limiter.min_rate), limiter.max_rate)
+    return limiter
@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    原始接口响应的磁盘缓存
+
+    以 (接口, oid, 页码, rpid...) 的哈希为文件名保存响应，超过 ttl 秒的条目视为失效；
+    总大小超过 max_bytes 时按最近使用时间淘汰最旧的条目。可以被多个线程同时使用。
+    事件循环中使用 get_async / put_async，文件读写在线程池中进行，不阻塞其他请求。
+    """
+
+    def __init__(self, directory, ttl=86400, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index = {}
+        self._total = 0
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        """启动时读取已有缓存文件的大小与最近使用时间"""
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                self._index[path] = (stat.st_size, stat.st_mtime)
+                self._total += stat.st_size
+
+    def _path(self, key):
+        digest = hashlib.sha256(json.dumps(key, ensure_ascii=False).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + '.json')
+
+    def get(self, key):
+        """命中时返回缓存的响应，否则返回 None"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if time.time() - entry.get('time', 0) > self.ttl:
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        with self._lock:
+            if path in self._index:
+                self._index[path] = (self._index[path][0], now)
+        self.hits += 1
+        return entry['data']
+
+    async def get_async(self, key):
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, key)
+
+    async def put_async(self, key, data):
+        await asyncio.get_running_loop().run_in_executor(None, self.put, key, data)
+
+    def put(self, key, data):
+        path = self._path(key)
+        payload = json.dumps({'time': time.time(), 'key': key, 'data': data}, ensure_ascii=False)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp, path)
+
+        size = os.path.getsize(path)
+        with self._lock:
+            old = self._index.get(path)
+            if old:
+                self._total -= old[0]
+            self._index[path] = (size, time.time())
+            self._total += size
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """淘汰最久未使用的条目，直到总大小降到上限的九成"""
+        target = self.max_bytes * 0.9
+        for path, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            del self._index[path]
+            self._total -= size
+        logger.info(f"响应缓存已淘汰到 {self._total / 1024 / 1024:.1f} MB")
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        with self._lock:
+            old = self._index.pop(path, None)
+            if old:
+                self._total -= old[0]
+
+    @property
+    def size(self):
+        return self._total
+
+    def clear(self):
+        with self._lock:
+            for path in list(self._index):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._index.clear()
+            self._total = 0
+
+
+_shared_caches = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_cache(directory, ttl=86400, max_bytes=512 * 1024 * 1024) -> ResponseCache:
+    """进程内每个目录共用一个响应缓存，只在首次使用时扫描目录；之后的调用只更新 ttl 与大小上限"""
+    directory = os.path.abspath(directory)
+    with _shared_lock:
+        cache = _shared_caches.get(directory)
+        if cache is None:
+            cache = _shared_caches[directory] = ResponseCache(directory, ttl, max_bytes)
+        else:
+            cache.ttl = ttl
+            cache.max_bytes = max_bytes
+        return cache
@@ -0,0 +1,73 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import jieba
+
+# 评论数少于此值时直接在当前进程分词，进程池的启动开销不值得
+PARALLEL_THRESHOLD = 20000
+CHUNK_SIZE = 5000
+# 在当前进程中执行时每块的条数，每完成这么多条回调一次进度
+SERIAL_CHUNK_SIZE = 1000
+
+_stopwords = frozenset()
+
+
+def clean_words(msg, stopwords):
+    """分词并去掉停用词与单字"""
+    return [w for w in jieba.lcut(msg.replace("\n", "").strip()) if w not in stopwords and len(w) > 1]
+
+
+def _init_worker(stopwords):
+    global _stopwords
+    _stopwords = stopwords
+    jieba.initialize()
+
+
+def _segment_chunk(messages):
+    return [" ".join(clean_words(msg, _stopwords)) for msg in messages]
+
+
+def resolve_workers(workers=None):
+    """workers 为 None 或 0 时使用全部 CPU 核心"""
+    return max(1, workers or os.cpu_count() or 1)
+
+
+def map_chunks(func, items, progress_callback=None, message='', workers=None, chunk_size=CHUNK_SIZE,
+               initializer=None, initargs=()):
+    """
+    按 chunk_size 条一块对 items 执行 func（接受一块、返回等长列表），结果按原顺序拼接
+
+    条目较多且 workers 大于 1 时分给进程池，否则在当前进程中按不超过 SERIAL_CHUNK_SIZE 条一块执行；
+    func 与 initializer 需要可以被子进程导入。每完成一块回调一次进度 (已完成条数, 总条数, message)。
+    """
+    total = len(items)
+    workers = resolve_workers(workers)
+    results = []
+    if workers == 1 or total < PARALLEL_THRESHOLD:
+        if initializer:
+            initializer(*initargs)
+        step = min(chunk_size, SERIAL_CHUNK_SIZE)
+        for start in range(0, total, step):
+            results.extend(func(items[start:start + step]))
+            if progress_callback:
+                progress_callback(len(results), total, message)
+        return results
+
+    chunks = [items[start:start + chunk_size] for start in range(0, total, chunk_size)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=initializer,
+                             initargs=initargs) as executor:
+        # map 按提交顺序返回结果
+        for result in executor.map(func, chunks):
+            results.extend(result)
+            if progress_callback:
+                progress_callback(len(results), total, message)
+    return results
+
+
+def segment_messages(messages, stopwords, progress_callback=None, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    分词并去掉停用词与单字，返回以空格连接的结果，顺序与 messages 一致
+
+    评论较多且 workers 大于 1 时分块交给进程池，停用词过滤也在子进程中完成，每个子进程各自加载一次 jieba 词典。
+    """
+    return map_chunks(_segment_chunk, messages, progress_callback, "分词中", workers, chunk_size,
+                      _init_worker, (frozenset(stopwords),))
@@ -0,0 +1,129 @@
+from math import exp, inf, log
+import numpy as np
+from snownlp import normal, seg, sentiment
+from .Segmentation import map_chunks, CHUNK_SIZE
+
+# 分词缓存的上限（汉字片段数），超过后清空
+SEGMENT_CACHE_SIZE = 200000
+
+_model = None
+
+
+class BayesSentiment:
+    """
+    编译为 NumPy 对数概率表的 SnowNLP 情感模型
+
+    词表把词映射为列号，table[类别, 列] 为该类别下词的对数频率，0 列为未登录词、最后一列为类别先验；
+    每块评论的词转为列号后按评论累加，一次算出整块的得分。累加顺序与 SnowNLP 的 Bayes.classify 相同
+    （先验在前，词按原顺序），得分与 SnowNLP(msg).sentiments 一致。
+
+    分词沿用 SnowNLP 自带的分词与停用词（与词云的 jieba 分词不同，换用 jieba 的结果得分会变），
+    其中最耗时的汉字片段分词按片段缓存，评论中重复的片段只分一次。
+    """
+
+    def __init__(self, classifier=None):
+        bayes = (classifier or sentiment.classifier).classifier
+        self._segments = {}
+        self.classes = list(bayes.d)
+        words = sorted(set().union(*(prob.d for prob in bayes.d.values())))
+        self.vocab = {word: i for i, word in enumerate(words, 1)}
+        self.prior_column = len(words) + 1
+        self.table = np.empty((len(self.classes), len(words) + 2))
+        for row, k in enumerate(self.classes):
+            prob = bayes.d[k]
+            # 与 AddOneProb.freq 相同，用 math.log 逐个计算，避免 np.log 的末位误差
+            self.table[row, :-1] = [log(float(prob.none) / prob.total)] + \
+                                   [log(float(prob.d.get(word, prob.none)) / prob.total) for word in words]
+            self.table[row, -1] = log(prob.getsum()) - log(bayes.total)
+
+    def _single_seg(self, text):
+        words = self._segments.get(text)
+        if words is None:
+            if len(self._segments) >= SEGMENT_CACHE_SIZE:
+                self._segments.clear()
+            words = self._segments[text] = seg.single_seg(text)
+        return words
+
+    def tokenize(self, message):
+        """与 Sentiment.handle 相同：seg.seg 分词后去掉 SnowNLP 的停用词"""
+        words = []
+        for part in seg.re_zh.split(message):
+            part = part.strip()
+            if not part:
+                continue
+            if seg.re_zh.match(part):
+                words += self._single_seg(part)
+            else:
+                words += part.split()
+        stop = normal.stop
+        return [word for word in words if word not in stop]
+
+    def score_tokens(self, token_lists):
+        """按分好的词批量计算得分，返回 float64 数组，越接近 1 越正面"""
+        count = len(token_lists)
+        vocab_get = self.vocab.get
+        columns = []
+        for words in token_lists:
+            columns.append(self.prior_column)
+            columns.extend([vocab_get(word, 0) for word in words])
+        columns = np.array(columns, dtype=np.intp)
+        owners = np.cumsum(columns == self.prior_column) - 1
+        # bincount 按下标顺序累加，每条评论的和与 Bayes.classify 中逐词相加的结果相同
+        tmp = [np.bincount(owners, weights=row[columns], minlength=count) for row in self.table]
+
+        # Bayes.classify：每个类别的概率为 1 / Σ exp(tmp[other] - tmp[k])，溢出时记为 0，取概率最大的类别
+        ret = np.full(count, -1)
+        prob = np.zeros(count)
+        for index, current in enumerate(tmp):
+            now = 1 / sum(_exp_array(other - current) for other in tmp)
+            better = now > prob
+            ret[better] = index
+            prob[better] = now[better]
+        positive = self.classes.index('pos')
+        return np.where(ret == positive, prob, 1 - prob)
+
+    def score(self, messages):
+        return self.score_tokens([self.tokenize(msg) for msg in messages])
+
+
+def _exp(value):
+    try:
+        return exp(value)
+    except OverflowError:
+        return inf
+
+
+def _exp_array(values):
+    """逐个用 math.exp 计算（np.exp 的末位与 math.exp 不总是相同），溢出时为 inf"""
+    return np.fromiter(map(_exp, values.tolist()), dtype=np.float64, count=len(values))
+
+
+def get_model():
+    """当前进程中编译好的模型，首次调用时编译"""
+    global _model
+    if _model is None:
+        _model = BayesSentiment()
+    return _model
+
+
+def _init_worker():
+    get_model()
+
+
+def _score_chunk(messages):
+    return get_model().score(messages).tolist()
+
+
+def sentiment_scores(messages, progress_callback=None, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    SnowNLP 情感得分，越接近 1 越正面，顺序与 messages 一致
+
+    与分词相同，评论较多时分块交给进程池；每个子进程编译一次模型，分词后整块计算得分。
+    """
+    return map_chunks(_score_chunk, messages, progress_callback, "情感分析中", workers, chunk_size, _init_worker)
+
+
+def sentiment_labels(scores):
+    """批量得分转换为 正面 / 中性 / 负面（大于 0.6 为正面，小于 0.4 为负面）"""
+    scores = np.asarray(scores, dtype=np.float64)
+    return np.where(scores > 0.6, "正面", np.where(scores < 0.4, "负面", "中性")).tolist()
@@ -0,0 +1,67 @@
+import json
+import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.normpath(os.path.join(script_dir, '..'))
+
+config_path = os.path.join(root_dir, 'config', 'config.json')
+credential_path = os.path.join(root_dir, 'config', 'credential.env')
+credential_pool_path = os.path.join(root_dir, 'config', 'credential_pool.json')
+journal_dir = os.path.join(root_dir, 'cache', 'journal')
+response_cache_dir = os.path.join(root_dir, 'cache', 'responses')
+spool_dir = os.path.join(root_dir, 'cache', 'spool')
+comment_store_path = os.path.join(root_dir, 'data', 'comments.db')
+
+# 设置项名称 -> (分组, 键, 默认值)，名称与界面使用的 QThread.Load_Settings.cfg 一致
+ITEMS = {
+    'save_commentFolder': ('Crawl', 'Save_path', ''),
+    'max_request_rate': ('Crawl', 'Max_Rate', 4.0),
+    'min_request_rate': ('Crawl', 'Min_Rate', 0.2),
+    'concurrency': ('Crawl', 'Concurrency', 8),
+    'max_active_jobs': ('Crawl', 'Max_Active_Jobs', 2),
+    'stream_batch_size': ('Crawl', 'Batch_Size', 200),
+    'stream_interval': ('Crawl', 'Batch_Interval', 1.0),
+    'use_credential_pool': ('Crawl', 'Use_Credential_Pool', False),
+    'keep_raw_comments': ('Crawl', 'Keep_Raw', False),
+    'use_response_cache': ('Crawl', 'Use_Response_Cache', False),
+    'cache_ttl_hours': ('Crawl', 'Cache_TTL_Hours', 24),
+    'cache_size_mb': ('Crawl', 'Cache_Size_MB', 512),
+    'memory_comment_limit': ('Crawl', 'Memory_Limit', 20000),
+    'use_comment_store': ('Crawl', 'Use_Comment_Store', False),
+    'save_columnar_copy': ('Crawl', 'Save_Columnar_Copy', False),
+    'analysis_workers': ('Analysis', 'Workers', 0),
+    }
+
+
+class Settings:
+    """
+    不依赖 Qt 的只读设置
+
+    直接读取 config/config.json，供命令行等无界面场景使用；缺少的项取默认值。
+    """
+
+    def __init__(self, data=None):
+        self.data = data or {}
+
+    @classmethod
+    def load(cls, path=config_path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __getattr__(self, name):
+        try:
+            section, key, default = ITEMS[name]
+        except KeyError:
+            raise AttributeError(name) from None
+        return self.data.get(section, {}).get(key, default)
+
+
+def load_credential(path=credential_path):
+    """读取登录时保存的凭证，文件不存在时返回 None"""
+    if not os.path.exists(path):
+        return None
+    from .Credential_Pool import credential_from_dict
+    with open(path, 'r', encoding='utf-8') as f:
+        return credential_from_dict(json.load(f))
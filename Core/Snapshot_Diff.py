@@ -0,0 +1,182 @@
+import json
+import logging
+import numpy as np
+from .Comment_Dataset import read_records, dataset_format
+from .Compression import open_output
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(message, uname, location):
+    """评论内容的哈希，message 与 uname 为 UTF-8 字节；只在同一进程内可比较"""
+    return hash((message, uname, location))
+
+
+class SnapshotIndex:
+    """
+    快照的 rpid 哈希索引
+
+    rpid、parent、点赞数和内容哈希各为一列 NumPy 数组，按 rpid 排序（重复的 rpid 只保留一条）；
+    records(indices) 批量取完整的评论，只在输出差异时调用。
+    """
+
+    def __init__(self, rpid, parent, like, content, records, metadata=None):
+        self.metadata = metadata or {}
+        self.failed_rpids = np.array(sorted(self.metadata.get('failed_rpids') or ()), dtype=np.int64)
+        self.rpid, positions = np.unique(np.asarray(rpid, dtype=np.int64), return_index=True)
+        self.parent = np.asarray(parent, dtype=np.int64)[positions]
+        self.like = np.asarray(like, dtype=np.int64)[positions]
+        self.content = np.asarray(content, dtype=np.int64)[positions]
+        self._positions = positions
+        self._records = records
+
+    @classmethod
+    def from_records(cls, records, metadata=None):
+        records = list(records)
+        return cls([cmt.rpid for cmt in records], [cmt.parent for cmt in records], [cmt.like for cmt in records],
+                   [content_hash(cmt.message.encode('utf-8'), cmt.uname.encode('utf-8'), cmt.location)
+                    for cmt in records],
+                   lambda positions: [records[i] for i in positions], metadata)
+
+    @classmethod
+    def from_columnar(cls, dataset):
+        """直接由列式数据集的列构建，不生成评论记录"""
+        locations = dataset.locations
+        content = [content_hash(message, uname, locations[code]) for message, uname, code in
+                   zip(dataset.raw_texts('message'), dataset.raw_texts('uname'), dataset.column('location').tolist())]
+        return cls(dataset.column('rpid'), dataset.column('parent'), dataset.column('like'), content,
+                   dataset.records, dataset.metadata)
+
+    @classmethod
+    def from_file(cls, path):
+        """读取任意格式的数据集文件，列式数据集不经过评论记录"""
+        if dataset_format(path) == 'cols':
+            from .Columnar_Dataset import ColumnarDataset
+            return cls.from_columnar(ColumnarDataset(path))
+        metadata, records = read_records(path)
+        return cls.from_records(records, metadata)
+
+    def records(self, indices):
+        """按索引中的下标批量取评论记录"""
+        return self._records(self._positions[indices].tolist())
+
+    def __len__(self):
+        return len(self.rpid)
+
+
+class SnapshotDiff:
+    """
+    两次快照之间的差异
+
+    added / removed 为新增与消失的评论，changed 为内容变化的 (旧, 新) 评论对；
+    点赞变化保存为 like_rpid / like_before / like_after 三列。新快照中回复获取失败的楼层，
+    其下消失的回复无法确认是否被删除，放在 unverified 中而不计入 removed。
+    两次快照必须属于同一视频，否则抛出 ValueError。
+    """
+
+    def __init__(self, old, new):
+        old_aid = old.metadata.get('video_info', {}).get('aid')
+        new_aid = new.metadata.get('video_info', {}).get('aid')
+        if old_aid is not None and new_aid is not None and old_aid != new_aid:
+            raise ValueError(f"两次快照属于不同的视频（aid {old_aid} 与 {new_aid}）")
+        self.old = old
+        self.new = new
+        _, old_common, new_common = np.intersect1d(old.rpid, new.rpid, assume_unique=True, return_indices=True)
+
+        added = np.ones(len(new), dtype=bool)
+        added[new_common] = False
+        missing = np.ones(len(old), dtype=bool)
+        missing[old_common] = False
+        missing = np.flatnonzero(missing)
+        # 主评论还在、但新快照中它的回复没有取全时，无法确认回复是否被删除
+        parents = old.parent[missing]
+        unverified = (parents != 0) & np.isin(parents, new.failed_rpids) & np.isin(parents, new.rpid)
+        self.added = sorted(new.records(np.flatnonzero(added)), key=lambda cmt: cmt.ctime)
+        self.removed = sorted(old.records(missing[~unverified]), key=lambda cmt: cmt.ctime)
+        self.unverified = old.records(missing[unverified])
+
+        before, after = old.like[old_common], new.like[new_common]
+        moved = before != after
+        self.like_rpid = new.rpid[new_common][moved]
+        self.like_before = before[moved]
+        self.like_after = after[moved]
+        self._like_positions = new_common[moved]
+
+        changed = old.content[old_common] != new.content[new_common]
+        self.changed = list(zip(old.records(old_common[changed]), new.records(new_common[changed])))
+
+    @classmethod
+    def from_files(cls, old_path, new_path):
+        return cls(SnapshotIndex.from_file(old_path), SnapshotIndex.from_file(new_path))
+
+    @property
+    def like_delta(self):
+        return self.like_after - self.like_before
+
+    def _ranked(self, order):
+        return list(zip(self.new.records(self._like_positions[order]), self.like_delta[order].tolist()))
+
+    def top_gainers(self, n=10):
+        """点赞增长最多的 n 条，返回 (评论, 增量)"""
+        delta = self.like_delta
+        order = np.argsort(-delta, kind='stable')[:n]
+        return self._ranked(order[delta[order] > 0])
+
+    def top_losers(self, n=10):
+        """点赞减少最多的 n 条，返回 (评论, 增量)"""
+        delta = self.like_delta
+        order = np.argsort(delta, kind='stable')[:n]
+        return self._ranked(order[delta[order] < 0])
+
+    def summary(self, top=10):
+        return {
+            "old_count": len(self.old),
+            "new_count": len(self.new),
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "removed_roots": sum(1 for cmt in self.removed if not cmt.is_sub_reply),
+            "unverified": len(self.unverified),
+            "changed": len(self.changed),
+            "like_changed": len(self.like_rpid),
+            "like_delta": int(self.like_delta.sum()),
+            "top_gainers": [{"rpid": cmt.rpid, "delta": delta, "like": cmt.like, "message": cmt.message}
+                            for cmt, delta in self.top_gainers(top)],
+            "top_losers": [{"rpid": cmt.rpid, "delta": delta, "like": cmt.like, "message": cmt.message}
+                           for cmt, delta in self.top_losers(top)],
+            }
+
+    def iter_events(self):
+        """逐条差异，供写出报告：type 为 added / removed / unverified / changed / like，点赞变化按增量从大到小"""
+        for cmt in self.added:
+            yield {"type": "added", **cmt.to_dict()}
+        for cmt in self.removed:
+            yield {"type": "removed", **cmt.to_dict()}
+        for cmt in self.unverified:
+            yield {"type": "unverified", **cmt.to_dict()}
+        for before, after in self.changed:
+            yield {"type": "changed", "rpid": after.rpid, "before": before.to_dict(), "after": after.to_dict()}
+        order = np.argsort(-self.like_delta, kind='stable')
+        for rpid, before, after in zip(self.like_rpid[order].tolist(), self.like_before[order].tolist(),
+                                       self.like_after[order].tolist()):
+            yield {"type": "like", "rpid": rpid, "before": before, "after": after, "delta": after - before}
+
+    def save_report(self, filename):
+        """以 NDJSON 保存全部差异，.gz / .zst 时压缩"""
+        with open_output(filename) as f:
+            batch = []
+            for event in self.iter_events():
+                batch.append(json.dumps(event, ensure_ascii=False))
+                if len(batch) >= 10000:
+                    f.write(("\n".join(batch) + "\n").encode('utf-8'))
+                    batch = []
+            if batch:
+                f.write(("\n".join(batch) + "\n").encode('utf-8'))
+        return filename
+
+
+def diff_snapshots(old_path, new_path):
+    """比较同一视频的两个数据集文件（任意保存格式），返回 SnapshotDiff"""
+    diff = SnapshotDiff.from_files(old_path, new_path)
+    logger.info(f"快照差异：新增 {len(diff.added)}，消失 {len(diff.removed)}，内容变化 {len(diff.changed)}，"
+                f"点赞变化 {len(diff.like_rpid)}")
+    return diff
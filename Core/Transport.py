@@ -0,0 +1,161 @@
+import asyncio
+import importlib.util
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# bilibili_api 支持的请求库，按优先顺序排列：curl_cffi 与 httpx 支持 HTTP/2，aiohttp 只有 HTTP/1.1 长连接
+BILI_CLIENTS = ('curl_cffi', 'httpx', 'aiohttp')
+# 各请求库在基础设置之外的设置，与 bilibili_api.clients 中注册时相同
+CLIENT_SETTINGS = {'curl_cffi': {'impersonate': '', 'http2': False}, 'httpx': {'http2': False}, 'aiohttp': {}}
+# 接口请求的连接数上限，所有爬取任务（包括同时运行的监控与批量任务）共享
+MAX_CONNECTIONS = 16
+
+_lock = threading.Lock()
+_session = None
+_bili_client = None
+
+
+def configure_bili_client(timeout=10.0, max_connections=MAX_CONNECTIONS, prefer=BILI_CLIENTS):
+    """
+    为 bilibili_api 选择请求库，设置超时与连接数上限
+
+    bilibili_api 在每个事件循环内复用同一个会话，爬取引擎整个过程只用一个事件循环，
+    因此所有评论请求共享同一组长连接。bilibili_api 没有连接数设置，这里注册所选请求库的子类，
+    自行创建限制了连接数的会话。重复调用只生效一次，返回实际使用的请求库名称。
+    """
+    global _bili_client
+    with _lock:
+        if _bili_client is not None:
+            return _bili_client
+        from bilibili_api import register_client, request_settings
+
+        for name in prefer:
+            if importlib.util.find_spec(name) is None:
+                continue
+            try:
+                register_client(name, _limited_client(name, max_connections), CLIENT_SETTINGS[name])
+            except Exception as e:
+                logger.debug(f"无法使用请求库 {name}: {e}")
+                continue
+            _bili_client = name
+            break
+
+        request_settings.set_timeout(timeout)
+        http2 = False
+        if _bili_client == 'httpx':
+            if importlib.util.find_spec('h2') is None:
+                logger.info("未安装 h2（pip install httpx[http2]），httpx 使用 HTTP/1.1")
+            else:
+                http2 = _set_option(request_settings, 'http2', True)
+        logger.info(f"B站接口请求库: {_bili_client or '默认'}{'（HTTP/2）' if http2 else ''}，"
+                    f"最大连接数 {max_connections if _bili_client else '默认'}")
+        return _bili_client
+
+
+def _set_option(request_settings, name, value):
+    """请求库专用的选项，旧版本 bilibili_api 不支持时忽略，返回是否设置成功"""
+    try:
+        request_settings.set(name, value)
+    except Exception as e:
+        logger.info(f"请求选项 {name} 设置失败，将不会启用: {e}")
+        return False
+    return True
+
+
+def _limited_client(name, max_connections):
+    """
+    bilibili_api 请求客户端的子类：创建会话时限制连接数，其余参数与原客户端相同
+
+    aiohttp 限制每个主机的连接数；httpx 与 curl_cffi 只能限制整个会话，接口请求基本都发往同一主机。
+    """
+    if name == 'curl_cffi':
+        import curl_cffi
+        from curl_cffi import requests as curl_requests
+        from bilibili_api.clients.CurlCFFIClient import CurlCFFIClient
+
+        class LimitedCurlCFFIClient(CurlCFFIClient):
+            def __init__(self, proxy="", timeout=0.0, verify_ssl=True, trust_env=True, impersonate="", http2=False,
+                         session=None):
+                if session is None:
+                    session = curl_requests.AsyncSession(
+                        loop=asyncio.get_event_loop(), max_clients=max_connections, timeout=timeout,
+                        proxies={"all": proxy}, verify=verify_ssl, trust_env=trust_env, impersonate=impersonate,
+                        http_version=curl_cffi.CurlHttpVersion.V2_0 if http2 else None)
+                super().__init__(proxy, timeout, verify_ssl, trust_env, impersonate, http2, session)
+
+        return LimitedCurlCFFIClient
+    if name == 'httpx':
+        import httpx
+        from bilibili_api.clients.HTTPXClient import HTTPXClient
+
+        class LimitedHTTPXClient(HTTPXClient):
+            def __init__(self, proxy="", timeout=0.0, verify_ssl=True, trust_env=True, http2=False, session=None):
+                if session is None:
+                    session = httpx.AsyncClient(
+                        timeout=timeout, proxy=proxy or None, verify=verify_ssl, trust_env=trust_env, http2=http2,
+                        limits=httpx.Limits(max_connections=max_connections,
+                                            max_keepalive_connections=max_connections))
+                super().__init__(proxy, timeout, verify_ssl, trust_env, http2, session)
+
+        return LimitedHTTPXClient
+    import aiohttp
+    from bilibili_api.clients.AioHTTPClient import AioHTTPClient
+
+    class LimitedAioHTTPClient(AioHTTPClient):
+        def __init__(self, proxy="", timeout=0, verify_ssl=True, trust_env=True, session=None):
+            own_session = session is None
+            if own_session:
+                session = aiohttp.ClientSession(
+                    trust_env=trust_env,
+                    connector=aiohttp.TCPConnector(ssl=None if verify_ssl else False, limit_per_host=max_connections))
+            super().__init__(proxy, timeout, verify_ssl, trust_env, session)
+            if own_session:
+                # 传入会话时 AioHTTPClient 不再按请求传递代理与超时，这里恢复
+                self.set_proxy(proxy)
+                self.set_timeout(timeout)
+
+    return LimitedAioHTTPClient
+
+
+def get_session(pool_maxsize=8) -> requests.Session:
+    """进程内共享的 requests 会话，用于头像等非接口下载，连接保持并按主机复用"""
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize,
+                                  max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504)))
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update({
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                              '(KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+                'Referer': 'https://www.bilibili.com/',
+                })
+            _session = session
+        return _session
+
+
+def download(url, timeout=10):
+    """通过共享会话下载小文件，失败时返回 None"""
+    if not url:
+        return None
+    response = get_session().get(url, timeout=timeout)
+    if response.status_code == 200:
+        return response.content
+    logger.error(f"下载失败({response.status_code}): {url}")
+    return None
+
+
+def close_session():
+    """程序退出时关闭共享会话"""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
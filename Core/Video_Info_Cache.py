@@ -0,0 +1,92 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+
+
+class VideoInfoCache:
+    """
+    视频信息缓存
+
+    同一个 BV 号在 ttl 秒内只请求一次；多个线程、多个事件循环同时查询同一个 BV 号时，
+    只有第一个真正发出请求，其余的等待它的结果。
+    """
+
+    def __init__(self, ttl=300.0):
+        self.ttl = ttl
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def peek(self, bv_id):
+        """返回未过期的缓存，不发请求"""
+        with self._lock:
+            entry = self._entries.get(bv_id)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                return entry[1]
+        return None
+
+    def put(self, bv_id, info):
+        with self._lock:
+            self._entries[bv_id] = (time.monotonic(), info)
+
+    def invalidate(self, bv_id=None):
+        with self._lock:
+            if bv_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(bv_id, None)
+
+    async def get(self, bv_id, fetch):
+        """获取视频信息，未命中时调用 fetch(bv_id) 协程请求"""
+        while True:
+            with self._lock:
+                entry = self._entries.get(bv_id)
+                if entry and time.monotonic() - entry[0] < self.ttl:
+                    return entry[1]
+                future = self._inflight.get(bv_id)
+                owner = future is None
+                if owner:
+                    future = concurrent.futures.Future()
+                    self._inflight[bv_id] = future
+            if owner:
+                return await self._fetch(bv_id, fetch, future)
+            try:
+                # shield 避免等待方被取消时连带取消共享的 future
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except asyncio.CancelledError:
+                # 发起请求的一方被取消时重新查询，自己被取消时照常退出
+                if not future.cancelled():
+                    raise
+
+    async def _fetch(self, bv_id, fetch, future):
+        try:
+            info = await fetch(bv_id)
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(bv_id, None)
+            future.set_exception(e)
+            raise
+        except BaseException:
+            with self._lock:
+                self._inflight.pop(bv_id, None)
+            future.cancel()
+            raise
+        with self._lock:
+            self._entries[bv_id] = (time.monotonic(), info)
+            self._inflight.pop(bv_id, None)
+        future.set_result(info)
+        return info
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_video_info_cache() -> VideoInfoCache:
+    """进程内共用的视频信息缓存"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = VideoInfoCache()
+        return _shared_cache
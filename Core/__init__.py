@@ -0,0 +1,54 @@
+# core/__init__.py
+# 子模块按需导入：from Core.X import ... 不会连带导入 bilibili_api、APScheduler、NumPy 等其他子模块的依赖
+from importlib import import_module
+
+_EXPORTS = {
+    'BiliCommentApi': 'Bili_Api',
+    'CrawlEngine': 'Crawl_Engine',
+    'AdaptiveRateLimiter': 'Rate_Limiter',
+    'get_shared_limiter': 'Rate_Limiter',
+    'CrawlJournal': 'Crawl_Journal',
+    'IncrementalSeed': 'Incremental',
+    'CommentBatcher': 'Comment_Stream',
+    'CrawlStats': 'Comment_Stream',
+    'CommentSpool': 'Comment_Spool',
+    'CommentStore': 'Comment_Store',
+    'CrawlScheduler': 'Crawl_Scheduler',
+    'CrawlJob': 'Crawl_Scheduler',
+    'PriorityGate': 'Crawl_Scheduler',
+    'CredentialPool': 'Credential_Pool',
+    'get_shared_pool': 'Credential_Pool',
+    'ResponseCache': 'Response_Cache',
+    'get_shared_cache': 'Response_Cache',
+    'VideoInfoCache': 'Video_Info_Cache',
+    'get_video_info_cache': 'Video_Info_Cache',
+    'configure_bili_client': 'Transport',
+    'get_session': 'Transport',
+    'download': 'Transport',
+    'CommentRecord': 'Comment_Record',
+    'as_record': 'Comment_Record',
+    'process_comments': 'Comment_Dataset',
+    'build_data_structure': 'Comment_Dataset',
+    'save_dataset': 'Comment_Dataset',
+    'save_records': 'Comment_Dataset',
+    'load_dataset': 'Comment_Dataset',
+    'extract_comment_info': 'Comment_Dataset',
+    'VideoMonitor': 'Monitor',
+    'DatasetMerger': 'Dataset_Merge',
+    'merge_datasets': 'Dataset_Merge',
+    }
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
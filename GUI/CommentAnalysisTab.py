@@ -1,13 +1,16 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QScrollArea,QFileDialog, QPushButton,
-    QFrame, QHBoxLayout, QGraphicsDropShadowEffect,QProgressBar
+    QFrame, QHBoxLayout, QGraphicsDropShadowEffect,QProgressBar, QLineEdit
     )
 from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QPixmap, QFont, QColor
 import matplotlib.pyplot as plt
 import pandas as pd
 import io
+import os
+from datetime import datetime, timedelta
 from QThread.Data_analysis_Thread import AnalysisThread
+from QThread.Merge_dataset_Thread import MergeDatasetThread
 
 
 plt.rcParams['font.sans-serif'] = ['Microsoft YaHei']
@@ -126,7 +129,33 @@ class CommentAnalysisTab(QWidget):
         self.btn_load.clicked.connect(self.load_local_file)
         self.vbox_layout.addWidget(self.btn_load)
 
+        # 同一视频多次爬取的文件合并去重后再分析
+        self.btn_merge = QPushButton("合并同一视频的多个文件")
+        self.btn_merge.setFixedHeight(40)
+        self.btn_merge.setStyleSheet(self.btn_load.styleSheet())
+        self.btn_merge.clicked.connect(self.merge_local_files)
+        self.vbox_layout.addWidget(self.btn_merge)
+
+        # 评论库查询条件，只在选择 .db 文件时使用，留空表示不限
+        self.filter_bar = QWidget()
+        filter_layout = QHBoxLayout(self.filter_bar)
+        filter_layout.setContentsMargins(0, 0, 0, 0)
+        self.filter_bv = QLineEdit()
+        self.filter_bv.setPlaceholderText("评论库：BV号")
+        self.filter_start = QLineEdit()
+        self.filter_start.setPlaceholderText("开始日期 2024-01-01")
+        self.filter_end = QLineEdit()
+        self.filter_end.setPlaceholderText("结束日期（含）")
+        self.filter_user = QLineEdit()
+        self.filter_user.setPlaceholderText("用户ID")
+        self.filter_top = QLineEdit()
+        self.filter_top.setPlaceholderText("高赞前N条")
+        for edit in (self.filter_bv, self.filter_start, self.filter_end, self.filter_user, self.filter_top):
+            filter_layout.addWidget(edit)
+        self.vbox_layout.addWidget(self.filter_bar)
+
         self.thread = None
+        self.merge_thread = None
 
     # ------------------ 分析线程进度更新 ------------------
     # 回调更新进度
@@ -134,6 +163,20 @@ class CommentAnalysisTab(QWidget):
         self.label_status.setText(f"{msg} {current}/{total}")
         self.progress_bar.setValue(int(current / total * 100))
 
+    def store_query(self):
+        """读取评论库查询条件"""
+        start = self.filter_start.text().strip()
+        end = self.filter_end.text().strip()
+        user_id = self.filter_user.text().strip()
+        top = self.filter_top.text().strip()
+        return {
+            "bvid": self.filter_bv.text().strip() or None,
+            "start": datetime.strptime(start, "%Y-%m-%d") if start else None,
+            "end": datetime.strptime(end, "%Y-%m-%d") + timedelta(days=1) if end else None,
+            "user_id": int(user_id) if user_id else None,
+            "top": int(top) if top else None,
+            }
+
     def on_failed(self, err):
         self.label_status.setText(f"分析失败：{err}")
         self.progress_bar.setValue(0)
@@ -143,16 +186,58 @@ class CommentAnalysisTab(QWidget):
         self.progress_bar.setVisible(True)
         self.label_status.setVisible(True)
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "选择 JSON 文件", "", "JSON Files (*.json)"
+            self, "选择 JSON 文件", "", "JSON Files (*.json *.jsonl *.cols *.gz *.zst);;评论库 (*.db)"
+        )
+        if not file_path:
+            return
+        query = None
+        if file_path.endswith('.db'):
+            try:
+                query = self.store_query()
+            except ValueError as e:
+                self.on_failed(f"查询条件有误 {e}")
+                return
+        self.start_analysis(file_path, query)
+
+    # ------------------ 合并多个文件 ------------------
+    def merge_local_files(self):
+        paths, _ = QFileDialog.getOpenFileNames(
+            self, "选择同一视频的多个文件", "", "JSON Files (*.json *.jsonl *.cols *.gz *.zst)"
         )
-        if file_path:
-            self.start_analysis(file_path)
+        if len(paths) < 2:
+            return
+        output, _ = QFileDialog.getSaveFileName(
+            self, "保存合并结果", os.path.join(os.path.dirname(paths[0]), "merged.json"),
+            "JSON文件 (*.json);;NDJSON 每行一条评论 (*.jsonl);;列式数据集 (*.cols)"
+        )
+        if not output:
+            return
+        self.progress_bar.setVisible(True)
+        self.label_status.setVisible(True)
+        self.btn_merge.setEnabled(False)
+        self.label_status.setText(f"合并中：{len(paths)} 个文件")
+        self.merge_thread = MergeDatasetThread(paths, output)
+        self.merge_thread.progress.connect(self.on_progress)
+        self.merge_thread.finished.connect(self.on_merged)
+        self.merge_thread.failed.connect(self.on_merge_failed)
+        self.merge_thread.start()
+
+    def on_merged(self, summary):
+        self.btn_merge.setEnabled(True)
+        self.label_status.setText(f"已合并 {summary['files']} 个文件：{summary['input']} 条评论，"
+                                  f"去重后 {summary['comments']} 条")
+        self.start_analysis(summary['output'])
+
+    def on_merge_failed(self, err):
+        self.btn_merge.setEnabled(True)
+        self.label_status.setText(f"合并失败：{err}")
+        self.progress_bar.setValue(0)
 
     # ------------------ 启动分析线程 ------------------
-    def start_analysis(self, file_path):
+    def start_analysis(self, file_path, query=None):
         self.label_status.setText(f"分析中：{file_path}")
         # 在 CommentAnalysisTab 里
-        self.thread = AnalysisThread(file_path)
+        self.thread = AnalysisThread(file_path, query=query)
         self.thread.progress.connect(self.on_progress)
         self.thread.finished.connect(self.on_finished)
         self.thread.failed.connect(self.on_failed)
@@ -253,7 +338,8 @@ class CommentAnalysisTab(QWidget):
         self.progress_bar.setVisible(False)
         for i in reversed(range(self.vbox_layout.count())):
             widget = self.vbox_layout.itemAt(i).widget()
-            if widget and widget != self.btn_load and widget!=self.progress_bar and widget !=self.label_status:  # 保留加载文件按钮
+            if widget and widget not in (self.btn_load, self.btn_merge, self.progress_bar, self.label_status,
+                                         self.filter_bar):  # 保留加载文件按钮
                 widget.deleteLater()
 
         self.vbox_layout.addWidget(
@@ -273,6 +359,7 @@ class CommentAnalysisTab(QWidget):
             )
 
         self.vbox_layout.addWidget(self.btn_load)
+        self.vbox_layout.addWidget(self.btn_merge)
 
         self.label_status.setText("分析完成 ✅")
         self.analysis_success.emit()
@@ -1,13 +1,15 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QFileDialog
 from PyQt5.QtCore import pyqtSignal, Qt
 import re
 import sys
-from bilibili_api import video, sync
-from qfluentwidgets import (PrimaryPushButton, LineEdit, FluentIcon as FIF, StrongBodyLabel, BodyLabel, CaptionLabel,
+from qfluentwidgets import (PrimaryPushButton, PushButton, LineEdit, FluentIcon as FIF, StrongBodyLabel, BodyLabel, CaptionLabel,
                             TitleLabel, IndeterminateProgressRing, StateToolTip, CardWidget)
 
 sys.path.append("..")
 from QThread.Get_comment_Thread import CommentCrawlerThread
+from QThread.Video_info_Thread import VideoInfoThread
+from QThread.Load_Settings import cfg
+from Core.Incremental import IncrementalSeed
 
 
 
@@ -19,14 +21,18 @@ class CommentCrawlTab(QWidget):
     fetch_info_requested_failed = pyqtSignal(str)
 
     crawl_comments_warning = pyqtSignal()
-    crawl_comments_failed = pyqtSignal(list, int, dict, str)
-    crawl_comments_finished = pyqtSignal(list, int, dict)
+    crawl_comments_started = pyqtSignal(dict, object)
+    crawl_comments_batch = pyqtSignal(list)
+    crawl_comments_failed = pyqtSignal(list, int, dict, str, object, object)
+    crawl_comments_finished = pyqtSignal(list, int, dict, object, list, object)
 
     def __init__(self):
         super().__init__()
         self.credential = None
         self.crawler_thread = None
         self.current_bv_id = None
+        self.current_video_info = {}
+        self.info_thread = None
         self.state_tooltip = None
         self.init_ui()
 
@@ -92,10 +98,17 @@ class CommentCrawlTab(QWidget):
 
         self.crawl_button = PrimaryPushButton('开始爬取', self)
         self.crawl_button.setIcon(FIF.DOWNLOAD)
-        self.crawl_button.clicked.connect(self.start_crawling)
+        self.crawl_button.clicked.connect(lambda: self.start_crawling())
         self.crawl_button.setEnabled(False)
         button_layout.addWidget(self.crawl_button)
 
+        self.incremental_button = PushButton('增量爬取', self)
+        self.incremental_button.setIcon(FIF.SYNC)
+        self.incremental_button.setToolTip('选择之前保存的评论文件，只爬取新增评论并合并')
+        self.incremental_button.clicked.connect(self.start_incremental_crawling)
+        self.incremental_button.setEnabled(False)
+        button_layout.addWidget(self.incremental_button)
+
         layout.addLayout(button_layout)
         layout.addStretch()
 
@@ -121,38 +134,63 @@ class CommentCrawlTab(QWidget):
 
         bv_id = bv_match[0]
 
-        try:
-            self.progress_ring.setVisible(True)
-            self.progress_label.setText('正在获取视频信息...')
-            self.progress_label.setVisible(True)
-            self.fetch_info_button.setEnabled(False)
+        self.progress_ring.setVisible(True)
+        self.progress_label.setText('正在获取视频信息...')
+        self.progress_label.setVisible(True)
+        self.fetch_info_button.setEnabled(False)
 
-            v = video.Video(bvid=bv_id, credential=self.credential)
-            video_info = sync(v.get_info())
+        # 在线程中请求，避免界面卡住
+        self.info_thread = VideoInfoThread(self.credential, bv_id)
+        self.info_thread.info_fetched.connect(self.on_video_info_fetched)
+        self.info_thread.error_occurred.connect(self.on_video_info_failed)
+        self.info_thread.start()
+
+    def on_video_info_fetched(self, bv_id, video_info):
+        """视频信息获取成功"""
+        title = video_info.get('title', '未知标题')
+        author = video_info.get('owner', {}).get('name', '未知作者')
+        comment_count = video_info.get('stat', {}).get('reply', 0)
+
+        self.video_info_label.setText(
+            f'标题: {title}\n作者: {author}\n评论数: {comment_count}'
+            )
+        self.crawl_button.setEnabled(True)
+        self.incremental_button.setEnabled(True)
+        self.current_bv_id = bv_id
+        self.current_video_info = video_info
+        self.fetch_info_requested_success.emit(bv_id)
 
-            title = video_info.get('title', '未知标题')
-            author = video_info.get('owner', {}).get('name', '未知作者')
-            comment_count = video_info.get('stat', {}).get('reply', 0)
+        self.progress_ring.setVisible(False)
+        self.progress_label.setVisible(False)
+        self.fetch_info_button.setEnabled(True)
 
-            self.video_info_label.setText(
-                f'标题: {title}\n作者: {author}\n评论数: {comment_count}'
-                )
-            self.crawl_button.setEnabled(True)
-            self.current_bv_id = bv_id
-            self.fetch_info_requested_success.emit(bv_id)
+    def on_video_info_failed(self, error):
+        """视频信息获取失败"""
+        self.progress_ring.setVisible(False)
+        self.progress_label.setVisible(False)
+        self.fetch_info_button.setEnabled(True)
+        self.fetch_info_requested_failed.emit(error)
 
-            self.progress_ring.setVisible(False)
-            self.progress_label.setVisible(False)
-            self.fetch_info_button.setEnabled(True)
+    def start_incremental_crawling(self):
+        """以之前保存的评论文件为基准进行增量爬取"""
+        if not self.current_bv_id:
+            self.crawl_comments_warning.emit()
+            return
 
+        filename, _ = QFileDialog.getOpenFileName(
+            self, '选择基准评论文件', cfg.get(cfg.save_commentFolder), 'JSON文件 (*.json *.jsonl *.cols *.gz *.zst)'
+            )
+        if not filename:
+            return
 
+        try:
+            seed = IncrementalSeed.from_file(filename)
         except Exception as e:
-            self.progress_ring.setVisible(False)
-            self.progress_label.setVisible(False)
-            self.fetch_info_button.setEnabled(True)
-            self.fetch_info_requested_failed.emit(str(e))
+            self.crawl_comments_failed.emit([], 0, {}, f'基准文件读取失败: {e}', None, None)
+            return
+        self.start_crawling(seed)
 
-    def start_crawling(self):
+    def start_crawling(self, seed=None):
         """开始爬取评论"""
         if not self.current_bv_id:
             self.crawl_comments_warning.emit()
@@ -164,13 +202,23 @@ class CommentCrawlTab(QWidget):
         self.state_tooltip.show()
 
         self.crawl_button.setEnabled(False)
+        self.incremental_button.setEnabled(False)
 
-        self.crawler_thread = CommentCrawlerThread(self.credential, self.current_bv_id)
+        self.crawler_thread = CommentCrawlerThread(self.credential, self.current_bv_id, seed)
+        self.state_tooltip.closedSignal.connect(self.cancel_crawling)
         self.crawler_thread.progress_update.connect(self.update_progress)
+        self.crawler_thread.comments_batch.connect(self.crawl_comments_batch)
         self.crawler_thread.finished.connect(self.on_crawl_finished)
         self.crawler_thread.error_occurred.connect(self.on_crawl_error)
+        self.crawl_comments_started.emit(self.current_video_info, seed)
         self.crawler_thread.start()
 
+    def cancel_crawling(self):
+        """关闭进度提示时取消爬取"""
+        self.state_tooltip = None
+        if self.crawler_thread:
+            self.crawler_thread.stop()
+
     def update_progress(self, current, total, message):
         """更新进度"""
         if self.state_tooltip:
@@ -178,15 +226,17 @@ class CommentCrawlTab(QWidget):
             self.state_tooltip.setTitle(f'正在爬取 ({progress}%)')
             self.state_tooltip.setContent(message)
 
-    def on_crawl_finished(self, comments, count, video_info):
+    def on_crawl_finished(self, comments, count, video_info, failed_rpids):
         """爬取完成"""
         if self.state_tooltip:
             self.state_tooltip.setState(True)
             self.state_tooltip = None
 
         self.crawl_button.setEnabled(True)
+        self.incremental_button.setEnabled(True)
 
-        self.crawl_comments_finished.emit(comments, count, video_info)
+        self.crawl_comments_finished.emit(comments, count, video_info, self.crawler_thread.seed, failed_rpids,
+                                          self.crawler_thread.spool)
 
     def on_crawl_error(self, comments, count, video_info, error_msg):
         """爬取错误"""
@@ -196,4 +246,6 @@ class CommentCrawlTab(QWidget):
             self.state_tooltip = None
 
         self.crawl_button.setEnabled(True)
-        self.crawl_comments_failed.emit(comments, count, video_info, str(error_msg))
+        self.incremental_button.setEnabled(True)
+        self.crawl_comments_failed.emit(comments, count, video_info, str(error_msg), self.crawler_thread.seed,
+                                        self.crawler_thread.spool)
@@ -10,6 +10,7 @@ from qfluentwidgets import (PrimaryPushButton, ListWidget, TextEdit, FluentIcon
 sys.path.append("..")
 from QThread.Save_comment_Thread import SaveCommentThread
 from QThread.Load_Settings import cfg
+from Core.Comment_Stream import CrawlStats
 
 
 class CommentSaveTab(QWidget):
@@ -22,10 +23,21 @@ class CommentSaveTab(QWidget):
 
     comment_selected = pyqtSignal(int)
 
+    MAX_DISPLAY = 500
+    # 详情中最多列出的子评论数
+    MAX_REPLY_PREVIEW = 20
+
     def __init__(self):
         super().__init__()
         self.comments = []
         self.video_info = {}
+        self.base_comments = None
+        self.failed_rpids = []
+        self.spool = None
+        self.row_index = []
+        # 主评论 rpid -> 内存中的回复，点击评论时直接查找
+        self.replies_by_parent = {}
+        self.stream_stats = None
         self.save_thread = None
         self.state_tooltip = None
         self.init_ui()
@@ -109,65 +121,109 @@ class CommentSaveTab(QWidget):
 
         self.setLayout(layout)
 
-    def display_comments(self, comments, video_info):
-        """显示评论数据"""
+    def display_comments(self, comments, video_info, base_comments=None, failed_rpids=None, spool=None):
+        """
+        显示评论数据，base_comments 为增量爬取的基准数据，failed_rpids 为回复获取失败的楼层
+
+        spool 为爬取时的落盘缓冲，此时 comments 只是内存中保留的部分，保存和查看回复时从 spool 读取。
+        """
+        if self.spool is not None and self.spool is not spool:
+            self.spool.discard()
         self.comments = comments
+        self.spool = spool
         self.video_info = video_info
+        self.base_comments = base_comments
+        self.failed_rpids = failed_rpids or []
+        self.stream_stats = None
+        self.row_index = []
+        self.replies_by_parent = {}
+        self.index_replies(comments)
         self.comments_list.clear()
         self.comment_detail.clear()
-        self.save_button.setEnabled(bool(comments))
-
-
-        total_comments = len(comments)
-        self.stats_label.setText(f'共 {total_comments} 条评论,此处不显示主评论')
 
-
-        display_comments = comments[:500]
-
-        for i, cmt in enumerate(display_comments):
-            if cmt['parent'] != 0:
+        total_comments = len(spool) if spool is not None else len(comments)
+        self.save_button.setEnabled(total_comments > 0)
+        if base_comments is not None:
+            self.stats_label.setText(f'增量获取 {total_comments} 条评论,保存时将与基准文件的 {len(base_comments)} 条主评论合并')
+        else:
+            self.stats_label.setText(f'共 {total_comments} 条评论,此处不显示主评论')
+
+        self.add_comment_items(0, comments[:self.MAX_DISPLAY])
+
+    def start_stream(self, video_info, base_comments=None):
+        """开始接收爬取过程中分批推送的评论"""
+        self.display_comments([], video_info, base_comments)
+        self.stream_stats = CrawlStats()
+        self.stats_label.setText('等待评论数据...')
+
+    def append_comments(self, batch):
+        """追加一批评论并刷新实时统计，超出内存上限的部分只在落盘缓冲中"""
+        start = len(self.comments)
+        kept = batch[:max(0, cfg.get(cfg.memory_comment_limit) - start)]
+        self.comments.extend(kept)
+        self.index_replies(kept)
+        if start < self.MAX_DISPLAY:
+            self.add_comment_items(start, batch[:self.MAX_DISPLAY - start])
+        if self.stream_stats is not None:
+            self.stream_stats(batch)
+            self.stats_label.setText(self.stream_stats.summary())
+
+    def index_replies(self, comments):
+        """把回复按所属主评论加入 replies_by_parent"""
+        replies_by_parent = self.replies_by_parent
+        for cmt in comments:
+            if cmt.is_sub_reply:
+                replies = replies_by_parent.get(cmt.parent)
+                if replies is None:
+                    replies = replies_by_parent[cmt.parent] = []
+                replies.append(cmt)
+
+    def add_comment_items(self, start, comments):
+        """把主评论加入列表，记录列表行对应的评论下标"""
+        for i, cmt in enumerate(comments, start):
+            if cmt.parent != 0:
                 continue
-            member = cmt.get('member', {})
-            content = cmt.get('content', {})
-            username = member.get('uname', '未知用户')
-            message = content.get('message', '')
+            username = cmt.uname
+            message = cmt.message
 
             if len(message) > 50:
                 message = message[:47] + '...'
 
             item_text = f"{i + 1}. {username}: {message}"
             self.comments_list.addItem(item_text)
+            self.row_index.append(i)
 
     def on_comment_clicked(self, item):
         """评论点击事件处理"""
-        index = self.comments_list.currentRow()
-        if 0 <= index < len(self.comments):
+        row = self.comments_list.currentRow()
+        if 0 <= row < len(self.row_index):
+            index = self.row_index[row]
             self.comment_selected.emit(index)
             self.show_comment_detail(index)
 
     def show_comment_detail(self, index):
         """显示评论详情"""
         cmt = self.comments[index]
-        member = cmt.get('member', {})
-        content = cmt.get('content', {})
 
-        detail_text = f"""<b>用户名:</b> {member.get('uname', '未知用户')}
-<b>用户ID:</b> {member.get('mid', '未知')}
-<b>发布时间:</b> {datetime.fromtimestamp(cmt.get('ctime', 0)).strftime('%Y-%m-%d %H:%M:%S')}
-<b>点赞数:</b> {cmt.get('like', 0)}
-<b>IP地址:</b> {cmt.get('reply_control', {}).get('location', '未知')}
-<b>性别:</b> {member.get('sex', '未知')}
+        detail_text = f"""<b>用户名:</b> {cmt.uname}
+<b>用户ID:</b> {cmt.mid}
+<b>发布时间:</b> {datetime.fromtimestamp(cmt.ctime).strftime('%Y-%m-%d %H:%M:%S')}
+<b>点赞数:</b> {cmt.like}
+<b>IP地址:</b> {cmt.location or '未知'}
+<b>性别:</b> {cmt.sex or '未知'}
 
 <b>评论内容:</b>
-{content.get('message', '')}
+{cmt.message}
 """
 
-        if 'replies' in cmt and cmt['replies']:
-            detail_text += f"\n<b>子评论 ({len(cmt['replies'])} 条):</b>\n"
-            for reply in cmt['replies']:
-                reply_member = reply.get('member', {})
-                reply_content = reply.get('content', {})
-                detail_text += f"\n↳ <b>{reply_member.get('uname', '未知用户')}:</b> {reply_content.get('message', '')}\n"
+        if self.spool is not None:
+            replies = self.spool.replies_of(cmt.rpid)
+        else:
+            replies = self.replies_by_parent.get(cmt.rpid, [])
+        if replies:
+            detail_text += f"\n<b>子评论 ({len(replies)} 条):</b>\n"
+            for reply in replies[:self.MAX_REPLY_PREVIEW]:
+                detail_text += f"\n↳ <b>{reply.uname}:</b> {reply.message}\n"
 
         self.comment_detail.setHtml(detail_text)
 
@@ -175,17 +231,22 @@ class CommentSaveTab(QWidget):
         """保存评论到JSON文件（使用线程）"""
         video_name = self.video_info.get('title', 'unknown')
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        if not self.comments:
+        comments = self.spool if self.spool is not None else self.comments
+        if not comments:
             self.save_warning.emit()
             return
 
-        filename, _ = QFileDialog.getSaveFileName(
-            self, '保存评论数据', f'{cfg.get(cfg.save_commentFolder)}/{video_name}_{timestamp}', 'JSON文件 (*.json)'
+        filename, selected_filter = QFileDialog.getSaveFileName(
+            self, '保存评论数据', f'{cfg.get(cfg.save_commentFolder)}/{video_name}_{timestamp}',
+            'JSON文件 (*.json);;NDJSON 每行一条评论 (*.jsonl);;JSON gzip 压缩 (*.json.gz);;'
+            'NDJSON gzip 压缩 (*.jsonl.gz);;JSON zstd 压缩 (*.json.zst);;NDJSON zstd 压缩 (*.jsonl.zst);;'
+            '列式数据集 (*.cols)'
             )
 
         if filename:
-            if not filename.endswith('.json'):
-                filename += '.json'
+            extension = selected_filter[selected_filter.rindex('*') + 1:-1]
+            if not filename.endswith(extension):
+                filename += extension
 
             self.save_button.setEnabled(False)
 
@@ -193,7 +254,8 @@ class CommentSaveTab(QWidget):
             self.state_tooltip.move(self.state_tooltip.getSuitablePos())
             self.state_tooltip.show()
 
-            self.save_thread = SaveCommentThread(self.comments, self.video_info, filename)
+            self.save_thread = SaveCommentThread(comments, self.video_info, filename, self.base_comments,
+                                                 self.failed_rpids, cfg.get(cfg.save_columnar_copy))
             self.save_thread.save_progress.connect(self.update_save_progress)
             self.save_thread.save_finished.connect(self.on_save_finished)
             self.save_thread.save_error.connect(self.on_save_error)
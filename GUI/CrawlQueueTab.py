@@ -0,0 +1,160 @@
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QFileDialog, QTableWidgetItem, QHeaderView
+from PyQt5.QtCore import pyqtSignal, Qt
+import re
+import sys
+from qfluentwidgets import (PrimaryPushButton, PushButton, PlainTextEdit, SpinBox, TableWidget, FluentIcon as FIF,
+                            StrongBodyLabel, BodyLabel, TitleLabel, CardWidget)
+
+sys.path.append("..")
+from QThread.Batch_crawl_Thread import BatchCrawlThread
+
+
+class CrawlQueueTab(QWidget):
+    """批量爬取标签页 - 多个视频排队，由同一个调度器共享并发与速率"""
+
+    queue_warning = pyqtSignal()
+
+    COLUMNS = ['BV号', '标题', '优先级', '状态', '评论数', '信息']
+
+    def __init__(self):
+        super().__init__()
+        self.credential = None
+        self.batch_thread = None
+        self.rows = {}
+        self.init_ui()
+
+    def init_ui(self):
+        """初始化批量爬取界面布局"""
+        layout = QVBoxLayout()
+        layout.setSpacing(15)
+        layout.setContentsMargins(20, 32, 20, 20)
+
+        title_label = TitleLabel('批量爬取')
+        title_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(title_label)
+
+        input_card = CardWidget()
+        input_layout = QVBoxLayout(input_card)
+        input_layout.addWidget(StrongBodyLabel('视频列表'))
+
+        self.bv_input = PlainTextEdit()
+        self.bv_input.setPlaceholderText('每行一个BV号或B站视频链接')
+        self.bv_input.setFixedHeight(120)
+        input_layout.addWidget(self.bv_input)
+
+        option_layout = QHBoxLayout()
+        option_layout.addWidget(BodyLabel('优先级(数值越小越优先)'))
+        self.priority_box = SpinBox()
+        self.priority_box.setRange(0, 9)
+        self.priority_box.setValue(5)
+        option_layout.addWidget(self.priority_box)
+        option_layout.addStretch()
+
+        self.import_button = PushButton('从文件导入', self)
+        self.import_button.setIcon(FIF.FOLDER)
+        self.import_button.clicked.connect(self.import_from_file)
+        option_layout.addWidget(self.import_button)
+
+        self.enqueue_button = PrimaryPushButton('加入队列', self)
+        self.enqueue_button.setIcon(FIF.ADD)
+        self.enqueue_button.clicked.connect(self.enqueue)
+        self.enqueue_button.setEnabled(False)
+        option_layout.addWidget(self.enqueue_button)
+
+        input_layout.addLayout(option_layout)
+        layout.addWidget(input_card)
+
+        self.job_table = TableWidget(self)
+        self.job_table.setColumnCount(len(self.COLUMNS))
+        self.job_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.job_table.verticalHeader().hide()
+        self.job_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.job_table.setEditTriggers(TableWidget.NoEditTriggers)
+        self.job_table.setSelectionBehavior(TableWidget.SelectRows)
+        layout.addWidget(self.job_table)
+
+        button_layout = QHBoxLayout()
+        button_layout.setSpacing(10)
+
+        self.pause_button = PushButton('暂停', self)
+        self.pause_button.setIcon(FIF.PAUSE)
+        self.pause_button.clicked.connect(lambda: self.apply_to_selected('pause_job'))
+        button_layout.addWidget(self.pause_button)
+
+        self.resume_button = PushButton('继续', self)
+        self.resume_button.setIcon(FIF.PLAY)
+        self.resume_button.clicked.connect(lambda: self.apply_to_selected('resume_job'))
+        button_layout.addWidget(self.resume_button)
+
+        self.cancel_button = PushButton('取消', self)
+        self.cancel_button.setIcon(FIF.CLOSE)
+        self.cancel_button.clicked.connect(lambda: self.apply_to_selected('cancel_job'))
+        button_layout.addWidget(self.cancel_button)
+
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+    def set_credential(self, credential):
+        """设置登录凭证，凭证变化后之后的队列使用新凭证"""
+        self.credential = credential
+        if self.batch_thread is not None and not self.batch_thread.isRunning():
+            self.batch_thread = None
+        self.enqueue_button.setEnabled(True)
+
+    def import_from_file(self):
+        """从文本文件导入BV号列表"""
+        filename, _ = QFileDialog.getOpenFileName(self, '导入BV号列表', '', '文本文件 (*.txt);;所有文件 (*)')
+        if filename:
+            with open(filename, 'r', encoding='utf-8') as f:
+                self.bv_input.appendPlainText(f.read())
+
+    def enqueue(self):
+        """解析输入框中的BV号并加入队列"""
+        bv_ids = list(dict.fromkeys(re.findall('BV.{10}', self.bv_input.toPlainText())))
+        if not bv_ids:
+            self.queue_warning.emit()
+            return
+
+        if self.batch_thread is None:
+            self.batch_thread = BatchCrawlThread(self.credential)
+            self.batch_thread.job_updated.connect(self.update_job)
+            self.batch_thread.finished.connect(self.on_batch_finished)
+
+        priority = self.priority_box.value()
+        for bv_id in bv_ids:
+            self.batch_thread.add_job(bv_id, priority)
+            self.set_cell(bv_id, 2, str(priority))
+        self.bv_input.clear()
+
+        if not self.batch_thread.isRunning():
+            self.batch_thread.start()
+
+    def on_batch_finished(self):
+        """线程结束前后恰好加入的任务需要重新启动线程"""
+        if self.batch_thread.scheduler.has_pending():
+            self.batch_thread.start()
+
+    def apply_to_selected(self, action):
+        """对选中的任务执行暂停/继续/取消"""
+        if self.batch_thread is None:
+            return
+        rows = {index.row() for index in self.job_table.selectedIndexes()}
+        for row in rows:
+            bv_id = self.job_table.item(row, 0).text()
+            getattr(self.batch_thread, action)(bv_id)
+
+    def update_job(self, bv_id, title, state, count, message):
+        """刷新任务所在行"""
+        if title:
+            self.set_cell(bv_id, 1, title)
+        self.set_cell(bv_id, 3, state)
+        self.set_cell(bv_id, 4, str(count))
+        self.set_cell(bv_id, 5, message)
+
+    def set_cell(self, bv_id, column, text):
+        if bv_id not in self.rows:
+            row = self.job_table.rowCount()
+            self.job_table.insertRow(row)
+            self.job_table.setItem(row, 0, QTableWidgetItem(bv_id))
+            self.rows[bv_id] = row
+        self.job_table.setItem(self.rows[bv_id], column, QTableWidgetItem(text))
@@ -1,6 +1,5 @@
 import os
 import json
-import requests
 from datetime import datetime
 import logging
 from PyQt5.QtCore import pyqtSignal, Qt
@@ -15,6 +14,7 @@ from qfluentwidgets import (
     )
 from QThread.Login_Thread import QrLoginThread
 from QThread.Login_with_credential_Thread import LoginWithCredentialQThread
+from Core.Transport import download
 
 logger = logging.getLogger(__name__)
 
@@ -117,9 +117,9 @@ class LoginWindow(QDialog):
         try:
             User = user.User(int(credential.dedeuserid), credential=credential)
             user_info = await User.get_user_info()
-            response = requests.get(user_info.get('face', ""))
-            if response.status_code == 200:
-                avatar_image = QImage.fromData(response.content)
+            content = download(user_info.get('face', ""))
+            if content:
+                avatar_image = QImage.fromData(content)
                 self.avatar_pixmap = QPixmap.fromImage(avatar_image)
                 self.avatar_widget.setPixmap(self.avatar_pixmap.scaled(100, 100, Qt.KeepAspectRatio))
             else:
@@ -9,6 +9,7 @@ from qfluentwidgets import (NavigationInterface, NavigationItemPosition, Message
 from qframelesswindow import FramelessWindow, TitleBar
 
 from .CommentCrawlTab import CommentCrawlTab
+from .CrawlQueueTab import CrawlQueueTab
 from .CommentSaveTab import CommentSaveTab
 from .LoginWindows import LoginWindow
 from .UserInfoPage import UserInfoPage
@@ -17,6 +18,9 @@ from .SettingsTab import SettingsTab
 
 sys.path.append("..")
 from QThread.Audio_Thread import AudioThread
+from QThread.Load_Settings import cfg, credential_pool_path
+from Core.Credential_Pool import get_shared_pool
+from Core.Transport import download
 
 logger = logging.getLogger(__name__)
 
@@ -90,12 +94,14 @@ class BilibiliCommentGUI(FramelessWindow):
             return
 
         self.crawl_tab = CommentCrawlTab()
+        self.queue_tab = CrawlQueueTab()
         self.save_tab = CommentSaveTab()
         self.user_info_page = UserInfoPage()
         self.analysis_tab = CommentAnalysisTab()
         self.settings_tab = SettingsTab()
 
         self.crawl_tab.setObjectName('crawl')
+        self.queue_tab.setObjectName('queue')
         self.save_tab.setObjectName('save')
         self.analysis_tab.setObjectName('analysis')
         self.settings_tab.setObjectName('settings')
@@ -113,6 +119,7 @@ class BilibiliCommentGUI(FramelessWindow):
 
     def initNavigation(self):
         self.addSubInterface(self.crawl_tab, FIF.DOWNLOAD, '爬取')
+        self.addSubInterface(self.queue_tab, FIF.LIBRARY, '批量')
         self.addSubInterface(self.save_tab, FIF.DOCUMENT, '结果')
         self.addSubInterface(self.analysis_tab, FIF.CHAT, '分析')
 
@@ -130,11 +137,10 @@ class BilibiliCommentGUI(FramelessWindow):
     def get_user_avatar_icon(self, avatar_url: str):
         """将用户头像转为 QIcon 用于导航"""
         try:
-            import requests
-            response = requests.get(avatar_url, timeout=10)
-            if response.status_code == 200:
+            content = download(avatar_url)
+            if content:
                 pixmap = QPixmap()
-                pixmap.loadFromData(response.content)
+                pixmap.loadFromData(content)
                 circular_pixmap = self.user_info_page.create_circular_pixmap(pixmap, 48)
                 return QIcon(circular_pixmap)
         except Exception as e:
@@ -202,6 +208,8 @@ class BilibiliCommentGUI(FramelessWindow):
     def connect_signals(self):
         """连接所有信号槽"""
         try:
+            self.crawl_tab.crawl_comments_started.connect(self.start_comments_stream)
+            self.crawl_tab.crawl_comments_batch.connect(self.save_tab.append_comments)
             self.crawl_tab.crawl_comments_finished.connect(self.set_comments_data)
             self.crawl_tab.crawl_comments_warning.connect(self.crawl_comments_warning)
             self.crawl_tab.crawl_comments_failed.connect(self.crawl_comments_failed)
@@ -209,11 +217,14 @@ class BilibiliCommentGUI(FramelessWindow):
             self.crawl_tab.fetch_info_requested_success.connect(self.fetch_info_requested_success)
             self.crawl_tab.fetch_info_requested_warning.connect(self.fetch_info_requested_warning)
 
+            self.queue_tab.queue_warning.connect(self.fetch_info_requested_warning)
+
             self.save_tab.save_warning.connect(self.save_warning)
             self.save_tab.save_success.connect(self.save_success)
             self.save_tab.save_failed.connect(self.save_failed)
 
             self.user_info_page.logout_signal.connect(self.handle_logout)
+            self.user_info_page.add_to_pool_signal.connect(self.add_credential_to_pool)
 
             self.analysis_tab.analysis_success.connect(self.analysis_success)
 
@@ -238,6 +249,7 @@ class BilibiliCommentGUI(FramelessWindow):
             self.user_credential = credential
             self.user_info = user_info
             self.crawl_tab.set_credential(credential)
+            self.queue_tab.set_credential(credential)
             self.user_info_page.update_user_info(self.user_info)
             InfoBar.success(
                 title='登录成功',
@@ -317,12 +329,14 @@ class BilibiliCommentGUI(FramelessWindow):
             )
         self.audio_thread.play_warning()
 
-    def crawl_comments_failed(self, comments, count, video_info, error):
+    def crawl_comments_failed(self, comments, count, video_info, error, seed=None, spool=None):
         '''爬取失败'''
+        # 增量爬取不写断点日志，无法从断点继续
+        resume_hint = '，再次爬取将从断点继续' if seed is None else ''
         if '412' in error:
             InfoBar.error(
                 title='爬取错误',
-                content=f'触发反爬机制，请降低请求频率或稍后再试,已爬取{count}条评论',
+                content=f'触发反爬机制，请降低请求频率或稍后再试,已爬取{count}条评论{resume_hint}',
                 orient=Qt.Horizontal,
                 isClosable=True,
                 position=InfoBarPosition.TOP_RIGHT,
@@ -332,15 +346,15 @@ class BilibiliCommentGUI(FramelessWindow):
         else:
             InfoBar.error(
                 title='爬取错误',
-                content=f'出现错误{error},已爬取{count}条评论',
+                content=f'出现错误{error},已爬取{count}条评论{resume_hint}',
                 orient=Qt.Horizontal,
                 isClosable=True,
                 position=InfoBarPosition.TOP_RIGHT,
                 duration=8000,
                 parent=self
                 )
-        if len(comments) != 0:
-            self.save_tab.display_comments(comments, video_info)
+        if count != 0:
+            self.save_tab.display_comments(comments, video_info, seed.comments if seed else None, spool=spool)
         self.audio_thread.play_error()
 
     def handle_logout(self):
@@ -365,10 +379,57 @@ class BilibiliCommentGUI(FramelessWindow):
         else:
             self.close()
 
-    def set_comments_data(self, comments, count, video_info):
-        """设置评论数据"""
+    def add_credential_to_pool(self):
+        """把当前登录的账号加入凭证池并保存"""
+        if not self.user_credential:
+            return
+        try:
+            pool = get_shared_pool(credential_pool_path, max_rate=cfg.get(cfg.max_request_rate),
+                                   min_rate=cfg.get(cfg.min_request_rate))
+            pool.add(self.user_credential, self.user_info.get("name") if self.user_info else None)
+            pool.save(credential_pool_path)
+            InfoBar.success(
+                title='已加入凭证池',
+                content=f'凭证池中共有 {len(pool)} 个账号，请在设置中开启"使用凭证池"',
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.TOP_RIGHT,
+                duration=4000,
+                parent=self
+                )
+        except Exception as e:
+            InfoBar.error(
+                title='加入凭证池失败',
+                content=str(e),
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.TOP_RIGHT,
+                duration=4000,
+                parent=self
+                )
+
+    def start_comments_stream(self, video_info, seed=None):
+        """开始爬取时清空结果页，准备接收分批推送的评论"""
+        self.save_tab.start_stream(video_info, seed.comments if seed else None)
+
+    def set_comments_data(self, comments, count, video_info, seed=None, failed_rpids=None, spool=None):
+        """设置评论数据，增量爬取时附带基准数据以便保存时合并，spool 为爬取时的落盘缓冲"""
         try:
-            self.save_tab.display_comments(comments, video_info)
+            self.save_tab.display_comments(comments, video_info, seed.comments if seed else None, failed_rpids,
+                                           spool)
+            if failed_rpids:
+                InfoBar.warning(
+                    title='爬取完成',
+                    content=f'共获取 {count} 条评论，{len(failed_rpids)} 个楼层的回复获取失败，'
+                            f'已记录在保存的文件中，可用增量爬取补全',
+                    orient=Qt.Horizontal,
+                    isClosable=True,
+                    position=InfoBarPosition.TOP_RIGHT,
+                    duration=8000,
+                    parent=self
+                    )
+                self.audio_thread.play_warning()
+                return
             InfoBar.success(
                 title='爬取完成',
                 content=f'共获取 {count} 条评论',
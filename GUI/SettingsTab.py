@@ -1,7 +1,7 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QFileDialog, QInputDialog, QSlider
 from qfluentwidgets import (
     ScrollArea, SettingCardGroup, PushSettingCard, RangeSettingCard, InfoBar, InfoBarPosition, HyperlinkCard,
-    OptionsSettingCard, PrimaryPushSettingCard, FluentIcon as FIF,
+    PrimaryPushSettingCard, SwitchSettingCard, FluentIcon as FIF,
     )
 from PyQt5.QtCore import Qt, pyqtSignal, QUrl, QStandardPaths
 from PyQt5.QtGui import QDesktopServices
@@ -42,6 +42,7 @@ class SettingsTab(ScrollArea):
         self.vbox.setContentsMargins(20, 0, 20, 20)
 
         self.__initCrawlSettings()
+        self.__initAnalysisSettings()
         self.__initAudioSettings()
         self.__initUpdateSettings()
 
@@ -60,65 +61,153 @@ class SettingsTab(ScrollArea):
             )
         self.commentFolderCard.clicked.connect(self.__onCommentFolderClicked)
 
-        self.mainLowerCard = PushSettingCard(
-            "主评论下限",
-            FIF.HISTORY,
-            "当前值",
-            str(cfg.get(cfg.main_comment_time_lowerlimit)),
+        self.maxRateCard = PushSettingCard(
+            "最高请求速率",
+            FIF.SPEED_HIGH,
+            "每秒请求数上限，所有爬取任务共享",
+            str(cfg.get(cfg.max_request_rate)),
             parent=crawlGroup
             )
-        self.mainLowerCard.clicked.connect(lambda: self.__onFloatValueClicked(
-            self.mainLowerCard, cfg.main_comment_time_lowerlimit, "主评论下限", 0.5, 3.0, 0.1
+        self.maxRateCard.clicked.connect(lambda: self.__onFloatValueClicked(
+            self.maxRateCard, cfg.max_request_rate, "最高请求速率", 0.5, 20.0, 0.1
             ))
 
-        self.mainUpperCard = PushSettingCard(
-            "主评论上限",
-            FIF.HISTORY,
-            "当前值",
-            str(cfg.get(cfg.main_comment_time_upperlimit)),
+        self.minRateCard = PushSettingCard(
+            "最低请求速率",
+            FIF.SPEED_OFF,
+            "触发限流后降速的下限",
+            str(cfg.get(cfg.min_request_rate)),
             parent=crawlGroup
             )
-        self.mainUpperCard.clicked.connect(lambda: self.__onFloatValueClicked(
-            self.mainUpperCard, cfg.main_comment_time_upperlimit, "主评论上限", 1.0, 5.0, 0.1
+        self.minRateCard.clicked.connect(lambda: self.__onFloatValueClicked(
+            self.minRateCard, cfg.min_request_rate, "最低请求速率", 0.1, 2.0, 0.1
             ))
 
-        self.subLowerCard = PushSettingCard(
-            "子评论下限",
-            FIF.HISTORY,
-            "当前值",
-            str(cfg.get(cfg.sub_comment_time_lowerlimit)),
+        self.concurrencyCard = MyRangeSettingCard(
+            cfg.concurrency,
+            FIF.CHAT,
+            "并发请求数",
+            "主评论与子评论请求共享的最大并发数",
+            parent=crawlGroup
+            )
+        self.concurrencyCard.releaseChanged.connect(self.settings_saved)
+
+        self.maxActiveJobsCard = MyRangeSettingCard(
+            cfg.max_active_jobs,
+            FIF.LIBRARY,
+            "批量爬取同时进行的视频数",
+            "同时处于爬取阶段的视频越多，占用内存越大",
+            parent=crawlGroup
+            )
+        self.maxActiveJobsCard.releaseChanged.connect(self.settings_saved)
+
+        self.batchSizeCard = MyRangeSettingCard(
+            cfg.stream_batch_size,
+            FIF.SEND,
+            "结果推送批量",
+            "爬取过程中每攒够多少条评论推送到结果页",
+            parent=crawlGroup
+            )
+        self.batchSizeCard.releaseChanged.connect(self.settings_saved)
+
+        self.batchIntervalCard = PushSettingCard(
+            "结果推送间隔",
+            FIF.STOP_WATCH,
+            "未攒够一批时最长等待秒数",
+            str(cfg.get(cfg.stream_interval)),
             parent=crawlGroup
             )
-        self.subLowerCard.clicked.connect(lambda: self.__onFloatValueClicked(
-            self.subLowerCard, cfg.sub_comment_time_lowerlimit, "子评论下限", 0.5, 3.0, 0.1
+        self.batchIntervalCard.clicked.connect(lambda: self.__onFloatValueClicked(
+            self.batchIntervalCard, cfg.stream_interval, "结果推送间隔", 0.2, 10.0, 0.1
             ))
 
-        self.subUpperCard = PushSettingCard(
-            "子评论上限",
+        self.credentialPoolCard = SwitchSettingCard(
+            FIF.PEOPLE,
+            "使用凭证池",
+            "在用户信息页把多个账号加入凭证池，请求会分摊到各账号，被限流的账号自动冷却",
+            cfg.use_credential_pool,
+            crawlGroup
+            )
+        self.credentialPoolCard.checkedChanged.connect(self.settings_saved)
+
+        self.keepRawCard = SwitchSettingCard(
+            FIF.CODE,
+            "保留原始评论数据",
+            "默认只保留保存与分析需要的字段，开启后内存占用会成倍增加",
+            cfg.keep_raw_comments,
+            crawlGroup
+            )
+        self.keepRawCard.checkedChanged.connect(self.settings_saved)
+
+        self.responseCacheCard = SwitchSettingCard(
             FIF.HISTORY,
-            "当前值",
-            str(cfg.get(cfg.sub_comment_time_upperlimit)),
+            "缓存接口响应",
+            "有效期内重复爬取同一视频时直接从磁盘读取，不再访问网络（增量爬取不使用缓存）",
+            cfg.use_response_cache,
+            crawlGroup
+            )
+        self.responseCacheCard.checkedChanged.connect(self.settings_saved)
+
+        self.cacheTtlCard = MyRangeSettingCard(
+            cfg.cache_ttl_hours,
+            FIF.DATE_TIME,
+            "缓存有效期(小时)",
+            "超过有效期的缓存会重新请求",
             parent=crawlGroup
             )
-        self.subUpperCard.clicked.connect(lambda: self.__onFloatValueClicked(
-            self.subUpperCard, cfg.sub_comment_time_upperlimit, "子评论上限", 1.0, 5.0, 0.1
-            ))
+        self.cacheTtlCard.releaseChanged.connect(self.settings_saved)
 
-        self.executorCard = OptionsSettingCard(
-            cfg.executor,
-            FIF.CHAT,
-            "执行器线程数",
-            "设置并行爬取线程数",
-            texts=[str(i) for i in [1, 2, 3, 4, 5, 6]],
+        self.cacheSizeCard = MyRangeSettingCard(
+            cfg.cache_size_mb,
+            FIF.SAVE,
+            "缓存大小上限(MB)",
+            "超出上限时淘汰最久未使用的缓存",
             parent=crawlGroup
             )
+        self.cacheSizeCard.releaseChanged.connect(self.settings_saved)
+
+        self.memoryLimitCard = MyRangeSettingCard(
+            cfg.memory_comment_limit,
+            FIF.DOWNLOAD,
+            "内存中保留的评论数",
+            "评论边爬边写入磁盘，超出的部分只保存在磁盘上，保存时从磁盘读取",
+            parent=crawlGroup
+            )
+        self.memoryLimitCard.releaseChanged.connect(self.settings_saved)
+
+        self.commentStoreCard = SwitchSettingCard(
+            FIF.LIBRARY,
+            "写入评论库",
+            "爬取时同时写入 data/comments.db，重复与增量爬取直接合并，分析页可按条件查询",
+            cfg.use_comment_store,
+            crawlGroup
+            )
+        self.commentStoreCard.checkedChanged.connect(self.settings_saved)
+
+        self.columnarCopyCard = SwitchSettingCard(
+            FIF.SAVE_COPY,
+            "同时保存列式数据集",
+            "保存为 JSON / NDJSON 时，在同一目录另存一份同名的 .cols 文件，供分析时快速读取",
+            cfg.save_columnar_copy,
+            crawlGroup
+            )
+        self.columnarCopyCard.checkedChanged.connect(self.settings_saved)
 
         crawlGroup.addSettingCard(self.commentFolderCard)
-        crawlGroup.addSettingCard(self.mainLowerCard)
-        crawlGroup.addSettingCard(self.mainUpperCard)
-        crawlGroup.addSettingCard(self.subLowerCard)
-        crawlGroup.addSettingCard(self.subUpperCard)
-        crawlGroup.addSettingCard(self.executorCard)
+        crawlGroup.addSettingCard(self.maxRateCard)
+        crawlGroup.addSettingCard(self.minRateCard)
+        crawlGroup.addSettingCard(self.concurrencyCard)
+        crawlGroup.addSettingCard(self.maxActiveJobsCard)
+        crawlGroup.addSettingCard(self.batchSizeCard)
+        crawlGroup.addSettingCard(self.batchIntervalCard)
+        crawlGroup.addSettingCard(self.credentialPoolCard)
+        crawlGroup.addSettingCard(self.keepRawCard)
+        crawlGroup.addSettingCard(self.responseCacheCard)
+        crawlGroup.addSettingCard(self.cacheTtlCard)
+        crawlGroup.addSettingCard(self.cacheSizeCard)
+        crawlGroup.addSettingCard(self.memoryLimitCard)
+        crawlGroup.addSettingCard(self.commentStoreCard)
+        crawlGroup.addSettingCard(self.columnarCopyCard)
 
         self.vbox.addWidget(crawlGroup)
 
@@ -152,6 +241,25 @@ class SettingsTab(ScrollArea):
             self.commentFolderCard.setContent(folder)
             self.settings_saved()
 
+    # -----------------------------
+    # 分析相关设置
+    # -----------------------------
+    def __initAnalysisSettings(self):
+        analysisGroup = SettingCardGroup("分析设置", self.scrollWidget)
+
+        self.analysisWorkersCard = MyRangeSettingCard(
+            cfg.analysis_workers,
+            FIF.SPEED_HIGH,
+            "分析进程数",
+            "评论较多时分词和情感分析分给多个进程并行，0 表示使用全部 CPU 核心",
+            parent=analysisGroup
+            )
+        self.analysisWorkersCard.releaseChanged.connect(self.settings_saved)
+
+        analysisGroup.addSettingCard(self.analysisWorkersCard)
+
+        self.vbox.addWidget(analysisGroup)
+
     # -----------------------------
     # 音频播放器设置
     # -----------------------------
@@ -2,8 +2,12 @@ from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton
 from PyQt5.QtCore import Qt, QRectF, pyqtSignal
 from PyQt5.QtGui import QPainter, QPainterPath, QPixmap
 from qfluentwidgets import BodyLabel, TitleLabel, CardWidget
-import logging, requests
+import logging
 import os
+import sys
+
+sys.path.append("..")
+from Core.Transport import download
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +16,7 @@ class UserInfoPage(QWidget):
     """用户信息展示页"""
 
     logout_signal = pyqtSignal()
+    add_to_pool_signal = pyqtSignal()
 
     def __init__(self):
         super().__init__()
@@ -62,6 +67,11 @@ class UserInfoPage(QWidget):
         self.logout_btn.clicked.connect(self.logout)
         layout.addWidget(self.logout_btn, 0, Qt.AlignCenter)
 
+        self.add_to_pool_btn = QPushButton("加入凭证池")
+        self.add_to_pool_btn.setFixedWidth(120)
+        self.add_to_pool_btn.clicked.connect(self.add_to_pool_signal.emit)
+        layout.addWidget(self.add_to_pool_btn, 0, Qt.AlignCenter)
+
         layout.addStretch()
 
     def update_user_info(self, user_info):
@@ -94,10 +104,10 @@ ID: {user_id}
 
     def load_avatar(self, avatar_url):
         try:
-            response = requests.get(avatar_url, timeout=10)
-            if response.status_code == 200:
+            content = download(avatar_url)
+            if content:
                 pixmap = QPixmap()
-                pixmap.loadFromData(response.content)
+                pixmap.loadFromData(content)
                 circular_pixmap = self.create_circular_pixmap(pixmap, 100)
                 self.avatar_label.setPixmap(circular_pixmap)
                 self.avatar_label.setText("")
@@ -1,6 +1,7 @@
 # gui/__init__.py
 from .MainWindows import BilibiliCommentGUI
 from .CommentCrawlTab import CommentCrawlTab
+from .CrawlQueueTab import CrawlQueueTab
 from .CommentSaveTab import CommentSaveTab
 from .LoginWindows import LoginWindow
 from .UserInfoPage import  UserInfoPage
@@ -10,6 +11,7 @@ from .SettingsTab import SettingsTab
 __all__ = [
     'BilibiliCommentGUI',
     'CommentCrawlTab',
+    'CrawlQueueTab',
     'CommentSaveTab',
     'LoginWindow',
     'UserInfoPage',
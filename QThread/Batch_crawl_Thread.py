@@ -0,0 +1,76 @@
+import asyncio
+import os
+from PyQt5.QtCore import QThread, pyqtSignal
+from .Load_Settings import cfg, credential_pool_path, open_response_cache
+from Core.Bili_Api import BiliCommentApi
+from Core.Columnar_Dataset import save_columnar, columnar_filename
+from Core.Comment_Dataset import process_comments, build_data_structure, save_dataset, dataset_filename, \
+    iter_dataset_records
+from Core.Credential_Pool import get_shared_pool
+from Core.Crawl_Scheduler import CrawlScheduler
+from Core.Rate_Limiter import configure_shared_limiter
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+journal_dir = os.path.join(script_dir, '../cache/journal')
+
+
+class BatchCrawlThread(QThread):
+    """批量爬取线程，运行多视频调度器，任务完成后自动保存到评论保存目录"""
+    job_updated = pyqtSignal(str, str, str, int, str)
+
+    def __init__(self, credential):
+        super().__init__()
+        limiter = configure_shared_limiter(max_rate=cfg.get(cfg.max_request_rate),
+                                           min_rate=cfg.get(cfg.min_request_rate))
+        pool = None
+        if cfg.get(cfg.use_credential_pool):
+            pool = get_shared_pool(credential_pool_path, max_rate=cfg.get(cfg.max_request_rate),
+                                   min_rate=cfg.get(cfg.min_request_rate))
+            pool.add(credential)
+        self.scheduler = CrawlScheduler(
+            BiliCommentApi(credential),
+            concurrency=cfg.get(cfg.concurrency),
+            max_active_jobs=cfg.get(cfg.max_active_jobs),
+            limiter=limiter,
+            pool=pool,
+            cache=open_response_cache(),
+            journal_dir=journal_dir,
+            on_update=self.on_job_update,
+            on_finished=self.save_job
+            )
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self.scheduler.run())
+        finally:
+            loop.close()
+
+    def add_job(self, bv_id, priority=0):
+        self.scheduler.add_job(bv_id, priority)
+
+    def pause_job(self, bv_id):
+        self.scheduler.pause(bv_id)
+
+    def resume_job(self, bv_id):
+        self.scheduler.resume(bv_id)
+
+    def cancel_job(self, bv_id):
+        self.scheduler.cancel(bv_id)
+
+    def on_job_update(self, job):
+        title = job.video_info.get('title', '') if job.video_info else ''
+        self.job_updated.emit(job.bv_id, title, job.state, job.count, job.message)
+
+    def save_job(self, job, comments):
+        """在线程池中执行：整理并保存一个已完成任务的评论"""
+        save_dir = cfg.get(cfg.save_commentFolder) or os.getcwd()
+        filename = dataset_filename(save_dir, job.video_info)
+        processed_comments = process_comments(comments, job.seed.comments if job.seed else None,
+                                              failed_rpids=job.failed_rpids)
+        save_dataset(build_data_structure(processed_comments, job.video_info, job.failed_rpids), filename)
+        if cfg.get(cfg.save_columnar_copy):
+            save_columnar(iter_dataset_records(processed_comments), columnar_filename(filename), job.video_info,
+                          job.failed_rpids)
+        return filename
@@ -1,82 +1,119 @@
+import asyncio
+import os
 from PyQt5.QtCore import QThread, pyqtSignal
-from bilibili_api import sync, video, comment
-from time import sleep
-import random
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from .Load_Settings import cfg
+from .Load_Settings import cfg, credential_pool_path, open_response_cache, spool_dir, comment_store_path
+from Core.Bili_Api import BiliCommentApi
+from Core.Comment_Spool import CommentSpool
+from Core.Comment_Store import CommentStore
+from Core.Comment_Stream import CommentBatcher
+from Core.Crawl_Engine import CrawlEngine
+from Core.Crawl_Journal import CrawlJournal
+from Core.Credential_Pool import get_shared_pool
+from Core.Rate_Limiter import configure_shared_limiter
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+journal_dir = os.path.join(script_dir, '../cache/journal')
 
 
 class CommentCrawlerThread(QThread):
-    """评论爬取线程"""
+    """评论爬取线程，评论边爬边写入落盘缓冲 spool，信号中的列表只是内存中保留的部分"""
     progress_update = pyqtSignal(int, int, str)
-    finished = pyqtSignal(list, int, dict, bool)
+    comments_batch = pyqtSignal(list)
+    finished = pyqtSignal(list, int, dict, list)
     error_occurred = pyqtSignal(list, int, dict, str)
 
-    def __init__(self, credential, bv_id):
+    def __init__(self, credential, bv_id, seed=None):
         super().__init__()
         self.credential = credential
         self.bv_id = bv_id
+        self.seed = seed
         self.comments = []
-        v = video.Video(bvid=self.bv_id, credential=self.credential)
-        self.video_info = sync(v.get_info())
+        self.spool = None
+        self._loop = None
+        self._task = None
+        self._stopped = False
+        self.video_info = {}
+
     def run(self):
+        # 整个爬取过程只使用这一个事件循环
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        api = BiliCommentApi(self.credential)
         try:
-            aid = self.video_info['aid']
-            total_comments = self.video_info.get('stat', {}).get('reply', 0)
-
-            sub_tasks = []
-            page = 1
-
-            self.progress_update.emit(0, total_comments, f"开始爬取视频: {self.video_info['title']}")
-
-            while True:
-                c = sync(comment.get_comments(aid, comment.CommentResourceType.VIDEO,
-                                              page, credential=self.credential))
-                replies = c.get('replies', [])
-                if not replies:
-                    break
-
-                for cmt in replies:
-                    self.comments.append(cmt)
-                    if cmt.get("rcount", 0) > 0:
-                        sub_tasks.append(cmt['rpid'])
-
-                self.progress_update.emit(len(self.comments), total_comments,
-                                          f"已爬取 {len(self.comments)}/{total_comments} 条评论(主评论)")
-
-                page += 1
-                sleep(random.uniform(cfg.get(cfg.main_comment_time_lowerlimit),
-                                     cfg.get(cfg.main_comment_time_upperlimit)))
-
-            def fetch_sub_comments(rpid):
-                sub_cmt = comment.Comment(
-                    oid=aid, rpid=rpid,
-                    type_=comment.CommentResourceType.VIDEO,
-                    credential=self.credential
-                    )
-                all_subs = []
-                sub_index = 1
-                while True:
-                    sub_c = sync(sub_cmt.get_sub_comments(sub_index, 20))
-                    sub_replies = sub_c.get('replies', [])
-                    if not sub_replies:
-                        break
-                    all_subs.extend(sub_replies)
-                    sub_index += 1
-                    sleep(random.uniform(cfg.get(cfg.sub_comment_time_lowerlimit),
-                                         cfg.get(cfg.sub_comment_time_upperlimit)))
-                return all_subs
-
-            with ThreadPoolExecutor(max_workers=cfg.get(cfg.executor)) as executor:
-                futures = [executor.submit(fetch_sub_comments, rid) for rid in sub_tasks]
-                for future in as_completed(futures):
-                    sub_replies = future.result()
-                    self.comments.extend(sub_replies)
-                    self.progress_update.emit(len(self.comments), total_comments,
-                                              f"已爬取 {len(self.comments)} 条评论(含子评论)")
-
-            self.finished.emit(self.comments, len(self.comments), self.video_info, True)
-
+            # 爬取页获取过的视频信息在缓存中，这里一般不会再发请求
+            self.video_info = self._loop.run_until_complete(api.get_video_info(self.bv_id))
         except Exception as e:
-            self.error_occurred.emit(self.comments, len(self.comments), self.video_info, str(e))
+            self._loop.close()
+            self.error_occurred.emit([], 0, {}, f"获取视频信息失败: {e}")
             return
+
+        limiter = configure_shared_limiter(max_rate=cfg.get(cfg.max_request_rate),
+                                           min_rate=cfg.get(cfg.min_request_rate))
+        # 增量爬取请求很少，不需要断点日志
+        journal = CrawlJournal.for_video(journal_dir, self.video_info['aid']) if self.seed is None else None
+        batcher = CommentBatcher(cfg.get(cfg.stream_batch_size), cfg.get(cfg.stream_interval))
+        batcher.add_consumer(self.comments_batch.emit)
+        self.spool = batcher.add_consumer(
+            CommentSpool.for_video(spool_dir, self.video_info['aid'], memory_limit=cfg.get(cfg.memory_comment_limit))
+            )
+        store = None
+        if cfg.get(cfg.use_comment_store):
+            # 边爬边写入评论库，增量爬取的结果直接合并到库中已有的数据上
+            store = CommentStore(comment_store_path)
+            store.upsert_video(self.video_info)
+            run_id = store.begin_run(self.video_info['aid'], 'full' if self.seed is None else 'incremental')
+            batcher.add_consumer(store.sink(self.video_info['aid'], run_id))
+        pool = None
+        if cfg.get(cfg.use_credential_pool):
+            pool = get_shared_pool(credential_pool_path, max_rate=cfg.get(cfg.max_request_rate),
+                                   min_rate=cfg.get(cfg.min_request_rate))
+            pool.add(self.credential)
+        engine = CrawlEngine(
+            api, self.video_info,
+            concurrency=cfg.get(cfg.concurrency),
+            limiter=limiter,
+            pool=pool,
+            # 增量爬取需要最新的数据，不读缓存
+            cache=open_response_cache() if self.seed is None else None,
+            journal=journal,
+            seed=self.seed,
+            batcher=batcher,
+            keep_comments=False,
+            keep_raw=cfg.get(cfg.keep_raw_comments),
+            progress_callback=self.progress_update.emit
+            )
+        try:
+            self._task = self._loop.create_task(engine.run())
+            if self._stopped:
+                self._task.cancel()
+            self._loop.run_until_complete(self._task)
+            if journal:
+                journal.discard()
+            if store:
+                store.finish_run(run_id, len(self.spool), engine.failed_rpids)
+            self.comments = self.spool.preview
+            self.finished.emit(self.comments, len(self.spool), self.video_info, list(engine.failed_rpids))
+        except asyncio.CancelledError:
+            if journal:
+                journal.close()
+            self.comments = self.spool.preview
+            self.error_occurred.emit(self.comments, len(self.spool), self.video_info, "爬取已取消")
+        except Exception as e:
+            if journal:
+                journal.close()
+            self.comments = self.spool.preview
+            self.error_occurred.emit(self.comments, len(self.spool), self.video_info, str(e))
+        finally:
+            if store:
+                store.close()
+            self._loop.close()
+
+    def stop(self):
+        """取消爬取，已完成的部分保留在断点日志中，下次爬取同一视频时继续"""
+        self._stopped = True
+        if self._task is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                # 事件循环已经关闭，爬取已经结束
+                pass
@@ -1,6 +1,6 @@
 import os
 from qfluentwidgets import (
-    qconfig, QConfig, ConfigItem, OptionsConfigItem, OptionsValidator, RangeConfigItem, RangeValidator, FolderValidator
+    qconfig, QConfig, ConfigItem, BoolValidator, RangeConfigItem, RangeValidator, FolderValidator
     )
 
 
@@ -12,11 +12,24 @@ class Config(QConfig):
     # ------------------------------
     save_commentFolder = ConfigItem(
         "Crawl", "Save_path", "", FolderValidator())
-    main_comment_time_upperlimit = RangeConfigItem("Crawl", "Main_Time_UpperLimit", 1.5, RangeValidator(1, 5))
-    main_comment_time_lowerlimit = RangeConfigItem("Crawl", "Main_Time_LowerLimit", 0.8, RangeValidator(0.5, 3))
-    sub_comment_time_upperlimit = RangeConfigItem("Crawl", "Sub_Time_UpperLimit", 1.5, RangeValidator(1, 5))
-    sub_comment_time_lowerlimit = RangeConfigItem("Crawl", "Sub_Time_LowerLimit", 0.8, RangeValidator(0.5, 3))
-    executor = OptionsConfigItem("Crawl", "Executor", 4, OptionsValidator([1, 2, 3, 4, 5, 6]))
+    max_request_rate = RangeConfigItem("Crawl", "Max_Rate", 4.0, RangeValidator(0.5, 20))
+    min_request_rate = RangeConfigItem("Crawl", "Min_Rate", 0.2, RangeValidator(0.1, 2))
+    concurrency = RangeConfigItem("Crawl", "Concurrency", 8, RangeValidator(1, 32))
+    max_active_jobs = RangeConfigItem("Crawl", "Max_Active_Jobs", 2, RangeValidator(1, 8))
+    stream_batch_size = RangeConfigItem("Crawl", "Batch_Size", 200, RangeValidator(20, 2000))
+    stream_interval = RangeConfigItem("Crawl", "Batch_Interval", 1.0, RangeValidator(0.2, 10))
+    use_credential_pool = ConfigItem("Crawl", "Use_Credential_Pool", False, BoolValidator())
+    keep_raw_comments = ConfigItem("Crawl", "Keep_Raw", False, BoolValidator())
+    use_response_cache = ConfigItem("Crawl", "Use_Response_Cache", False, BoolValidator())
+    cache_ttl_hours = RangeConfigItem("Crawl", "Cache_TTL_Hours", 24, RangeValidator(1, 720))
+    cache_size_mb = RangeConfigItem("Crawl", "Cache_Size_MB", 512, RangeValidator(64, 8192))
+    memory_comment_limit = RangeConfigItem("Crawl", "Memory_Limit", 20000, RangeValidator(1000, 500000))
+    use_comment_store = ConfigItem("Crawl", "Use_Comment_Store", False, BoolValidator())
+    save_columnar_copy = ConfigItem("Crawl", "Save_Columnar_Copy", False, BoolValidator())
+    # ------------------------------
+    # 分析相关配置
+    # ------------------------------
+    analysis_workers = RangeConfigItem("Analysis", "Workers", 0, RangeValidator(0, 64))
     # ------------------------------
     # 音频播放器相关配置
     # ------------------------------
@@ -36,6 +49,18 @@ path = os.path.join(script_dir, '../config/config.json')
 cfg = Config()
 qconfig.load(path, cfg)
 
+# 多账号凭证池文件、响应缓存目录、评论落盘目录、评论库与命令行共用
+from Core.Settings import credential_pool_path, response_cache_dir, spool_dir, comment_store_path
+
+
+def open_response_cache():
+    """按设置打开响应缓存（各次爬取共用同一个），未开启时返回 None"""
+    if not cfg.get(cfg.use_response_cache):
+        return None
+    from Core.Response_Cache import get_shared_cache
+    return get_shared_cache(response_cache_dir, ttl=cfg.get(cfg.cache_ttl_hours) * 3600,
+                            max_bytes=cfg.get(cfg.cache_size_mb) * 1024 * 1024)
+
 if __name__ == '__main__':
     simple_cfg = Config()
     simple_cfg.save()
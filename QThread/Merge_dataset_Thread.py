@@ -0,0 +1,25 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+import logging
+from Core.Dataset_Merge import merge_datasets
+
+logger = logging.getLogger(__name__)
+
+
+class MergeDatasetThread(QThread):
+    """合并同一视频的多个数据集文件，按 rpid 去重后保存到 output"""
+
+    progress = pyqtSignal(int, int, str)
+    finished = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+
+    def __init__(self, paths, output):
+        super().__init__()
+        self.paths = paths
+        self.output = output
+
+    def run(self):
+        try:
+            self.finished.emit(merge_datasets(self.paths, self.output, self.progress.emit))
+        except Exception as e:
+            logger.error(f"合并失败: {e}")
+            self.failed.emit(str(e))
@@ -1,33 +1,54 @@
-import json
-from datetime import datetime
 from PyQt5.QtCore import QThread, pyqtSignal
 import logging
-from typing import Dict
+from Core.Comment_Dataset import process_comments, build_data_structure, save_dataset, save_records, \
+    iter_dataset_records, dataset_format
+from Core.Columnar_Dataset import save_columnar, columnar_filename
+from Core.Comment_Spool import CommentSpool
 
 logger = logging.getLogger(__name__)
 
 
 class SaveCommentThread(QThread):
-    """保存评论数据的线程类"""
+    """
+    保存评论数据的线程类，comments 可以是评论列表或爬取时的落盘缓冲 CommentSpool
+
+    文件名以 .jsonl 结尾时保存为 NDJSON（每行一条评论记录），以 .cols 结尾时保存为列式数据集，否则保存为 JSON 数据集。
+    JSON 与 NDJSON 再加 .gz / .zst 扩展名时压缩保存，压缩在后台线程进行。
+    columnar_copy=True 时另存一份同名的列式数据集。
+    """
 
     save_progress = pyqtSignal(int, int, str)
     save_finished = pyqtSignal(str, bool)
     save_error = pyqtSignal(str)
 
-    def __init__(self, comments, video_info, filename):
+    def __init__(self, comments, video_info, filename, base_comments=None, failed_rpids=None, columnar_copy=False):
         super().__init__()
         self.comments = comments
         self.video_info = video_info
         self.filename = filename
+        self.base_comments = base_comments
+        self.failed_rpids = failed_rpids
+        self.columnar_copy = columnar_copy
         self.is_running = True
 
     def run(self):
         """线程运行函数"""
         try:
-            if not self.comments:
+            if not self.comments and not self.base_comments:
                 self.save_error.emit("没有评论数据可保存")
                 return
 
+            file_format = dataset_format(self.filename)
+            if file_format != 'json':
+                success = self.save_records() if file_format == 'jsonl' else self.save_columnar()
+                if success and file_format == 'jsonl' and self.columnar_copy:
+                    success = self.save_columnar(columnar_filename(self.filename))
+                if success:
+                    self.save_finished.emit(self.filename, True)
+                else:
+                    self.save_finished.emit("", False)
+                return
+
             total_steps = 3
             current_step = 0
 
@@ -48,6 +69,8 @@ class SaveCommentThread(QThread):
             current_step += 1
             self.save_progress.emit(current_step, total_steps, "正在保存文件...")
             success = self.save_to_file(data_to_save)
+            if success and self.columnar_copy:
+                success = self.save_columnar(columnar_filename(self.filename))
 
             if success:
                 self.save_finished.emit(self.filename, True)
@@ -61,57 +84,53 @@ class SaveCommentThread(QThread):
             self.save_finished.emit("", False)
 
     def process_comments(self):
-        """处理评论数据"""
-        processed_comments = {}
-        children_map = {}
-        total_comments=len(self.comments)
-        i = 1
-        for cmt in self.comments:
-            is_sub_reply = (cmt['parent'] != 0)
-            if not is_sub_reply:
-                processed_cmt = extract_comment_info(cmt, is_sub_reply=False)
-                processed_cmt['replies'] = []
-                processed_comments[cmt['rpid']] = processed_cmt
-            else:
-                processed_reply = extract_comment_info(cmt, is_sub_reply=True)
-                children_map.setdefault(cmt['parent'], []).append(processed_reply)
-            i+=1
-            if i % 100 == 0:
-                progress_msg = f"已分流{i}/{total_comments} 条评论"
-                self.save_progress.emit(1, 3, progress_msg)
-        i=0
-        for parent_id, replies in children_map.items():
-            if parent_id in processed_comments:
-                processed_comments[parent_id]['replies'].extend(replies)
-            if i % 100 == 0:
-                progress_msg = f"已处理{i}/{total_comments} 条子评论"
-                self.save_progress.emit(1, 3, progress_msg)
-
-        return processed_comments
+        """处理评论数据，增量爬取时合并到基准数据上"""
+        return process_comments(self.comments, self.base_comments, self.save_progress.emit, self.failed_rpids)
 
     def build_data_structure(self, processed_comments):
         """构建完整的数据结构"""
-        return {
-            "metadata": {
-                "video_info": {
-                    "aid": self.video_info.get('aid'),
-                    "bvid": self.video_info.get('bvid'),
-                    "title": self.video_info.get('title'),
-                    "author": self.video_info.get('owner', {}).get('name'),
-                    "crawl_time": datetime.now().isoformat()
-                    },
-                "main_comment_count": len(processed_comments),
-                "total_comments": self.video_info.get('stat', {}).get('reply', 0),
-                "save_time": datetime.now().isoformat()
-                },
-            "comments": processed_comments
-            }
+        return build_data_structure(processed_comments, self.video_info, self.failed_rpids)
 
     def save_to_file(self, data):
         """保存数据到文件"""
         try:
-            with open(self.filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            save_dataset(data, self.filename, self.save_progress.emit)
+            return True
+        except Exception as e:
+            error_msg = f"文件保存失败: {str(e)}"
+            self.save_error.emit(error_msg)
+            return False
+
+    def save_records(self):
+        """保存为 NDJSON；没有基准数据时直接写出评论记录，落盘缓冲只需改名"""
+        try:
+            if self.base_comments is None:
+                if isinstance(self.comments, CommentSpool):
+                    self.save_progress.emit(1, 1, "正在保存文件...")
+                    self.comments.finalize(self.filename, self.video_info, self.failed_rpids)
+                else:
+                    save_records(self.comments, self.filename, self.video_info, self.failed_rpids,
+                                 progress_callback=self.save_progress.emit)
+                return True
+            processed_comments = self.process_comments()
+            total = len(processed_comments) + sum(len(value['replies']) for value in processed_comments.values())
+            save_records(iter_dataset_records(processed_comments), self.filename, self.video_info, self.failed_rpids,
+                         total=total, progress_callback=self.save_progress.emit)
+            return True
+        except Exception as e:
+            error_msg = f"文件保存失败: {str(e)}"
+            self.save_error.emit(error_msg)
+            return False
+
+    def save_columnar(self, filename=None):
+        """保存为列式数据集（默认保存到 self.filename），增量爬取时先合并到基准数据上"""
+        try:
+            records = self.comments
+            if self.base_comments is not None:
+                records = iter_dataset_records(self.process_comments())
+            self.save_progress.emit(1, 2, "正在写入列式数据集...")
+            save_columnar(records, filename or self.filename, self.video_info, self.failed_rpids)
+            self.save_progress.emit(2, 2, "保存完成")
             return True
         except Exception as e:
             error_msg = f"文件保存失败: {str(e)}"
@@ -122,26 +141,3 @@ class SaveCommentThread(QThread):
         """停止线程"""
         self.is_running = False
 
-
-def extract_comment_info(comment_data: Dict, is_sub_reply) -> Dict:
-    """
-
-    从评论数据中提取所需信息
-
-    Args:
-        comment_data: 原始评论数据
-
-    Returns:
-        提取后的评论信息
-    """
-    return {
-        "rpid": comment_data.get('rpid', 0),
-        "user_id": comment_data.get('member', {}).get('mid', 0),
-        "uname": comment_data.get('member', {}).get('uname', '未知用户'),
-        "message": comment_data.get('content', {}).get('message', ''),
-        "time": datetime.fromtimestamp(comment_data.get('ctime', 0)).isoformat(),
-        "sex": comment_data.get('member', {}).get('sex', ''),
-        "Ip": comment_data.get('reply_control', {}).get('location', ''),
-        "like": comment_data.get('like', 0),
-        "is_sub_reply": is_sub_reply
-        }
\ No newline at end of file
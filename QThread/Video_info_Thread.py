@@ -0,0 +1,25 @@
+import asyncio
+from PyQt5.QtCore import QThread, pyqtSignal
+from Core.Bili_Api import BiliCommentApi
+
+
+class VideoInfoThread(QThread):
+    """获取视频信息的线程，结果进入共用的视频信息缓存，开始爬取时不再重复请求"""
+    info_fetched = pyqtSignal(str, dict)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, credential, bv_id):
+        super().__init__()
+        self.credential = credential
+        self.bv_id = bv_id
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            video_info = loop.run_until_complete(BiliCommentApi(self.credential).get_video_info(self.bv_id))
+            self.info_fetched.emit(self.bv_id, video_info)
+        except Exception as e:
+            self.error_occurred.emit(str(e))
+        finally:
+            loop.close()
@@ -2,10 +2,14 @@
 from .Save_comment_Thread import SaveCommentThread
 from .Login_Thread import QrLoginThread
 from .Get_comment_Thread import CommentCrawlerThread
+from .Batch_crawl_Thread import BatchCrawlThread
+from .Video_info_Thread import VideoInfoThread
 from .Login_with_credential_Thread import LoginWithCredentialQThread
 from .Audio_Thread import AudioThread
 from .Data_analysis_Thread import AnalysisThread
+from .Merge_dataset_Thread import MergeDatasetThread
 from .Load_Settings import Config
 
-__all__ = ['SaveCommentThread', 'QrLoginThread', 'CommentCrawlerThread', 'LoginWithCredentialQThread', 'AudioThread',
-           'AnalysisThread','Config']
+__all__ = ['SaveCommentThread', 'QrLoginThread', 'CommentCrawlerThread', 'BatchCrawlThread', 'VideoInfoThread',
+           'LoginWithCredentialQThread', 'AudioThread', 'AnalysisThread','Config',
+           'MergeDatasetThread']
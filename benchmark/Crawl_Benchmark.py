@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from Core.Crawl_Engine import CrawlEngine
+from Core.Rate_Limiter import AdaptiveRateLimiter
+from Core.Response_Cache import ResponseCache
+from benchmark.Mock_Api import MockCommentApi
+from benchmark.Mock_Server import MockBiliServer, MockVideo
+
+
+def peak_rss_mb():
+    """进程内存峰值(MB)，无法获取时返回 None"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS 单位为字节，Linux 为 KB
+        return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 1024 / 1024
+    except ImportError:
+        return None
+
+
+async def crawl(api, bv_id, concurrency, limiter, keep_comments, cache):
+    try:
+        video_info = await api.get_video_info(bv_id)
+        engine = CrawlEngine(api, video_info, concurrency=concurrency, limiter=limiter, cache=cache,
+                             keep_comments=keep_comments)
+        await engine.run()
+        return engine.count
+    finally:
+        await api.close()
+
+
+def run_benchmark(roots=2000, fanout=30, reply_every=5, latency=0.02, throttle_rate=0.0,
+                  concurrency=8, max_rate=1000.0, keep_comments=True, cache_dir=None):
+    """在本地模拟接口上完整爬取一次，返回各项指标"""
+    video = MockVideo(roots, fanout, reply_every)
+    limiter = AdaptiveRateLimiter(max_rate=max_rate, min_rate=min(1.0, max_rate), initial_rate=max_rate,
+                                  burst=concurrency)
+    cache = ResponseCache(cache_dir) if cache_dir else None
+    with MockBiliServer(video, latency=latency, throttle_rate=throttle_rate) as server:
+        api = MockCommentApi(server.base_url, connection_limit=concurrency)
+        started = time.perf_counter()
+        count = asyncio.run(crawl(api, video.bvid, concurrency, limiter, keep_comments, cache))
+        elapsed = time.perf_counter() - started
+        throttled = server.throttled
+
+    peak = peak_rss_mb()
+    return {
+        'expected_comments': video.total,
+        'comments': count,
+        'requests': api.requests,
+        'throttled': throttled,
+        'wall_time': round(elapsed, 3),
+        'requests_per_sec': round(api.requests / elapsed, 1),
+        'comments_per_sec': round(count / elapsed, 1),
+        'peak_rss_mb': round(peak, 1) if peak is not None else None,
+        'final_rate': round(limiter.rate, 2),
+        'cache_hits': cache.hits if cache else 0,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='在本地模拟接口上测量评论爬取吞吐量')
+    parser.add_argument('--roots', type=int, default=2000, help='主评论数量')
+    parser.add_argument('--fanout', type=int, default=30, help='有回复的主评论下的回复数')
+    parser.add_argument('--reply-every', type=int, default=5, help='每隔多少条主评论有一条带回复')
+    parser.add_argument('--latency', type=float, default=0.02, help='模拟接口的响应延迟(秒)')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='随机返回 -412 的概率')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--max-rate', type=float, default=1000.0, help='限速器最高速率(次/秒)')
+    parser.add_argument('--no-keep', action='store_true', help='引擎不保留评论，只计数')
+    parser.add_argument('--cache', metavar='DIR', help='使用响应缓存目录，重复运行可测量缓存命中时的速度')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.roots, args.fanout, args.reply_every, args.latency, args.throttle_rate,
+                           args.concurrency, args.max_rate, not args.no_keep, args.cache)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+        return
+    print(f"评论: {result['comments']}/{result['expected_comments']}  请求: {result['requests']}"
+          f"(限流 {result['throttled']})")
+    print(f"耗时: {result['wall_time']} 秒  请求/秒: {result['requests_per_sec']}  "
+          f"评论/秒: {result['comments_per_sec']}")
+    print(f"内存峰值: {result['peak_rss_mb']} MB  结束时限速: {result['final_rate']} 次/秒  "
+          f"缓存命中: {result['cache_hits']}")
+
+
+if __name__ == '__main__':
+    main()
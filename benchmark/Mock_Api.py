@@ -0,0 +1,48 @@
+import aiohttp
+
+
+class MockResponseError(Exception):
+    """与 bilibili_api 的 ResponseCodeException 一样带 code，限流判断逻辑可以原样生效"""
+
+    def __init__(self, code, message, status=200):
+        super().__init__(f'接口返回错误码 {code}: {message}')
+        self.code = code
+        self.status = status
+
+
+class MockCommentApi:
+    """
+    请求本地模拟接口的评论客户端，方法签名与 Core.Bili_Api.BiliCommentApi 一致
+
+    会话在第一次请求时于当前事件循环中创建，整个爬取过程复用长连接。
+    """
+
+    def __init__(self, base_url, connection_limit=32):
+        self.base_url = base_url.rstrip('/')
+        self.connection_limit = connection_limit
+        self.requests = 0
+        self._session = None
+
+    async def _get(self, path, **params):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.connection_limit))
+        self.requests += 1
+        async with self._session.get(self.base_url + path, params=params) as response:
+            body = await response.json(content_type=None)
+        if body.get('code') != 0:
+            raise MockResponseError(body.get('code'), body.get('message'), response.status)
+        return body['data']
+
+    async def get_video_info(self, bv_id, credential=None):
+        return await self._get('/x/web-interface/view', bvid=bv_id)
+
+    async def get_comments(self, aid, page, order='time', credential=None):
+        return await self._get('/x/v2/reply', oid=aid, type=1, pn=page, sort=0 if order == 'time' else 1)
+
+    async def get_sub_comments(self, aid, rpid, page, page_size=20, credential=None):
+        return await self._get('/x/v2/reply/reply', oid=aid, type=1, root=rpid, pn=page, ps=page_size)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
@@ -0,0 +1,184 @@
+import json
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+
+class MockVideo:
+    """
+    合成的视频评论数据
+
+    共 roots 条主评论，按时间倒序排列；每隔 reply_every 条主评论有一条带 fanout 条回复。
+    所有数据由序号推算，不占额外内存，同样的参数每次生成的数据相同。
+    """
+
+    ROOT_PAGE_SIZE = 20
+
+    def __init__(self, roots=2000, fanout=30, reply_every=5, aid=10001, bvid='BV1Mock00001'):
+        self.roots = roots
+        self.fanout = fanout
+        self.reply_every = max(1, reply_every)
+        self.aid = aid
+        self.bvid = bvid
+        self.base_time = int(time.time())
+
+    @property
+    def total(self):
+        return self.roots + self.root_with_replies * self.fanout
+
+    @property
+    def root_with_replies(self):
+        return (self.roots + self.reply_every - 1) // self.reply_every if self.fanout else 0
+
+    def rcount(self, index):
+        return self.fanout if index % self.reply_every == 0 else 0
+
+    def root_rpid(self, index):
+        return 10_000_000 + index
+
+    def info(self):
+        return {
+            'aid': self.aid,
+            'bvid': self.bvid,
+            'title': f'压测视频 {self.bvid}',
+            'pic': '',
+            'pubdate': self.base_time - 86400,
+            'owner': {'mid': 1, 'name': '压测UP主'},
+            'stat': {'reply': self.total, 'view': 0, 'like': 0},
+            }
+
+    def root_page(self, page):
+        start = (page - 1) * self.ROOT_PAGE_SIZE
+        replies = [self._comment(self.root_rpid(i), 0, self.base_time - i * 30, self.rcount(i))
+                   for i in range(start, min(start + self.ROOT_PAGE_SIZE, self.roots))]
+        return {
+            'page': {'num': page, 'size': self.ROOT_PAGE_SIZE, 'count': self.roots, 'acount': self.total},
+            'replies': replies,
+            }
+
+    def sub_page(self, root, page, page_size):
+        index = root - 10_000_000
+        count = self.rcount(index) if 0 <= index < self.roots else 0
+        start = (page - 1) * page_size
+        replies = [self._comment(root * 1000 + j, root, self.base_time - index * 30 + j + 1, 0)
+                   for j in range(start, min(start + page_size, count))]
+        return {'page': {'num': page, 'size': page_size, 'count': count}, 'replies': replies}
+
+    @staticmethod
+    def _comment(rpid, parent, ctime, rcount):
+        return {
+            'rpid': rpid,
+            'oid': 0,
+            'root': parent,
+            'parent': parent,
+            'ctime': ctime,
+            'like': rpid % 97,
+            'rcount': rcount,
+            'member': {'mid': rpid % 100000, 'uname': f'用户{rpid % 100000}', 'sex': '保密'},
+            'content': {'message': f'这是第 {rpid} 条测试评论，用于压测爬取速度。'},
+            'reply_control': {'location': 'IP属地：本地'},
+            }
+
+
+class MockBiliServer:
+    """
+    本地模拟的B站评论接口，基于标准库 http.server
+
+    路径与B站一致：/x/web-interface/view、/x/v2/reply、/x/v2/reply/reply。
+    latency 为每个请求的固定延迟（秒），throttle_rate 为随机返回 -412 的概率。
+    """
+
+    def __init__(self, video=None, latency=0.02, throttle_rate=0.0, host='127.0.0.1', port=0, seed=0):
+        self.video = video or MockVideo()
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.requests = 0
+        self.throttled = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def handle(self, path, query):
+        """返回 (HTTP 状态码, 响应体)"""
+        with self._lock:
+            self.requests += 1
+            throttled = self._random.random() < self.throttle_rate
+            if throttled:
+                self.throttled += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if throttled:
+            return 412, {'code': -412, 'message': '请求被拦截', 'data': None}
+
+        if path == '/x/web-interface/view':
+            return 200, {'code': 0, 'message': '0', 'data': self.video.info()}
+        if path == '/x/v2/reply':
+            return 200, {'code': 0, 'message': '0', 'data': self.video.root_page(int(query.get('pn', 1)))}
+        if path == '/x/v2/reply/reply':
+            data = self.video.sub_page(int(query['root']), int(query.get('pn', 1)), int(query.get('ps', 20)))
+            return 200, {'code': 0, 'message': '0', 'data': data}
+        return 404, {'code': -404, 'message': '啥都木有', 'data': None}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                status, body = server.handle(url.path, query)
+                payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='本地模拟B站评论接口')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--roots', type=int, default=2000)
+    parser.add_argument('--fanout', type=int, default=30)
+    parser.add_argument('--reply-every', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    mock = MockBiliServer(MockVideo(args.roots, args.fanout, args.reply_every), args.latency, args.throttle_rate,
+                          port=args.port)
+    print(f'模拟接口已启动: {mock.base_url}，共 {mock.video.total} 条评论')
+    mock._server.serve_forever()
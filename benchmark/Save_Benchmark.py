@@ -0,0 +1,112 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import pandas as pd
+from Core.Comment_Analysis import local_times
+from Core.Comment_Dataset import process_comments
+from Core.Comment_Record import CommentRecord
+
+
+def make_records(count, fanout=30, reply_every=5, seed=0):
+    """生成 count 条评论记录：每隔 reply_every 条主评论有一条带 fanout 条回复"""
+    rng = random.Random(seed)
+    records = []
+    rpid = 1
+    ctime = 1700000000
+    i = 0
+    while len(records) < count:
+        root = rpid
+        records.append(CommentRecord(root, 0, rng.randrange(1, 10 ** 9), f'用户{root}', '保密', f'主评论 {root}',
+                                     ctime, rng.randrange(1000), location='IP属地：上海'))
+        rpid += 1
+        ctime += rng.randrange(1, 30)
+        if i % reply_every == 0:
+            for _ in range(min(fanout, count - len(records))):
+                records.append(CommentRecord(rpid, root, rng.randrange(1, 10 ** 9), f'用户{rpid}', '男',
+                                             f'回复 {rpid}', ctime, rng.randrange(100), location='IP属地：北京'))
+                rpid += 1
+                ctime += rng.randrange(1, 10)
+        i += 1
+    return records
+
+
+def legacy_process(records, progress_callback=None):
+    """逐条调用 to_info 的整理方式（对照组），每 100 条回调一次进度"""
+    processed = {}
+    children_map = {}
+    for i, cmt in enumerate(records, 1):
+        if not cmt.is_sub_reply:
+            info = cmt.to_info()
+            info['replies'] = []
+            processed[cmt.rpid] = info
+        else:
+            children_map.setdefault(cmt.parent, []).append(cmt.to_info())
+        if progress_callback and i % 100 == 0:
+            progress_callback(1, 3, f"已分流{i}/{len(records)} 条评论")
+    for parent_id, replies in children_map.items():
+        if parent_id in processed:
+            processed[parent_id]['replies'] = replies
+    return processed
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, round(time.perf_counter() - started, 3)
+
+
+def run_benchmark(count):
+    """分别测量整理数据集与生成时间列两步的耗时，返回各项指标"""
+    records = make_records(count)
+    calls = [0, 0]
+
+    def legacy_progress(*_):
+        calls[0] += 1
+
+    def batch_progress(*_):
+        calls[1] += 1
+
+    legacy, legacy_time = timed(legacy_process, records, legacy_progress)
+    batch, batch_time = timed(process_comments, records, None, batch_progress)
+    assert legacy.keys() == batch.keys()
+
+    texts = pd.Series([cmt.to_info()['time'] for cmt in records])
+    ctimes = pd.Series([cmt.ctime for cmt in records], dtype='int64')
+    parsed, parse_time = timed(pd.to_datetime, texts)
+    converted, convert_time = timed(local_times, ctimes)
+    assert parsed.equals(converted)
+    return {
+        'comments': count,
+        'process_legacy': legacy_time,
+        'process_batch': batch_time,
+        'progress_calls_legacy': calls[0],
+        'progress_calls_batch': calls[1],
+        'time_parse_iso': parse_time,
+        'time_from_ctime': convert_time,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测量评论整理（process_comments）与分析时间列的耗时')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000], help='评论数量，可给多个')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args()
+
+    for count in args.sizes:
+        result = run_benchmark(count)
+        if args.json:
+            print(json.dumps(result, ensure_ascii=False))
+            continue
+        print(f"评论: {result['comments']}")
+        print(f"  整理数据集: 逐条 {result['process_legacy']} 秒 -> 批量 {result['process_batch']} 秒  "
+              f"进度回调: {result['progress_calls_legacy']} -> {result['progress_calls_batch']} 次")
+        print(f"  时间列: 解析字符串 {result['time_parse_iso']} 秒 -> 由 ctime 换算 {result['time_from_ctime']} 秒")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+# benchmark/__init__.py
@@ -0,0 +1,359 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from Core.Bili_Api import BiliCommentApi
+from Core.Columnar_Dataset import save_columnar, columnar_filename
+from Core.Comment_Dataset import process_comments, build_data_structure, save_dataset, save_records, \
+    iter_dataset_records, dataset_filename, dataset_format
+from Core.Compression import EXTENSIONS, split_compression
+from Core.Comment_Store import CommentStore
+from Core.Credential_Pool import get_shared_pool
+from Core.Crawl_Scheduler import CrawlScheduler, CrawlJob
+from Core.Dataset_Merge import merge_datasets
+from Core.Incremental import IncrementalSeed
+from Core.Monitor import VideoMonitor
+from Core.Rate_Limiter import configure_shared_limiter
+from Core.Response_Cache import get_shared_cache
+from Core.Settings import Settings, load_credential, credential_path, credential_pool_path, journal_dir, \
+    response_cache_dir
+from Core.Transport import configure_bili_client
+
+# --compress 的取值 -> 扩展名
+COMPRESS_EXTENSIONS = {codec: extension for extension, codec in EXTENSIONS.items()}
+
+
+class ProgressPrinter:
+    """
+    输出进度：--ndjson 时每个事件一行 JSON 写到标准输出，否则以文字写到标准错误
+
+    标准输出留给命令结果时（如 query 输出的评论）传入 to_stderr=True，JSON 事件也写到标准错误。
+    """
+
+    def __init__(self, ndjson=False, interval=0.5, to_stderr=False):
+        self.ndjson = ndjson
+        self.interval = interval
+        self.to_stderr = to_stderr
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        with self._lock:
+            if self.ndjson:
+                print(json.dumps({'event': event, 'time': round(time.time(), 3), **fields}, ensure_ascii=False),
+                      file=sys.stderr if self.to_stderr else sys.stdout, flush=True)
+            else:
+                detail = '  '.join(f'{key}={value}' for key, value in fields.items())
+                print(f'[{event}] {detail}', file=sys.stderr, flush=True)
+
+    def job_update(self, job):
+        """爬取中的进度按 interval 节流，状态变化总是输出"""
+        now = time.monotonic()
+        key = (job.bv_id, job.state)
+        if job.state == CrawlJob.RUNNING and now - self._last.get(key, 0) < self.interval:
+            return
+        self._last[key] = now
+        self.emit('job', bv=job.bv_id, state=job.state, count=job.count, message=job.message)
+
+
+def parse_bv_ids(values, list_file=None):
+    text = ' '.join(values)
+    if list_file:
+        with open(list_file, 'r', encoding='utf-8') as f:
+            text += '\n' + f.read()
+    return list(dict.fromkeys(re.findall('BV.{10}', text)))
+
+
+def save_comments(filename, comments, seed, video_info, failed_rpids):
+    """按扩展名保存为 JSON、NDJSON 或列式数据集（.gz / .zst 时压缩），增量爬取时合并到基准数据上"""
+    file_format = dataset_format(filename)
+    if file_format == 'json':
+        processed_comments = process_comments(comments, seed.comments if seed else None, failed_rpids=failed_rpids)
+        save_dataset(build_data_structure(processed_comments, video_info, failed_rpids), filename)
+        return
+    records = comments if seed is None else \
+        iter_dataset_records(process_comments(comments, seed.comments, failed_rpids=failed_rpids))
+    if file_format == 'jsonl':
+        save_records(records, filename, video_info, failed_rpids)
+    else:
+        save_columnar(records, filename, video_info, failed_rpids)
+
+
+def run_crawl(args, settings, printer):
+    bv_ids = parse_bv_ids(args.bv, args.list)
+    if not bv_ids:
+        printer.emit('error', message='没有有效的BV号')
+        return 2
+    if args.compress and args.format == 'cols':
+        printer.emit('error', message='列式数据集需要内存映射读取，不能压缩保存')
+        return 2
+    seed = None
+    if args.base:
+        if len(bv_ids) > 1:
+            printer.emit('error', message='--base 只能用于单个视频')
+            return 2
+        seed = IncrementalSeed.from_file(args.base)
+
+    configure_bili_client()
+    credential = load_credential(args.credential)
+    if credential is None:
+        printer.emit('warning', message=f'未找到登录凭证 {args.credential}，以未登录状态爬取')
+    limiter = configure_shared_limiter(max_rate=args.max_rate or settings.max_request_rate,
+                                       min_rate=settings.min_request_rate)
+    pool = None
+    if settings.use_credential_pool:
+        pool = get_shared_pool(credential_pool_path, max_rate=settings.max_request_rate,
+                               min_rate=settings.min_request_rate)
+        if credential is not None:
+            pool.add(credential)
+    cache = None
+    if settings.use_response_cache:
+        cache = get_shared_cache(response_cache_dir, ttl=settings.cache_ttl_hours * 3600,
+                                 max_bytes=settings.cache_size_mb * 1024 * 1024)
+
+    save_dir = args.out or settings.save_commentFolder or os.getcwd()
+    os.makedirs(save_dir, exist_ok=True)
+
+    def save_job(job, comments):
+        extension = f'.{args.format}' + (COMPRESS_EXTENSIONS[args.compress] if args.compress else '')
+        filename = dataset_filename(save_dir, job.video_info, extension)
+        save_comments(filename, comments, job.seed, job.video_info, job.failed_rpids)
+        printer.emit('saved', bv=job.bv_id, path=filename, count=len(comments), failed_rpids=list(job.failed_rpids))
+        if args.also_cols and args.format != 'cols':
+            cols_path = columnar_filename(filename)
+            save_comments(cols_path, comments, job.seed, job.video_info, job.failed_rpids)
+            printer.emit('saved', bv=job.bv_id, path=cols_path, count=len(comments),
+                         failed_rpids=list(job.failed_rpids))
+        if args.store:
+            # 在线程池中执行，每次单独打开连接
+            with CommentStore(args.store) as store:
+                store.upsert_video(job.video_info)
+                run_id = store.begin_run(job.video_info['aid'], 'full' if job.seed is None else 'incremental')
+                store.upsert_comments(job.video_info['aid'], comments, run_id)
+                store.finish_run(run_id, len(comments), job.failed_rpids)
+            printer.emit('stored', bv=job.bv_id, path=args.store, count=len(comments))
+        return filename
+
+    scheduler = CrawlScheduler(
+        BiliCommentApi(credential),
+        concurrency=args.concurrency or settings.concurrency,
+        max_active_jobs=args.jobs,
+        limiter=limiter,
+        pool=pool,
+        cache=None if seed else cache,
+        journal_dir=journal_dir,
+        on_update=printer.job_update,
+        on_finished=save_job
+        )
+    for bv_id in bv_ids:
+        scheduler.add_job(bv_id, seed=seed)
+    asyncio.run(scheduler.run())
+
+    jobs = list(scheduler.jobs.values())
+    saved = [job.result_path for job in jobs if job.state == CrawlJob.FINISHED]
+    printer.emit('done', finished=len(saved), failed=len(jobs) - len(saved))
+    if args.analyze and saved:
+        run_analysis(saved, args.analysis_jobs, printer)
+    return 0 if len(saved) == len(jobs) else 1
+
+
+def run_monitor(args, settings, printer):
+    bv_ids = parse_bv_ids(args.bv, args.list)
+    if not bv_ids:
+        printer.emit('error', message='没有有效的BV号')
+        return 2
+
+    configure_bili_client()
+    credential = load_credential(args.credential)
+    if credential is None:
+        printer.emit('warning', message=f'未找到登录凭证 {args.credential}，以未登录状态爬取')
+    limiter = configure_shared_limiter(max_rate=args.max_rate or settings.max_request_rate,
+                                       min_rate=settings.min_request_rate)
+    save_dir = args.out or os.path.join(settings.save_commentFolder or os.getcwd(), 'monitor')
+    os.makedirs(save_dir, exist_ok=True)
+
+    monitor = VideoMonitor(
+        BiliCommentApi(credential), save_dir,
+        interval=args.interval,
+        jitter=args.jitter,
+        max_workers=args.jobs,
+        concurrency=args.concurrency or settings.concurrency,
+        limiter=limiter,
+        keep=args.keep,
+        on_snapshot=lambda bv_id, path, row: printer.emit('snapshot', path=path, **row),
+        on_error=lambda bv_id, e: printer.emit('snapshot_failed', bv=bv_id, message=str(e))
+        )
+    for bv_id in bv_ids:
+        monitor.add(bv_id)
+    printer.emit('monitor', videos=bv_ids, interval=args.interval, out=save_dir)
+    monitor.run_forever()
+    return 0
+
+
+def run_query(args, printer):
+    """按条件查询评论库，每条评论一行 JSON 输出到标准输出"""
+    with CommentStore(args.db) as store:
+        aid = None
+        if args.bv:
+            aid = store.find_aid(args.bv)
+            if aid is None:
+                printer.emit('error', message=f'评论库中没有视频 {args.bv}')
+                return 2
+        start = int(datetime.strptime(args.start, '%Y-%m-%d').timestamp()) if args.start else None
+        end = int((datetime.strptime(args.end, '%Y-%m-%d') + timedelta(days=1)).timestamp()) if args.end else None
+        records = store.query(aid, start=start, end=end, user_id=args.user,
+                              parent=0 if args.roots else None,
+                              order='like' if args.top else 'ctime',
+                              limit=args.top or args.limit)
+    for cmt in records:
+        print(json.dumps(cmt.to_dict(), ensure_ascii=False))
+    printer.emit('done', count=len(records))
+    return 0
+
+
+def run_merge(args, printer):
+    """合并同一视频的多个数据集文件，按 rpid 去重"""
+    try:
+        summary = merge_datasets(args.files, args.output,
+                                 lambda current, total, message: printer.emit('progress', message=message))
+    except ValueError as e:
+        printer.emit('error', message=str(e))
+        return 2
+    printer.emit('merged', path=summary['output'], files=summary['files'], input=summary['input'],
+                 duplicates=summary['duplicates'], count=summary['comments'],
+                 failed_rpids=summary['failed_rpids'])
+    return 0
+
+
+def run_diff(args, printer):
+    """比较两次快照：新增、消失、内容变化的评论与点赞变化排行"""
+    from Core.Snapshot_Diff import diff_snapshots
+    try:
+        diff = diff_snapshots(args.old, args.new)
+    except ValueError as e:
+        printer.emit('error', message=str(e))
+        return 2
+    if args.report:
+        diff.save_report(args.report)
+    printer.emit('diff', old=args.old, new=args.new, report=args.report, **diff.summary(args.top))
+    return 0
+
+
+def analyze_file(path, workers=1):
+    """在子进程中执行：分析一个评论文件，摘要写到同名的 .analysis.json"""
+    from Core.Comment_Analysis import analyze_dataset, summarize_result
+    stem = os.path.splitext(split_compression(path)[0])[0]
+    summary = summarize_result(analyze_dataset(path, output_prefix=f'{stem}_', workers=workers))
+    summary_path = f'{stem}.analysis.json'
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary_path, summary
+
+
+def run_analysis(files, jobs, printer):
+    failed = 0
+    jobs = max(1, min(jobs, len(files)))
+    # 同时分析的文件较少时，剩余的核心留给各文件的分词与情感分析进程
+    workers = max(1, (os.cpu_count() or 1) // jobs)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(analyze_file, path, workers): path for path in files}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                summary_path, summary = future.result()
+            except Exception as e:
+                failed += 1
+                printer.emit('analysis_failed', path=path, message=str(e))
+                continue
+            printer.emit('analyzed', path=path, summary=summary_path, comments=summary['comment_count'],
+                         sentiment=summary['sentiment'])
+    return 0 if failed == 0 else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='EchoBi 命令行：无界面爬取、保存与分析B站评论')
+    parser.add_argument('--ndjson', action='store_true', help='进度以 JSON Lines 输出到标准输出')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    crawl = sub.add_parser('crawl', help='爬取并保存评论')
+    crawl.add_argument('bv', nargs='*', help='BV号或视频链接')
+    crawl.add_argument('--list', help='BV号列表文件')
+    crawl.add_argument('--out', help='保存目录，默认为设置中的评论保存目录')
+    crawl.add_argument('--jobs', type=int, default=2, help='同时爬取的视频数')
+    crawl.add_argument('--concurrency', type=int, help='并发请求数，默认取设置')
+    crawl.add_argument('--max-rate', type=float, help='最高请求速率(次/秒)，默认取设置')
+    crawl.add_argument('--base', help='增量爬取的基准评论文件（仅限单个视频）')
+    crawl.add_argument('--credential', default=credential_path, help='登录凭证文件')
+    crawl.add_argument('--format', choices=('json', 'jsonl', 'cols'), default='json',
+                       help='保存格式：JSON 数据集、NDJSON（每行一条评论）或列式数据集')
+    crawl.add_argument('--compress', choices=tuple(COMPRESS_EXTENSIONS),
+                       help='压缩保存（zstd 需要安装 zstandard），列式数据集不支持压缩')
+    crawl.add_argument('--also-cols', action='store_true', help='同时保存一份列式数据集（.cols）')
+    crawl.add_argument('--store', help='同时写入的评论库（SQLite），已有的数据直接合并')
+    crawl.add_argument('--analyze', action='store_true', help='保存后进行分析')
+    crawl.add_argument('--analysis-jobs', type=int, default=os.cpu_count() or 1, help='并行分析的进程数')
+
+    monitor = sub.add_parser('monitor', help='定时增量爬取视频，保存快照与评论趋势')
+    monitor.add_argument('bv', nargs='*', help='BV号或视频链接')
+    monitor.add_argument('--list', help='BV号列表文件')
+    monitor.add_argument('--out', help='快照目录，默认为评论保存目录下的 monitor')
+    monitor.add_argument('--interval', type=float, default=30, help='每个视频的爬取间隔(分钟)')
+    monitor.add_argument('--jitter', type=float, default=120, help='每次爬取随机推迟的最大秒数')
+    monitor.add_argument('--jobs', type=int, default=2, help='同时爬取的视频数')
+    monitor.add_argument('--concurrency', type=int, help='并发请求数，默认取设置')
+    monitor.add_argument('--max-rate', type=float, help='最高请求速率(次/秒)，默认取设置')
+    monitor.add_argument('--keep', type=int, help='每个视频保留的快照数，默认全部保留')
+    monitor.add_argument('--credential', default=credential_path, help='登录凭证文件')
+
+    query = sub.add_parser('query', help='查询评论库，每条评论一行 JSON')
+    query.add_argument('db', help='评论库文件')
+    query.add_argument('--bv', help='只查某个视频')
+    query.add_argument('--start', help='开始日期，如 2024-01-01')
+    query.add_argument('--end', help='结束日期（含）')
+    query.add_argument('--user', type=int, help='只查某个用户ID')
+    query.add_argument('--roots', action='store_true', help='只查主评论')
+    query.add_argument('--top', type=int, help='按点赞数取前N条')
+    query.add_argument('--limit', type=int, help='最多输出条数')
+
+    merge = sub.add_parser('merge', help='合并同一视频的多个评论文件，按 rpid 去重，点赞数与回复取最新')
+    merge.add_argument('files', nargs='+')
+    merge.add_argument('-o', '--output', required=True, help='保存路径，格式由扩展名决定')
+
+    diff = sub.add_parser('diff', help='比较同一视频的两次快照：新增、消失、内容变化的评论与点赞变化')
+    diff.add_argument('old', help='较早的快照文件')
+    diff.add_argument('new', help='较新的快照文件')
+    diff.add_argument('--top', type=int, default=10, help='点赞变化排行的条数')
+    diff.add_argument('--report', help='把全部差异逐条写入 NDJSON 文件（.gz / .zst 时压缩）')
+
+    analyze = sub.add_parser('analyze', help='分析已保存的评论文件')
+    analyze.add_argument('files', nargs='+')
+    analyze.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='并行分析的进程数')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # query 的评论写到标准输出，进度事件改写到标准错误，避免混在一起
+    printer = ProgressPrinter(args.ndjson, to_stderr=args.command == 'query')
+    if args.command == 'crawl':
+        return run_crawl(args, Settings.load(), printer)
+    if args.command == 'monitor':
+        return run_monitor(args, Settings.load(), printer)
+    if args.command == 'query':
+        return run_query(args, printer)
+    if args.command == 'merge':
+        return run_merge(args, printer)
+    if args.command == 'diff':
+        return run_diff(args, printer)
+    return run_analysis(args.files, args.jobs, printer)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
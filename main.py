@@ -2,8 +2,10 @@ from GUI.MainWindows import BilibiliCommentGUI
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import Qt, QRect, QUrl
 from QThread.Load_Settings import cfg
+from Core.Transport import configure_bili_client, close_session
 import sys
 import os
+import multiprocessing
 from PyQt5.QtGui import QIcon
 from qfluentwidgets import setTheme, Theme
 import traceback
@@ -23,14 +25,18 @@ def main():
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
     QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
     app = QApplication(sys.argv)
+    configure_bili_client()
 
     window = BilibiliCommentGUI()
     window.show()
 
     app.aboutToQuit.connect(save_config_on_exit)
+    app.aboutToQuit.connect(close_session)
 
     sys.exit(app.exec_())
 
 
 if __name__ == '__main__':
+    # 打包后的程序在 Windows 上启动分词子进程时需要
+    multiprocessing.freeze_support()
     main()